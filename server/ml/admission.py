@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Admission Control for the Prediction Services
+Bounds in-flight work, queues a limited number of requests and sheds the rest
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+
+class OverloadedError(Exception):
+    """Raised when a request is rejected because the service is saturated"""
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class DeadlineExceededError(OverloadedError):
+    """Raised when a request's deadline passes before it can be served"""
+
+
+def parse_deadline(header_value):
+    """Parse an X-Request-Deadline header (Unix epoch milliseconds) into epoch seconds"""
+    if not header_value:
+        return None
+    try:
+        return float(header_value) / 1000.0
+    except (TypeError, ValueError):
+        return None
+
+
+class AdmissionController:
+    def __init__(self, max_in_flight=8, max_queue=64, max_queue_wait_ms=5000):
+        """
+        max_in_flight: requests allowed to run inference concurrently
+        max_queue: requests allowed to wait for a slot; the rest are rejected
+        max_queue_wait_ms: longest a request without a deadline may wait
+        """
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.max_queue = max(0, int(max_queue))
+        self.max_queue_wait_ms = max(0.0, float(max_queue_wait_ms))
+
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._waiting = 0
+
+        # Exponentially weighted average service time, used for Retry-After
+        self._avg_service_s = 0.05
+
+        # Metrics
+        self._admitted = 0
+        self._queued = 0
+        self._rejected_queue_full = 0
+        self._rejected_deadline = 0
+
+    def retry_after(self):
+        """Estimate in seconds until the current backlog drains"""
+        backlog = self._waiting + self._in_flight
+        return max(1, math.ceil(backlog * self._avg_service_s / self.max_in_flight))
+
+    def acquire(self, deadline=None):
+        """Take an in-flight slot, waiting in the bounded queue if necessary"""
+        with self._cond:
+            if deadline is not None and deadline <= time.time():
+                self._rejected_deadline += 1
+                raise DeadlineExceededError("Request deadline already passed", self.retry_after())
+
+            if self._in_flight < self.max_in_flight and self._waiting == 0:
+                self._in_flight += 1
+                self._admitted += 1
+                return
+
+            if self._waiting >= self.max_queue:
+                self._rejected_queue_full += 1
+                raise OverloadedError("Prediction queue is full", self.retry_after())
+
+            # Wait for a slot until the request deadline or the queue wait limit
+            wait_until = time.time() + self.max_queue_wait_ms / 1000.0
+            if deadline is not None:
+                wait_until = min(wait_until, deadline)
+
+            self._waiting += 1
+            self._queued += 1
+            try:
+                while self._in_flight >= self.max_in_flight:
+                    remaining = wait_until - time.time()
+                    if remaining <= 0:
+                        self._rejected_deadline += 1
+                        raise DeadlineExceededError("Timed out waiting in prediction queue", self.retry_after())
+                    self._cond.wait(remaining)
+
+                self._in_flight += 1
+                self._admitted += 1
+            finally:
+                self._waiting -= 1
+
+    def release(self, service_time_s=None):
+        """Return an in-flight slot"""
+        with self._cond:
+            self._in_flight -= 1
+            if service_time_s is not None:
+                self._avg_service_s = 0.9 * self._avg_service_s + 0.1 * service_time_s
+            self._cond.notify()
+
+    @contextmanager
+    def admit(self, deadline=None):
+        """Context manager holding an in-flight slot for the duration of a request"""
+        self.acquire(deadline)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(time.perf_counter() - started)
+
+    def get_stats(self):
+        """Get admission control metrics"""
+        with self._cond:
+            return {
+                'max_in_flight': self.max_in_flight,
+                'max_queue': self.max_queue,
+                'max_queue_wait_ms': self.max_queue_wait_ms,
+                'in_flight': self._in_flight,
+                'waiting': self._waiting,
+                'admitted': self._admitted,
+                'queued': self._queued,
+                'rejected_queue_full': self._rejected_queue_full,
+                'rejected_deadline': self._rejected_deadline,
+                'avg_service_ms': self._avg_service_s * 1000.0
+            }
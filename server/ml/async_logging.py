@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Asynchronous Service Logging
+Queue-backed, sampled logging so request threads never block on log I/O
+"""
+
+import atexit
+import json
+import logging
+import os
+import random
+import sys
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from queue import Queue, Full
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Handler and listener installed by configure_logging()
+_queue_handler = None
+_listener = None
+_sampling_filter = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including structured fields passed as extra={'fields': {...}}"""
+
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """The services' classic text format with structured fields appended as key=value"""
+
+    def __init__(self):
+        super().__init__(TEXT_FORMAT)
+
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, 'fields', None)
+        if fields:
+            line += ' ' + ' '.join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of INFO/DEBUG records; warnings and errors are always kept"""
+
+    def __init__(self, default_rate=1.0, rates=None):
+        super().__init__()
+        self.default_rate = default_rate
+        # Logger name prefix -> sample rate, longest prefix wins
+        self.rates = sorted((rates or {}).items(), key=lambda item: len(item[0]), reverse=True)
+        self.sampled_out = 0
+
+    def _rate_for(self, name):
+        for prefix, rate in self.rates:
+            if name.startswith(prefix):
+                return rate
+        return self.default_rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate_for(record.name)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hands records to the writer thread unformatted and drops them when the queue is full"""
+
+    def __init__(self, queue):
+        super().__init__(queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Formatting happens on the writer thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except Full:
+            self.dropped += 1
+
+
+def configure_logging(level=logging.INFO, request_loggers=(), stream=None):
+    """
+    Configure root logging from the environment.
+
+    ML_LOG_MODE: 'async' (default) writes from a background thread, 'sync' writes inline
+    ML_LOG_FORMAT: 'text' (default) or 'json'
+    ML_LOG_SAMPLE_RATE: fraction of INFO/DEBUG records kept (default 1.0)
+    ML_REQUEST_LOG_SAMPLE_RATE: fraction kept for per-request loggers (default 1.0)
+    ML_LOG_QUEUE_SIZE: records buffered before new ones are dropped (default 10000)
+    """
+    global _queue_handler, _listener, _sampling_filter
+
+    mode = os.environ.get('ML_LOG_MODE', 'async')
+    log_format = os.environ.get('ML_LOG_FORMAT', 'text')
+    default_rate = float(os.environ.get('ML_LOG_SAMPLE_RATE', 1.0))
+    request_rate = float(os.environ.get('ML_REQUEST_LOG_SAMPLE_RATE', 1.0))
+    queue_size = int(os.environ.get('ML_LOG_QUEUE_SIZE', 10000))
+
+    output_handler = logging.StreamHandler(stream or sys.stdout)
+    output_handler.setFormatter(JsonFormatter() if log_format == 'json' else TextFormatter())
+
+    _sampling_filter = SamplingFilter(default_rate, {name: request_rate for name in request_loggers})
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(level)
+
+    if mode == 'sync':
+        output_handler.addFilter(_sampling_filter)
+        root.addHandler(output_handler)
+        return
+
+    # Sampling runs on the request thread so dropped records are never queued
+    _queue_handler = NonBlockingQueueHandler(Queue(maxsize=queue_size))
+    _queue_handler.addFilter(_sampling_filter)
+    root.addHandler(_queue_handler)
+
+    _listener = QueueListener(_queue_handler.queue, output_handler)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def get_logging_stats():
+    """Get logging queue and sampling metrics"""
+    return {
+        'mode': 'async' if _queue_handler is not None else 'sync',
+        'queued': _queue_handler.queue.qsize() if _queue_handler is not None else 0,
+        'dropped': _queue_handler.dropped if _queue_handler is not None else 0,
+        'sampled_out': _sampling_filter.sampled_out if _sampling_filter is not None else 0
+    }
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Offline Bulk Symptom Scoring
+Streams a CSV/JSONL file of symptom texts through the batch inference path
+across a process pool, writing results in input order with resumable checkpoints
+"""
+
+import csv
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+# Compact output fields; --full adds reasoning, questions and red flags
+SUMMARY_FIELDS = ['recommendedSpecialty', 'confidence', 'urgencyLevel', 'alternativeSpecialties']
+
+# Per-process predictor, loaded once by the pool initializer
+_worker_predictor = None
+
+
+def _init_worker(model_dir, version):
+    """Load the model once in each worker process"""
+    global _worker_predictor
+    from model_registry import ModelRegistry
+
+    registry = ModelRegistry(model_dir)
+    _worker_predictor = registry.get(version or registry.primary_version())
+
+
+def _score_chunk(texts):
+    """Score a chunk of symptom texts in one batched call"""
+    scored = [text for text in texts if text]
+    predictions = iter(_worker_predictor.predict_specialty_batch(scored)) if scored else iter(())
+    return [next(predictions) if text else None for text in texts]
+
+
+def _symptoms_text(value):
+    """Stripped symptoms text; '' when missing, None when the field is not text"""
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        return value.strip()
+    return None
+
+
+def iter_input_rows(path, text_field='symptoms', id_field=None, offset=0):
+    """
+    Stream (row id, symptoms, offset) triples from a CSV or JSONL file.
+    offset: byte position to start reading from, as yielded for an earlier row
+    Each row's offset is where the next row starts. Malformed rows (bad JSON,
+    non-text symptoms) come through with symptoms None instead of stopping the stream.
+    """
+    with open(path, 'rb') as f:
+        if path.endswith('.csv'):
+            # csv.reader pulls one line at a time, so f.tell() after a row is where the next begins
+            reader = csv.reader(line.decode('utf-8') for line in f)
+            header = next(reader, None)
+            if header is None:
+                return
+            if offset:
+                f.seek(offset)
+            for values in reader:
+                if not values:
+                    continue
+                row = dict(zip(header, values))
+                yield (row.get(id_field) if id_field else None), _symptoms_text(row.get(text_field)), f.tell()
+        else:
+            f.seek(offset)
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                if not isinstance(record, dict):
+                    yield None, None, f.tell()
+                    continue
+                yield (record.get(id_field) if id_field else None), _symptoms_text(record.get(text_field)), f.tell()
+
+
+class _OutputWriter:
+    """Writes scored rows as JSONL or CSV"""
+
+    def __init__(self, path, append, full):
+        self.path = path
+        self.is_csv = path.endswith('.csv')
+        self.full = full
+        self.file = open(path, 'a' if append else 'w', encoding='utf-8', newline='')
+
+        if self.is_csv:
+            self.writer = csv.writer(self.file)
+            if not append:
+                self.writer.writerow(['row', 'id', 'symptoms', 'recommendedSpecialty', 'confidence',
+                                      'urgencyLevel', 'alternativeSpecialties', 'error'])
+
+    def write(self, row_number, row_id, symptoms, prediction):
+        if symptoms is None:
+            record = {'row': row_number, 'id': row_id, 'symptoms': None, 'error': 'Malformed row'}
+        elif prediction is None:
+            record = {'row': row_number, 'id': row_id, 'symptoms': symptoms, 'error': 'No symptoms provided'}
+        elif self.full:
+            record = {'row': row_number, 'id': row_id, 'symptoms': symptoms, **prediction}
+        else:
+            record = {'row': row_number, 'id': row_id, 'symptoms': symptoms,
+                      **{field: prediction[field] for field in SUMMARY_FIELDS}}
+
+        if self.is_csv:
+            self.writer.writerow([
+                record['row'], record['id'], record['symptoms'],
+                record.get('recommendedSpecialty'), record.get('confidence'), record.get('urgencyLevel'),
+                json.dumps(record.get('alternativeSpecialties', [])), record.get('error', '')
+            ])
+        else:
+            self.file.write(json.dumps(record) + '\n')
+
+    def flush(self):
+        """Flush to disk and return the current file size"""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def _read_checkpoint(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _write_checkpoint(path, rows_done, input_offset, output_bytes, malformed, run):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({'rows_done': rows_done, 'input_offset': input_offset, 'output_bytes': output_bytes,
+                   'rows_malformed': malformed, 'run': run}, f)
+    os.replace(tmp_path, path)
+
+
+def _run_fingerprint(input_path, version, text_field, id_field, full):
+    """What a checkpoint's rows depend on: the input file, the model version and the output options"""
+    stat = os.stat(input_path)
+    return {
+        'input': {'path': os.path.abspath(input_path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns},
+        'model_version': version,
+        'text_field': text_field,
+        'id_field': id_field,
+        'full': full
+    }
+
+
+def score_file(input_path, output_path, model_dir='models', version=None, workers=None,
+               chunk_size=2000, text_field='symptoms', id_field=None, full=False, resume=True):
+    """Score every row of input_path and stream results to output_path in input order"""
+    from model_registry import ModelRegistry
+
+    # Pin the version up front, so every worker and any resumed run score with the same model
+    registry = ModelRegistry(model_dir)
+    version = version or registry.primary_version()
+    if version is None or not registry.has_version(version):
+        raise ValueError(f"Unknown model version: {version}")
+
+    run = _run_fingerprint(input_path, version, text_field, id_field, full)
+    checkpoint_path = f"{output_path}.checkpoint"
+    checkpoint = _read_checkpoint(checkpoint_path) if resume else None
+
+    # Rows scored from another input or with another model cannot be continued
+    if checkpoint and (checkpoint.get('run') != run or 'input_offset' not in checkpoint):
+        print(f"Checkpoint {checkpoint_path} is for a different input, model version or options; starting over")
+        checkpoint = None
+
+    rows_done, input_offset, malformed = 0, 0, 0
+    if checkpoint and os.path.exists(output_path):
+        rows_done = checkpoint['rows_done']
+        input_offset = checkpoint['input_offset']
+        malformed = checkpoint.get('rows_malformed', 0)
+        # Drop anything written after the last checkpoint
+        with open(output_path, 'r+b') as f:
+            f.truncate(checkpoint['output_bytes'])
+        print(f"Resuming from row {rows_done}")
+
+    workers = workers or os.cpu_count() or 1
+    # Resuming seeks straight to the first unscored row instead of re-reading the ones before it
+    rows = iter_input_rows(input_path, text_field, id_field, offset=input_offset)
+    writer = _OutputWriter(output_path, append=rows_done > 0, full=full)
+
+    started = time.perf_counter()
+    scored = 0
+    last_report = started
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(model_dir, version)) as executor:
+            # Keep a bounded window of chunks in flight and consume them in submission order
+            in_flight = deque()
+            exhausted = False
+
+            while in_flight or not exhausted:
+                while not exhausted and len(in_flight) < workers * 2:
+                    chunk = list(islice(rows, chunk_size))
+                    if not chunk:
+                        exhausted = True
+                        break
+                    in_flight.append((chunk, executor.submit(_score_chunk, [text for _, text, _ in chunk])))
+
+                if not in_flight:
+                    break
+
+                chunk, future = in_flight.popleft()
+                for (row_id, text, _), prediction in zip(chunk, future.result()):
+                    writer.write(rows_done, row_id, text, prediction)
+                    rows_done += 1
+                    malformed += text is None
+                scored += len(chunk)
+                input_offset = chunk[-1][2]
+
+                _write_checkpoint(checkpoint_path, rows_done, input_offset, writer.flush(), malformed, run)
+
+                now = time.perf_counter()
+                if now - last_report >= 5:
+                    print(f"Scored {rows_done} rows ({scored / (now - started):.0f} rows/sec)")
+                    last_report = now
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    rate = scored / elapsed if elapsed > 0 else 0.0
+    print(f"Scored {scored} rows in {elapsed:.2f}s ({rate:.0f} rows/sec) with {workers} workers")
+    if malformed:
+        print(f"Skipped {malformed} malformed rows")
+    print(f"Results written to {output_path}")
+
+    return {'rows_scored': scored, 'rows_total': rows_done, 'rows_malformed': malformed,
+            'seconds': elapsed, 'rows_per_sec': rate}
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Columnar Dataset Format
+Single-file column store for training corpora: symptom strings as offsets +
+UTF-8 bytes, specialty/urgency as categorical codes, numbers as raw arrays.
+Files are memory-mapped and columns are read in place, so loading does not
+parse the corpus and unrequested columns are never touched.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+import pandas as pd
+
+from feature_cache import hash_file
+
+MAGIC = b'HCDS'
+LAYOUT_VERSION = 1
+
+# magic, layout version, JSON header length
+PREAMBLE = struct.Struct('<4sIQ')
+
+# Sections start on cache-line boundaries so every array view is aligned
+ALIGNMENT = 64
+
+# Strings are stored NUL-terminated so a whole column decodes with one split
+TERMINATOR = b'\x00'
+
+CATEGORICAL_COLUMNS = ('specialty', 'urgency')
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _code_dtype(n_categories):
+    """Smallest signed code type; -1 marks a missing value"""
+    for dtype in ('<i1', '<i2', '<i4'):
+        if n_categories <= np.iinfo(dtype).max:
+            return dtype
+    return '<i8'
+
+
+def is_columnar(path):
+    """Whether a file is in the columnar dataset format"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def _encode_column(name, values, categorical):
+    """Column description and its sections (bytes-like, in file order)"""
+    if categorical:
+        codes, categories = pd.factorize(values, sort=True)
+        codes = codes.astype(_code_dtype(len(categories)))
+        return {'name': name, 'kind': 'category', 'dtype': codes.dtype.str,
+                'categories': [str(category) for category in categories]}, [codes]
+
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        array = values.to_numpy()
+        array = array.astype('<f8' if array.dtype.kind == 'f' or values.hasnans else '<i8')
+        return {'name': name, 'kind': 'numeric', 'dtype': array.dtype.str}, [array]
+
+    # Missing text becomes an empty string, which featurizes to an empty row
+    encoded = [str(value).encode('utf-8') for value in values.fillna('')]
+    data = TERMINATOR.join(encoded) + TERMINATOR if encoded else b''
+    if data.count(TERMINATOR) != len(encoded):
+        raise ValueError(f"Column {name!r} contains NUL characters")
+    offsets = np.zeros(len(encoded) + 1, dtype='<i8')
+    np.cumsum([len(value) + 1 for value in encoded], out=offsets[1:])
+    return {'name': name, 'kind': 'string'}, [offsets, data]
+
+
+def convert_dataset(csv_path, output_path, categorical_columns=CATEGORICAL_COLUMNS):
+    """Write a CSV dataset in the columnar format; returns the file header"""
+    df = pd.read_csv(csv_path)
+
+    columns, sections = [], []
+    for name in df.columns:
+        column, column_sections = _encode_column(name, df[name], name in categorical_columns)
+        columns.append(column)
+        sections.append(column_sections)
+
+    # The hash covers column names, types and category labels as well as the data:
+    # renaming a label keeps its codes but must still change the hash
+    digest = hashlib.sha256()
+    digest.update(json.dumps(columns, separators=(',', ':')).encode('utf-8'))
+
+    # Section offsets are relative to the end of the header, so they do not depend on its length
+    offset = 0
+    for column, column_sections in zip(columns, sections):
+        column['sections'] = []
+        for section in column_sections:
+            payload = memoryview(section).cast('B')
+            offset = _aligned(offset)
+            column['sections'].append([offset, payload.nbytes])
+            digest.update(payload)
+            offset += payload.nbytes
+
+    header = {
+        'rows': len(df),
+        'source': os.path.basename(csv_path),
+        'content_hash': digest.hexdigest(),
+        'columns': columns
+    }
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    data_start = _aligned(PREAMBLE.size + len(header_bytes))
+
+    # Write beside the target and rename, so readers never map a partial file
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(PREAMBLE.pack(MAGIC, LAYOUT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for column, column_sections in zip(columns, sections):
+            for (section_offset, _), section in zip(column['sections'], column_sections):
+                f.seek(data_start + section_offset)
+                f.write(memoryview(section).cast('B'))
+    os.replace(tmp_path, output_path)
+    return header
+
+
+class StringColumn:
+    """Read-only view of a string column; rows are decoded on access"""
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1] - 1]).decode('utf-8')
+
+    def to_list(self):
+        """Every row as a Python string, decoded in one pass"""
+        if not len(self):
+            return []
+        return self.data[:-1].tobytes().decode('utf-8').split(TERMINATOR.decode())
+
+
+class ColumnarDataset:
+    def __init__(self, path):
+        """Memory-map a columnar dataset file; nothing past the header is read yet"""
+        self.path = path
+        with open(path, 'rb') as f:
+            magic, layout_version, header_length = PREAMBLE.unpack(f.read(PREAMBLE.size))
+            if magic != MAGIC:
+                raise ValueError(f"Not a columnar dataset: {path}")
+            if layout_version != LAYOUT_VERSION:
+                raise ValueError(f"Unsupported columnar dataset layout {layout_version}: {path}")
+            self.header = json.loads(f.read(header_length))
+            # The mapping keeps its own reference to the file
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._data_start = _aligned(PREAMBLE.size + header_length)
+        self._columns = {column['name']: column for column in self.header['columns']}
+
+    def __len__(self):
+        return self.header['rows']
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    @property
+    def content_hash(self):
+        """SHA-256 of the column descriptions and data, recorded at conversion"""
+        return self.header['content_hash']
+
+    def _section(self, column, index, dtype):
+        offset, length = column['sections'][index]
+        return np.frombuffer(self._mm, dtype=dtype, count=length // np.dtype(dtype).itemsize,
+                             offset=self._data_start + offset)
+
+    def column(self, name):
+        """
+        A column without copying it: category codes or numbers as read-only arrays
+        over the mapping, or a StringColumn for text
+        """
+        if name not in self._columns:
+            raise KeyError(f"No column {name!r} in {self.path}")
+        column = self._columns[name]
+
+        if column['kind'] == 'string':
+            return StringColumn(self._section(column, 0, '<i8'), self._section(column, 1, np.uint8))
+        return self._section(column, 0, column['dtype'])
+
+    def categories(self, name):
+        """Category values behind a categorical column's codes"""
+        return self._columns[name]['categories']
+
+    def to_frame(self, columns=None):
+        """
+        DataFrame of the requested columns (all by default); categorical columns
+        become pd.Categorical over their stored codes, and other columns' bytes
+        are never read
+        """
+        frame = {}
+        for name in columns or self.columns:
+            column = self._columns.get(name)
+            if column is None:
+                raise KeyError(f"No column {name!r} in {self.path}")
+            values = self.column(name)
+            if column['kind'] == 'string':
+                frame[name] = pd.Series(values.to_list(), dtype=object)
+            elif column['kind'] == 'category':
+                frame[name] = pd.Categorical.from_codes(values, categories=column['categories'])
+            else:
+                frame[name] = values
+        return pd.DataFrame(frame)
+
+
+def dataset_fingerprint(path):
+    """Content hash of a dataset, read from the header of columnar files instead of rehashing them"""
+    if is_columnar(path):
+        return ColumnarDataset(path).content_hash
+    return hash_file(path)
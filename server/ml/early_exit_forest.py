@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Early-Exit Forest Evaluation
+Scores the soft-voting ensemble's random forest in blocks of trees and stops
+for each row once the unevaluated trees can no longer change the top class
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+from scipy import sparse
+
+
+def early_exit_settings():
+    """(block size, tolerance) when ML_RF_EARLY_EXIT=1, else None"""
+    if os.environ.get('ML_RF_EARLY_EXIT', '0') != '1':
+        return None
+    return int(os.environ.get('ML_RF_EARLY_EXIT_BLOCK', 10)), float(os.environ.get('ML_RF_EARLY_EXIT_TOL', 0.0))
+
+
+class EarlyExitVoting:
+    def __init__(self, model, forest_name='rf', block_size=10, tolerance=0.0):
+        """
+        model: fitted soft-voting VotingClassifier with a random forest member
+        block_size: trees evaluated between exit checks
+        tolerance: ensemble probability by which the worst case of the unevaluated
+            trees may still overturn the top class when a row exits (0 never changes it)
+        """
+        self.model = model
+        self.block_size = max(1, int(block_size))
+        self.tolerance = float(tolerance)
+
+        names = list(model.named_estimators_)
+        self.forest_index = names.index(forest_name)
+        self.forest = model.estimators_[self.forest_index]
+
+        weights = np.ones(len(names)) if model.weights is None else np.asarray(model.weights, dtype=np.float64)
+        self.weights = weights / weights.sum()
+
+        self._stats_lock = threading.Lock()
+        self._rows = 0
+        self._trees_evaluated = 0
+        self._early_exits = 0
+
+    @staticmethod
+    def supports(model):
+        """Whether a model is a soft-voting ensemble with a forest member"""
+        return (getattr(model, 'voting', None) == 'soft' and
+                hasattr(getattr(model, 'named_estimators_', {}).get('rf'), 'estimators_'))
+
+    def predict_proba(self, X):
+        """Ensemble class probabilities, with the forest's estimated from the trees each row needed"""
+        n_rows, n_classes = X.shape[0], len(self.model.classes_)
+
+        # The other members are cheap next to 100 trees and are always evaluated in full
+        others = np.zeros((n_rows, n_classes))
+        for i, estimator in enumerate(self.model.estimators_):
+            if i != self.forest_index:
+                others += self.weights[i] * estimator.predict_proba(X)
+
+        # Trees take float32 input; convert once instead of once per tree
+        X = sparse.csr_matrix(X, dtype=np.float32) if sparse.issparse(X) else np.asarray(X, dtype=np.float32)
+
+        trees = self.forest.estimators_
+        n_trees = len(trees)
+        forest_weight = self.weights[self.forest_index]
+
+        votes = np.zeros((n_rows, n_classes))
+        evaluated = np.full(n_rows, n_trees)
+        active = np.arange(n_rows)
+
+        for start in range(0, n_trees, self.block_size):
+            end = min(start + self.block_size, n_trees)
+            X_active = X[active]
+            block_votes = np.zeros((len(active), n_classes))
+            for tree in trees[start:end]:
+                block_votes += tree.predict_proba(X_active, check_input=False)
+            votes[active] += block_votes
+            if end == n_trees:
+                break
+
+            # Each unevaluated tree can move at most 1 / n_trees of the forest's
+            # vote from the leading class to any other class
+            partial = others[active] + forest_weight * votes[active] / n_trees
+            top_two = np.partition(partial, n_classes - 2, axis=1)[:, -2:]
+            margin = top_two[:, 1] - top_two[:, 0] - forest_weight * (n_trees - end) / n_trees
+
+            decided = margin > -self.tolerance
+            evaluated[active[decided]] = end
+            active = active[~decided]
+            if not len(active):
+                break
+
+        probas = others + forest_weight * votes / evaluated[:, None]
+
+        with self._stats_lock:
+            self._rows += n_rows
+            self._trees_evaluated += int(evaluated.sum())
+            self._early_exits += int((evaluated < n_trees).sum())
+        return probas
+
+    def get_stats(self):
+        """Get trees evaluated per row"""
+        with self._stats_lock:
+            return {
+                'block_size': self.block_size,
+                'tolerance': self.tolerance,
+                'trees': len(self.forest.estimators_),
+                'rows': self._rows,
+                'avg_trees_evaluated': self._trees_evaluated / self._rows if self._rows else None,
+                'early_exit_rate': self._early_exits / self._rows if self._rows else None
+            }
+
+
+def benchmark_early_exit(model, X, block_size=10, tolerances=(0.0,), batch_sizes=(1, 64)):
+    """Trees evaluated, probability error and latency of early exit against full evaluation"""
+    full = model.predict_proba(X)
+
+    def latency_ms(predict_proba, batch_size):
+        started = time.perf_counter()
+        for start in range(0, X.shape[0], batch_size):
+            predict_proba(X[start:start + batch_size])
+        return (time.perf_counter() - started) * 1000.0 / X.shape[0]
+
+    full_ms = {batch_size: latency_ms(model.predict_proba, batch_size) for batch_size in batch_sizes}
+
+    # The same block-wise loop with exits disabled separates early exit from loop overhead
+    no_exit = EarlyExitVoting(model, block_size=block_size, tolerance=float('-inf'))
+    no_exit_ms = {batch_size: latency_ms(no_exit.predict_proba, batch_size) for batch_size in batch_sizes}
+
+    report = {'rows': X.shape[0], 'block_size': block_size, 'full_ms_per_row': full_ms,
+              'no_exit_ms_per_row': no_exit_ms, 'tolerances': {}}
+    for tolerance in tolerances:
+        early_exit = EarlyExitVoting(model, block_size=block_size, tolerance=tolerance)
+        probas = early_exit.predict_proba(X)
+        stats = early_exit.get_stats()
+
+        early_ms = {batch_size: latency_ms(early_exit.predict_proba, batch_size) for batch_size in batch_sizes}
+        error = np.abs(probas - full)
+        report['tolerances'][tolerance] = {
+            'avg_trees_evaluated': stats['avg_trees_evaluated'],
+            'early_exit_rate': stats['early_exit_rate'],
+            'top1_agreement': float((probas.argmax(axis=1) == full.argmax(axis=1)).mean()),
+            'probability_error': {'max_abs': float(error.max()), 'mean_abs': float(error.mean())},
+            'ms_per_row': early_ms,
+            'latency_saved': {batch_size: 1.0 - early_ms[batch_size] / full_ms[batch_size]
+                              for batch_size in batch_sizes},
+            'latency_saved_by_exit': {batch_size: 1.0 - early_ms[batch_size] / no_exit_ms[batch_size]
+                                      for batch_size in batch_sizes}
+        }
+    return report
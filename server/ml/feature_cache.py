@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Training Feature Cache
+Content-addressed store for the TF-IDF matrix, encoded labels and split indices
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime
+
+import joblib
+import numpy as np
+from scipy import sparse
+
+# Bump when the cached layout or featurization code changes
+CACHE_FORMAT_VERSION = 2
+
+
+def hash_file(path, chunk_size=1 << 20):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FeatureCache:
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def make_key(self, dataset_hash, vectorizer_params, split_params):
+        """Cache key covering everything that determines the featurized output"""
+        payload = json.dumps({
+            'format': CACHE_FORMAT_VERSION,
+            'dataset': dataset_hash,
+            'vectorizer': vectorizer_params,
+            'split': split_params
+        }, sort_keys=True, default=repr)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def load(self, key):
+        """Load a cached entry, or None when it does not exist"""
+        entry_dir = self._entry_dir(key)
+        if not os.path.exists(os.path.join(entry_dir, 'meta.json')):
+            return None
+
+        with open(os.path.join(entry_dir, 'meta.json'), 'r') as f:
+            meta = json.load(f)
+
+        return {
+            'X': sparse.load_npz(os.path.join(entry_dir, 'X.npz')),
+            'y_specialty': np.load(os.path.join(entry_dir, 'y_specialty.npy')),
+            'y_urgency': np.load(os.path.join(entry_dir, 'y_urgency.npy')),
+            'train_idx': np.load(os.path.join(entry_dir, 'train_idx.npy')),
+            'test_idx': np.load(os.path.join(entry_dir, 'test_idx.npy')),
+            'texts': joblib.load(os.path.join(entry_dir, 'texts.joblib')),
+            'vectorizer': joblib.load(os.path.join(entry_dir, 'vectorizer.joblib')),
+            'label_encoder': joblib.load(os.path.join(entry_dir, 'label_encoder.joblib')),
+            'urgency_encoder': joblib.load(os.path.join(entry_dir, 'urgency_encoder.joblib')),
+            'meta': meta
+        }
+
+    def store(self, key, X, y_specialty, y_urgency, train_idx, test_idx,
+              vectorizer, label_encoder, urgency_encoder, meta, texts):
+        """
+        Write an entry to a temporary directory and move it into place.
+        texts: cleaned symptom text of each row of X, so a hit needs no reload
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_dir = os.path.join(self.cache_dir, f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(tmp_dir)
+
+        try:
+            sparse.save_npz(os.path.join(tmp_dir, 'X.npz'), X.tocsr())
+            np.save(os.path.join(tmp_dir, 'y_specialty.npy'), y_specialty)
+            np.save(os.path.join(tmp_dir, 'y_urgency.npy'), y_urgency)
+            np.save(os.path.join(tmp_dir, 'train_idx.npy'), train_idx)
+            np.save(os.path.join(tmp_dir, 'test_idx.npy'), test_idx)
+            joblib.dump(list(texts), os.path.join(tmp_dir, 'texts.joblib'))
+            joblib.dump(vectorizer, os.path.join(tmp_dir, 'vectorizer.joblib'))
+            joblib.dump(label_encoder, os.path.join(tmp_dir, 'label_encoder.joblib'))
+            joblib.dump(urgency_encoder, os.path.join(tmp_dir, 'urgency_encoder.joblib'))
+
+            with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+                json.dump({**meta, 'created': datetime.now().isoformat()}, f, indent=2)
+
+            os.rename(tmp_dir, self._entry_dir(key))
+        except OSError:
+            # Another run stored the same entry first; the contents are identical
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not os.path.exists(self._entry_dir(key)):
+                raise
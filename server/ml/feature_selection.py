@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Supervised Vocabulary Selection
+Ranks fitted TF-IDF terms by how much they tell apart specialties and replaces
+the vectorizer with one over the best ones, so every estimator and each
+transform works on a smaller feature space
+"""
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_selection import chi2, mutual_info_classif
+from sklearn.svm import LinearSVC
+from sklearn.preprocessing import normalize
+
+SELECTION_METHODS = ('chi2', 'mutual_info', 'l1')
+
+
+def feature_scores(X, y, method='chi2'):
+    """Relevance of each feature column to the labels; higher is better"""
+    if method == 'chi2':
+        scores, _ = chi2(X, y)
+    elif method == 'mutual_info':
+        # Term presence, since continuous TF-IDF weights cannot be treated as discrete
+        presence = (X > 0).astype(np.float64)
+        scores = mutual_info_classif(presence, y, discrete_features=True, random_state=42)
+    elif method == 'l1':
+        # Largest absolute weight a sparse one-vs-rest model gives each term
+        model = LinearSVC(penalty='l1', dual=False, C=1.0, random_state=42)
+        scores = np.abs(model.fit(X, y).coef_).max(axis=0)
+    else:
+        raise ValueError(f"Unknown feature selection method: {method}")
+    return np.nan_to_num(np.asarray(scores, dtype=np.float64))
+
+
+def select_vocabulary(vectorizer, X, y, n_features, method='chi2', rows=None):
+    """
+    Keep the n_features best terms of a fitted TfidfVectorizer.
+    Returns a new vectorizer over just those terms and X restricted to them,
+    identical to what that vectorizer produces.
+    rows: the rows whose labels may be used for scoring, e.g. the training split
+    """
+    if n_features >= X.shape[1]:
+        return vectorizer, X
+
+    scored_rows = np.arange(X.shape[0]) if rows is None else rows
+    scores = feature_scores(X[scored_rows], y[scored_rows], method)
+
+    # Best first; ties go to the lower column index so selection is deterministic
+    keep = np.sort(np.argsort(-scores, kind='stable')[:n_features])
+    terms = vectorizer.get_feature_names_out()[keep]
+
+    # Same settings over a fixed vocabulary; the kept terms' IDF weights carry over
+    # unchanged, as they only depend on the corpus the original was fitted on
+    pruned = TfidfVectorizer(**dict(vectorizer.get_params(), vocabulary=list(terms)))
+    pruned.idf_ = vectorizer.idf_[keep]
+
+    # Rows only need re-normalizing over the kept terms
+    X = X[:, keep]
+    return pruned, (normalize(X, norm=pruned.norm, copy=False) if pruned.norm else X)
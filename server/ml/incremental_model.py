@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Incremental Symptom Model
+Partial-fit ensemble used for incremental model updates
+"""
+
+import numpy as np
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.naive_bayes import MultinomialNB
+
+
+class IncrementalEnsemble:
+    """Soft-voting ensemble of estimators that can learn from new batches with partial_fit"""
+    
+    def __init__(self, classes):
+        self.classes_ = np.asarray(classes)
+        self.nb_classifier = MultinomialNB(alpha=0.1)
+        self.linear_classifier = SGDClassifier(
+            loss='log_loss',
+            alpha=1e-4,
+            random_state=42
+        )
+    
+    def partial_fit(self, X, y):
+        """Update both estimators with a batch of labeled rows"""
+        self.nb_classifier.partial_fit(X, y, classes=self.classes_)
+        self.linear_classifier.partial_fit(X, y, classes=self.classes_)
+        return self
+    
+    def predict_proba(self, X):
+        """Average the class probabilities of both estimators"""
+        return (self.nb_classifier.predict_proba(X) + self.linear_classifier.predict_proba(X)) / 2
+    
+    def predict(self, X):
+        """Predict the class with the highest averaged probability"""
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+    
+    def score(self, X, y):
+        """Accuracy on the given rows"""
+        return accuracy_score(y, self.predict(X))
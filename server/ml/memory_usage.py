@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Model Memory Introspection
+Per-component byte counts for loaded predictors and process RSS split into
+shared and private pages
+"""
+
+import sys
+import types
+
+SMAPS_ROLLUP_PATH = '/proc/self/smaps_rollup'
+STATUS_PATH = '/proc/self/status'
+
+# Objects that belong to code rather than to a model instance
+_SKIPPED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+def deep_sizeof(obj, seen=None):
+    """
+    Approximate bytes held by an object and everything it references.
+    Objects already in seen are not counted again, so components sharing
+    data can be measured in turn without double counting.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen or isinstance(obj, _SKIPPED_TYPES):
+        return 0
+    seen.add(id(obj))
+
+    # numpy arrays: buffer size, plus referenced objects for object arrays
+    if hasattr(obj, 'nbytes') and hasattr(obj, 'dtype') and hasattr(obj, 'ravel'):
+        size = sys.getsizeof(obj) if obj.base is None else obj.nbytes
+        if obj.dtype.hasobject:
+            size += sum(deep_sizeof(item, seen) for item in obj.ravel())
+        return size
+
+    # scipy sparse matrices
+    if hasattr(obj, 'nnz') and hasattr(obj, 'data'):
+        return sys.getsizeof(obj) + sum(
+            deep_sizeof(getattr(obj, name), seen) for name in ('data', 'indices', 'indptr', 'row', 'col', 'offsets')
+            if getattr(obj, name, None) is not None
+        )
+
+    # sklearn's Cython trees expose their node and value arrays through their state
+    if type(obj).__name__ == 'Tree' and hasattr(obj, '__getstate__'):
+        state = obj.__getstate__()
+        return sys.getsizeof(obj) + sum(value.nbytes for value in state.values() if hasattr(value, 'nbytes'))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(key, seen) + deep_sizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, '__dict__'):
+        size += deep_sizeof(vars(obj), seen)
+    return size
+
+
+def component_bytes(predictor):
+    """Bytes held by each part of a loaded predictor"""
+    seen = set()
+    components = {}
+
+    # Tiered predictors wrap the ML model together with their rules tier
+    ml_predictor = getattr(predictor, 'ml_predictor', predictor)
+
+    components['vectorizer'] = deep_sizeof(ml_predictor.vectorizer, seen)
+
+    model = ml_predictor.model
+    if hasattr(model, 'named_estimators_'):
+        for name, estimator in model.named_estimators_.items():
+            components[f"model.{name}"] = deep_sizeof(estimator, seen)
+    elif hasattr(model, 'nb_classifier') and hasattr(model, 'linear_classifier'):
+        components['model.nb'] = deep_sizeof(model.nb_classifier, seen)
+        components['model.linear'] = deep_sizeof(model.linear_classifier, seen)
+    # Anything not covered above (ensemble wrapper, unfitted templates)
+    components['model.other'] = deep_sizeof(model, seen)
+
+    components['label_encoders'] = (deep_sizeof(ml_predictor.label_encoder, seen) +
+                                    deep_sizeof(ml_predictor.urgency_encoder, seen))
+
+    for name, attribute in (('typo_index', 'normalizer'), ('similar_index', 'similar_index')):
+        value = getattr(ml_predictor, attribute, None)
+        if value is not None:
+            components[name] = deep_sizeof(value, seen)
+
+    if ml_predictor is not predictor:
+        components['rules'] = deep_sizeof(predictor.rules_predictor, seen)
+
+    components['total'] = sum(components.values())
+    return components
+
+
+def process_memory():
+    """
+    Process RSS with shared and private pages from /proc/self/smaps_rollup,
+    falling back to VmRSS; None where /proc is unavailable
+    """
+    fields = {}
+    try:
+        with open(SMAPS_ROLLUP_PATH, 'r') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1]) * 1024
+    except OSError:
+        try:
+            with open(STATUS_PATH, 'r') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        fields['Rss'] = int(line.split()[1]) * 1024
+        except OSError:
+            return None
+
+    if 'Rss' not in fields:
+        return None
+
+    return {
+        'rss_bytes': fields['Rss'],
+        'pss_bytes': fields.get('Pss'),
+        'shared_bytes': fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0) if 'Shared_Clean' in fields else None,
+        'private_bytes': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0) if 'Private_Clean' in fields else None,
+        'anonymous_bytes': fields.get('Anonymous'),
+        'swap_bytes': fields.get('Swap')
+    }
+
+
+def current_rss_bytes():
+    """Resident set size of this process, or None where it cannot be read"""
+    memory = process_memory()
+    return memory['rss_bytes'] if memory is not None else None
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Adaptive Micro-Batching Scheduler
+Collects concurrent prediction requests and runs them through one batched call
+"""
+
+import logging
+import threading
+import time
+from collections import Counter, deque
+from queue import Queue, Empty
+
+from admission import DeadlineExceededError
+from tracing import SpanRecorder, recording
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingRequest:
+    """A single request waiting for its batch to be scored"""
+
+    __slots__ = ('symptoms', 'target', 'deadline', 'trace', 'enqueued_at', 'enqueued_ns', 'done', 'result', 'error')
+
+    def __init__(self, symptoms, target=None, deadline=None, trace=None):
+        self.symptoms = symptoms
+        self.target = target
+        self.deadline = deadline
+        self.trace = trace
+        self.enqueued_at = time.perf_counter()
+        self.enqueued_ns = time.time_ns()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    def __init__(self, predict_batch, max_batch_size=64, max_wait_ms=2.0, adaptive=True, request_timeout_s=30.0):
+        """
+        predict_batch: callable taking a list of symptom texts and a target
+            (e.g. a model version) and returning predictions in the same order
+        max_batch_size: upper bound on requests scored together
+        max_wait_ms: how long the first request of a batch may wait for company;
+            larger values trade latency for throughput
+        adaptive: only wait for company when recent batches show concurrency
+        request_timeout_s: longest submit() waits when the caller gives no timeout
+        """
+        self.predict_batch = predict_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_ms = max(0.0, float(max_wait_ms))
+        self.adaptive = adaptive
+        self.request_timeout_s = float(request_timeout_s)
+
+        self._queue = Queue()
+        self._worker = None
+        self._running = False
+        self._stats_lock = threading.Lock()
+
+        # Exponentially weighted average of recent batch sizes
+        self._avg_batch_size = 1.0
+
+        # Metrics
+        self._batches = 0
+        self._requests = 0
+        self._batch_sizes = Counter()
+        self._queue_delay_total_ms = 0.0
+        self._queue_delay_max_ms = 0.0
+        self._recent_queue_delays_ms = deque(maxlen=1024)
+        self._inference_total_ms = 0.0
+        self._expired = 0
+
+    def start(self):
+        """Start the background batching thread"""
+        if self._running:
+            return
+        self._running = True
+        self._worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._worker.start()
+
+    def stop(self):
+        """Stop the background batching thread"""
+        self._running = False
+        self._queue.put(None)
+        if self._worker is not None:
+            self._worker.join(timeout=1.0)
+            self._worker = None
+
+    def submit(self, symptoms, timeout=None, deadline=None, target=None, trace=None):
+        """
+        Queue symptoms for the next batch and block until the prediction is ready.
+        A request trace receives its queue wait and the spans of the batch that scored it.
+        """
+        if not self._running:
+            raise RuntimeError("Micro-batcher is not running")
+
+        pending = _PendingRequest(symptoms, target, deadline, trace)
+        self._queue.put(pending)
+
+        # Never wait unbounded, even if the worker cannot answer
+        timeout = self.request_timeout_s if timeout is None else timeout
+        if deadline is not None:
+            timeout = min(timeout, max(0.0, deadline - time.time()))
+
+        if not pending.done.wait(timeout):
+            if deadline is not None:
+                raise DeadlineExceededError("Request deadline passed while waiting for batched prediction")
+            raise TimeoutError("Timed out waiting for batched prediction")
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _current_wait_seconds(self):
+        """Window the first request of a batch waits for more requests"""
+        if self.adaptive and self._avg_batch_size < 1.5 and self._queue.empty():
+            # Low concurrency: waiting would only add latency
+            return 0.0
+        return self.max_wait_ms / 1000.0
+
+    def _collect_batch(self, batch):
+        """Add requests arriving within the batching window to batch, which holds the first"""
+        window_end = time.perf_counter() + self._current_wait_seconds()
+
+        while len(batch) < self.max_batch_size:
+            remaining = window_end - time.perf_counter()
+            try:
+                if remaining > 0:
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    item = self._queue.get_nowait()
+            except Empty:
+                break
+
+            if item is None:
+                # Stop sentinel; put it back so the loop exits after this batch
+                self._queue.put(None)
+                break
+            batch.append(item)
+
+        return batch
+
+    def _run(self):
+        """Worker loop: collect, score and fan results back out"""
+        while self._running:
+            first = self._queue.get()
+            if first is None:
+                continue
+
+            batch = [first]
+            try:
+                batch = self._drop_expired(self._collect_batch(batch))
+                if batch:
+                    self._score_batch(batch)
+            except Exception as e:
+                # Fail this batch's waiting requests and keep serving later ones
+                logger.exception("Micro-batcher failed to process a batch")
+                for pending in batch:
+                    if not pending.done.is_set():
+                        pending.error = e
+                        pending.done.set()
+
+    def _score_batch(self, batch):
+        """Score a batch, grouped by target, and release its requests"""
+        started = time.perf_counter()
+        started_ns = time.time_ns()
+
+        # Requests for different targets are scored in separate calls
+        groups = {}
+        for pending in batch:
+            groups.setdefault(pending.target, []).append(pending)
+
+        for target, group in groups.items():
+            traced = [pending for pending in group if pending.trace is not None]
+            recorder = SpanRecorder() if traced else None
+            try:
+                with recording(recorder):
+                    results = list(self.predict_batch([pending.symptoms for pending in group], target))
+                # A short or long result list cannot be matched to requests; fail them all
+                if len(results) != len(group):
+                    raise RuntimeError(f"predict_batch returned {len(results)} results for {len(group)} requests")
+                for pending, result in zip(group, results):
+                    pending.result = result
+            except Exception as e:
+                for pending in group:
+                    pending.error = e
+
+            # Each traced request gets its own wait plus the spans it shared with the batch
+            for pending in traced:
+                pending.trace.add_span('queue_wait', pending.enqueued_ns, started_ns,
+                                       {'queue': 'batcher', 'batch_size': len(batch)})
+                for name, start_ns, end_ns, attributes in recorder.spans:
+                    pending.trace.add_span(name, start_ns, end_ns, dict(attributes, batch_size=len(group)))
+
+        finished = time.perf_counter()
+        self._record_batch(batch, started, finished)
+
+        for pending in batch:
+            pending.done.set()
+
+    def _drop_expired(self, batch):
+        """Fail requests whose deadline passed while queued instead of scoring them"""
+        now = time.time()
+        live = []
+        for pending in batch:
+            if pending.deadline is not None and pending.deadline <= now:
+                pending.error = DeadlineExceededError("Request deadline passed while queued for batching")
+                pending.done.set()
+                with self._stats_lock:
+                    self._expired += 1
+            else:
+                live.append(pending)
+        return live
+
+    def _record_batch(self, batch, started, finished):
+        """Record batch size and queueing delay metrics"""
+        size = len(batch)
+        self._avg_batch_size = 0.8 * self._avg_batch_size + 0.2 * size
+
+        # Power-of-two buckets keep the distribution compact
+        bucket = 1
+        while bucket < size:
+            bucket *= 2
+
+        with self._stats_lock:
+            self._batches += 1
+            self._requests += size
+            self._batch_sizes[bucket] += 1
+            self._inference_total_ms += (finished - started) * 1000.0
+
+            for pending in batch:
+                delay_ms = (started - pending.enqueued_at) * 1000.0
+                self._queue_delay_total_ms += delay_ms
+                self._queue_delay_max_ms = max(self._queue_delay_max_ms, delay_ms)
+                self._recent_queue_delays_ms.append(delay_ms)
+
+    def get_stats(self):
+        """Get batching metrics"""
+        with self._stats_lock:
+            recent = sorted(self._recent_queue_delays_ms)
+
+            def percentile(p):
+                if not recent:
+                    return 0.0
+                return recent[min(len(recent) - 1, int(p * len(recent)))]
+
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait_ms,
+                'adaptive': self.adaptive,
+                'batches': self._batches,
+                'requests': self._requests,
+                'expired': self._expired,
+                'avg_batch_size': self._requests / self._batches if self._batches else 0.0,
+                'batch_size_distribution': {
+                    f'<={bucket}': count for bucket, count in sorted(self._batch_sizes.items())
+                },
+                'queue_delay_ms': {
+                    'avg': self._queue_delay_total_ms / self._requests if self._requests else 0.0,
+                    'max': self._queue_delay_max_ms,
+                    'p50': percentile(0.50),
+                    'p95': percentile(0.95),
+                    'p99': percentile(0.99)
+                },
+                'avg_inference_ms': self._inference_total_ms / self._batches if self._batches else 0.0
+            }
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Versioned Model Registry
+Keeps versioned model artifact directories, loads several versions side by side
+under a memory budget and scores candidate versions in shadow mode
+"""
+
+import gc
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from queue import Queue, Full, Empty
+
+from memory_usage import current_rss_bytes
+
+logger = logging.getLogger(__name__)
+
+# Artifacts saved directly in the registry root (the pre-registry layout)
+BASE_VERSION = 'base'
+
+
+def dir_size_bytes(path):
+    """Total size of the files in a directory, including subdirectories"""
+    total = 0
+    for entry in os.scandir(path):
+        if entry.is_file():
+            total += entry.stat().st_size
+        elif entry.is_dir() and entry.name != 'versions':
+            total += dir_size_bytes(entry.path)
+    return total
+
+
+def is_valid_version_name(version):
+    """Whether a version name can only refer to a directory directly under versions/"""
+    if not isinstance(version, str) or not version or version.startswith('.'):
+        return False
+    if os.path.isabs(version) or '..' in version:
+        return False
+    return not any(separator and separator in version for separator in (os.sep, os.altsep, '/'))
+
+
+class MemoryLimitError(Exception):
+    """Loading a model version would take the process over its memory limit"""
+    pass
+
+
+class ModelRegistry:
+    def __init__(self, root_dir, memory_budget_mb=None, loader=None, wrap=None, memory_limit_mb=None):
+        """
+        root_dir: registry root; versions live in root_dir/versions/<version>
+        memory_budget_mb: combined artifact size allowed to stay loaded
+        memory_limit_mb: process RSS a load may not exceed; such loads are refused
+        loader: callable loading a predictor from a version directory
+        wrap: optional callable applied to each loaded predictor before serving
+        """
+        self.root_dir = root_dir
+        self.versions_dir = os.path.join(root_dir, 'versions')
+        self.manifest_path = os.path.join(root_dir, 'registry.json')
+        self.memory_budget_bytes = memory_budget_mb * 1024 * 1024 if memory_budget_mb else None
+        self.loader = loader or self._default_loader
+        self.wrap = wrap
+        self.memory_limit_bytes = memory_limit_mb * 1024 * 1024 if memory_limit_mb else None
+
+        self._lock = threading.Lock()
+        self._primary = None
+        self._load_locks = {}
+        self._loaded = OrderedDict()  # version -> (predictor, size_bytes), least recently used first
+        self._pinned = set()  # versions serving canary or shadow traffic, never evicted
+        self._evictions = 0
+        self._refusals = 0
+
+    @staticmethod
+    def _default_loader(version_dir):
+        from train_model import MedicalSymptomPredictor
+        predictor = MedicalSymptomPredictor()
+        predictor.load_model(version_dir)
+        return predictor
+
+    def _read_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {'primary': None, 'versions': {}}
+        with open(self.manifest_path, 'r') as f:
+            return json.load(f)
+
+    def _write_manifest(self, manifest):
+        os.makedirs(self.root_dir, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def version_dir(self, version):
+        """Artifact directory of a version"""
+        if version == BASE_VERSION:
+            return self.root_dir
+        if not is_valid_version_name(version):
+            raise ValueError(f"Invalid model version: {version!r}")
+        return os.path.join(self.versions_dir, version)
+
+    def has_version(self, version):
+        """Whether a version is published; only names listed by list_versions() qualify"""
+        if not isinstance(version, str):
+            return False
+        if version in self._loaded:
+            return True
+        return version in self.list_versions()
+
+    def list_versions(self):
+        """All published versions, oldest first"""
+        versions = []
+        if os.path.exists(os.path.join(self.root_dir, 'model.joblib')):
+            versions.append(BASE_VERSION)
+        if os.path.exists(self.versions_dir):
+            versions.extend(sorted(
+                name for name in os.listdir(self.versions_dir)
+                if is_valid_version_name(name) and
+                os.path.exists(os.path.join(self.versions_dir, name, 'model.joblib'))
+            ))
+        return versions
+
+    def primary_version(self):
+        """Version serving traffic by default: the manifest primary, else the newest version"""
+        if self._primary is not None:
+            return self._primary
+
+        primary = self._read_manifest().get('primary')
+        if not (primary and self.has_version(primary)):
+            versions = self.list_versions()
+            primary = versions[-1] if versions else None
+
+        self._primary = primary
+        return primary
+
+    def refresh(self):
+        """Re-read the manifest, e.g. after another process published a version"""
+        self._primary = None
+
+    def set_primary(self, version):
+        """Route default traffic to a version"""
+        if not self.has_version(version):
+            raise ValueError(f"Unknown model version: {version}")
+
+        manifest = self._read_manifest()
+        manifest['primary'] = version
+        self._write_manifest(manifest)
+        self._primary = version
+
+    def publish(self, predictor, version=None, make_primary=True, precision='float64'):
+        """Save a trained predictor as a new version"""
+        version = version or datetime.now().strftime('%Y%m%d%H%M%S')
+
+        # Keep version ids unique when several are published within a second
+        candidate, suffix = version, 1
+        while os.path.exists(os.path.join(self.versions_dir, candidate)):
+            candidate = f"{version}-{suffix}"
+            suffix += 1
+        version = candidate
+
+        staging_dir = os.path.join(self.versions_dir, f".staging-{version}")
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        predictor.save_model(staging_dir, precision=precision)
+        os.rename(staging_dir, os.path.join(self.versions_dir, version))
+
+        manifest = self._read_manifest()
+        metadata = getattr(predictor, 'training_metadata', {})
+        manifest['versions'][version] = {
+            'published': datetime.now().isoformat(),
+            'model_type': metadata.get('model_type', 'ensemble'),
+            'test_accuracy': metadata.get('test_accuracy'),
+            'precision': precision
+        }
+        if make_primary:
+            manifest['primary'] = version
+        self._write_manifest(manifest)
+        self.refresh()
+
+        print(f"Published model version {version}")
+        return version
+
+    def get(self, version):
+        """Get a loaded predictor, loading it and evicting least recently used versions as needed"""
+        with self._lock:
+            if version in self._loaded:
+                self._loaded.move_to_end(version)
+                return self._loaded[version][0]
+            load_lock = self._load_locks.setdefault(version, threading.Lock())
+
+        # Load outside the registry lock so other versions keep serving
+        with load_lock:
+            with self._lock:
+                if version in self._loaded:
+                    self._loaded.move_to_end(version)
+                    return self._loaded[version][0]
+
+            predictor, size_bytes = self._load(version)
+
+            with self._lock:
+                self._evict_for(size_bytes)
+                self._loaded[version] = (predictor, size_bytes)
+
+            logger.info(f"Loaded model version {version} ({size_bytes / 1024 / 1024:.1f} MB)")
+            return predictor
+
+    def reload(self, version):
+        """Re-read a version from disk; the loaded copy keeps serving if the new one is refused"""
+        with self._lock:
+            load_lock = self._load_locks.setdefault(version, threading.Lock())
+
+        with load_lock:
+            predictor, size_bytes = self._load(version)
+
+            with self._lock:
+                self._loaded.pop(version, None)
+                self._evict_for(size_bytes)
+                self._loaded[version] = (predictor, size_bytes)
+
+        logger.info(f"Reloaded model version {version} ({size_bytes / 1024 / 1024:.1f} MB)")
+        return predictor
+
+    def _load(self, version):
+        """Load a version's predictor, refusing it if it does not fit the memory limit"""
+        if not self.has_version(version):
+            raise ValueError(f"Unknown model version: {version}")
+
+        version_dir = self.version_dir(version)
+        size_bytes = dir_size_bytes(version_dir)
+        self._check_memory_limit(version, size_bytes)
+
+        predictor = self.loader(version_dir)
+        if self.wrap is not None:
+            predictor = self.wrap(predictor)
+
+        # Artifact size only approximates the loaded footprint, so check again once loaded
+        rss = current_rss_bytes()
+        if self.memory_limit_bytes is not None and rss is not None and rss > self.memory_limit_bytes:
+            del predictor
+            gc.collect()
+            self._refuse(version, rss)
+        return predictor, size_bytes
+
+    def _memory_in_use(self):
+        rss = current_rss_bytes()
+        if rss is not None:
+            return rss
+        with self._lock:
+            return self._loaded_bytes()
+
+    def _check_memory_limit(self, version, size_bytes):
+        """Make room for a load under the memory limit, raising MemoryLimitError if there is none"""
+        if self.memory_limit_bytes is None:
+            return
+
+        in_use = self._memory_in_use()
+        if in_use + size_bytes > self.memory_limit_bytes:
+            # Free least recently used versions until the load fits, keeping the primary,
+            # pinned canary/shadow versions and the one being loaded
+            keep = {self.primary_version(), version}
+            freed = 0
+            with self._lock:
+                for loaded_version in list(self._loaded):
+                    if in_use - freed + size_bytes <= self.memory_limit_bytes:
+                        break
+                    if loaded_version in keep or loaded_version in self._pinned:
+                        continue
+                    freed += self._loaded.pop(loaded_version)[1]
+                    self._evictions += 1
+                    logger.info(f"Unloaded model version {loaded_version} to stay within memory limit")
+            gc.collect()
+
+        in_use = self._memory_in_use()
+        if in_use + size_bytes > self.memory_limit_bytes:
+            self._refuse(version, in_use + size_bytes)
+
+    def _refuse(self, version, required_bytes):
+        with self._lock:
+            self._refusals += 1
+        message = (f"Model version {version} needs {required_bytes / 1024 / 1024:.1f} MB, "
+                   f"over the {self.memory_limit_bytes / 1024 / 1024:.1f} MB memory limit")
+        logger.error(message)
+        raise MemoryLimitError(message)
+
+    def _evict_for(self, size_bytes):
+        """Unload least recently used versions until size_bytes fits in the budget"""
+        if self.memory_budget_bytes is None:
+            return
+
+        primary = self.primary_version()
+        for version in list(self._loaded):
+            if self._loaded_bytes() + size_bytes <= self.memory_budget_bytes:
+                break
+            if version == primary or version in self._pinned:
+                continue
+            del self._loaded[version]
+            self._evictions += 1
+            logger.info(f"Unloaded model version {version} to stay within memory budget")
+
+        if self._loaded_bytes() + size_bytes > self.memory_budget_bytes:
+            logger.warning("Loaded model versions exceed the memory budget")
+
+    def _loaded_bytes(self):
+        return sum(size for _, size in self._loaded.values())
+
+    def pin(self, version):
+        """Never evict a version, e.g. while it serves canary or shadow traffic"""
+        with self._lock:
+            self._pinned.add(version)
+
+    def unpin(self, version):
+        """Let a pinned version be evicted again"""
+        with self._lock:
+            self._pinned.discard(version)
+
+    def unload(self, version):
+        """Drop a version from memory"""
+        with self._lock:
+            self._loaded.pop(version, None)
+
+    def loaded(self):
+        """Loaded versions and their predictors, least recently used first"""
+        with self._lock:
+            return [(version, predictor) for version, (predictor, _) in self._loaded.items()]
+
+    def get_stats(self):
+        """Get registry state"""
+        with self._lock:
+            return {
+                'primary': self.primary_version(),
+                'versions': self.list_versions(),
+                'loaded': {version: size for version, (_, size) in self._loaded.items()},
+                'loaded_bytes': self._loaded_bytes(),
+                'pinned': sorted(self._pinned),
+                'memory_budget_bytes': self.memory_budget_bytes,
+                'memory_limit_bytes': self.memory_limit_bytes,
+                'evictions': self._evictions,
+                'memory_limit_refusals': self._refusals
+            }
+
+
+class ShadowScorer:
+    def __init__(self, registry, version, max_queue=1000, max_batch_size=64):
+        """Score a candidate version off the response path and compare it with the primary"""
+        self.registry = registry
+        self.version = version
+        self.max_batch_size = max_batch_size
+        registry.pin(version)
+
+        self._queue = Queue(maxsize=max_queue)
+        self._stats_lock = threading.Lock()
+        self._compared = 0
+        self._agreed = 0
+        self._dropped = 0
+        self._errors = 0
+        self._confidence_delta_total = 0.0
+        self._latency_total_ms = 0.0
+
+        self._worker = threading.Thread(target=self._run, name='shadow-scorer', daemon=True)
+        self._worker.start()
+
+    def submit(self, symptoms, primary_prediction):
+        """Queue a served request for shadow scoring; never blocks the caller"""
+        try:
+            self._queue.put_nowait((symptoms, primary_prediction))
+        except Full:
+            with self._stats_lock:
+                self._dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except Empty:
+                    break
+
+            try:
+                started = time.perf_counter()
+                predictor = self.registry.get(self.version)
+                shadow_predictions = predictor.predict_specialty_batch([symptoms for symptoms, _ in batch])
+                elapsed_ms = (time.perf_counter() - started) * 1000.0
+            except Exception as e:
+                logger.error(f"Shadow scoring failed for version {self.version}: {e}")
+                with self._stats_lock:
+                    self._errors += len(batch)
+                continue
+
+            with self._stats_lock:
+                self._latency_total_ms += elapsed_ms
+                for (_, primary), shadow in zip(batch, shadow_predictions):
+                    self._compared += 1
+                    if shadow['recommendedSpecialty'] == primary['recommendedSpecialty']:
+                        self._agreed += 1
+                    self._confidence_delta_total += abs(shadow['confidence'] - primary['confidence'])
+
+    def get_stats(self):
+        """Get agreement between the shadow version and the primary"""
+        with self._stats_lock:
+            return {
+                'version': self.version,
+                'compared': self._compared,
+                'agreement': self._agreed / self._compared if self._compared else None,
+                'avg_confidence_delta': self._confidence_delta_total / self._compared if self._compared else None,
+                'avg_latency_ms': self._latency_total_ms / self._compared if self._compared else None,
+                'dropped': self._dropped,
+                'errors': self._errors,
+                'queued': self._queue.qsize()
+            }
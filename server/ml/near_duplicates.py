@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Detection
+MinHash signatures over character shingles with LSH banding, used to drop
+near-identical symptom phrasings from the training data
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Texts per signature task; bounds the (shingles x permutations) working array
+CHUNK_SIZE = 1000
+
+_SHINGLE_PRIME = np.uint64(1099511628211)
+
+
+def normalize_text(text):
+    """Lowercase and collapse punctuation and whitespace to single spaces"""
+    return re.sub(r'[^a-z0-9]+', ' ', str(text).lower()).strip()
+
+
+def _permutations(num_perm, seed):
+    """Multiply-shift hash parameters, identical in every process for a given seed"""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def _shingle_hashes(texts, shingle_size):
+    """64-bit hash of every character shingle, and where each text's shingles start"""
+    # Texts shorter than a shingle become one space-padded shingle
+    encoded = [normalize_text(text).encode('utf-8').ljust(shingle_size) for text in texts]
+    lengths = np.fromiter((len(data) for data in encoded), dtype=np.int64, count=len(encoded))
+    text_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    data = np.frombuffer(b''.join(encoded), dtype=np.uint8).astype(np.uint64)
+
+    counts = lengths - shingle_size + 1
+    first_shingle = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    positions = np.arange(counts.sum()) - np.repeat(first_shingle - text_starts, counts)
+
+    # Polynomial rolling hash; uint64 arithmetic wraps modulo 2**64
+    hashes = np.zeros(len(positions), dtype=np.uint64)
+    for offset in range(shingle_size):
+        hashes = hashes * _SHINGLE_PRIME + data[positions + offset]
+    return first_shingle, hashes
+
+
+def _chunk_signatures(texts, num_perm, shingle_size, seed):
+    """MinHash signatures for one chunk of texts"""
+    a, b = _permutations(num_perm, seed)
+    first_shingle, hashes = _shingle_hashes(texts, shingle_size)
+
+    # h_i(x) = high 32 bits of (a_i * x + b_i) mod 2**64, minimized over each text's shingles
+    values = (hashes[:, None] * a[None, :] + b[None, :]) >> np.uint64(32)
+    return np.minimum.reduceat(values, first_shingle, axis=0).astype(np.uint32)
+
+
+def minhash_signatures(texts, num_perm=128, shingle_size=5, seed=42, workers=None):
+    """(len(texts), num_perm) MinHash signature matrix, computed in parallel chunks"""
+    texts = list(texts)
+    chunks = [texts[start:start + CHUNK_SIZE] for start in range(0, len(texts), CHUNK_SIZE)]
+    if not chunks:
+        return np.empty((0, num_perm), dtype=np.uint32)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(chunks) == 1:
+        parts = [_chunk_signatures(chunk, num_perm, shingle_size, seed) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(_chunk_signatures, chunks, [num_perm] * len(chunks),
+                                      [shingle_size] * len(chunks), [seed] * len(chunks)))
+    return np.vstack(parts)
+
+
+def choose_bands(num_perm, threshold):
+    """
+    (bands, rows) with the highest LSH threshold (1/bands)**(1/rows) not above the
+    Jaccard threshold, so pairs at the threshold are likely to share a bucket
+    """
+    options = [(bands, num_perm // bands) for bands in range(1, num_perm + 1) if num_perm % bands == 0]
+    lsh_threshold = lambda option: (1.0 / option[0]) ** (1.0 / option[1])
+    below = [option for option in options if lsh_threshold(option) <= threshold]
+    return max(below, key=lsh_threshold) if below else max(options)
+
+
+def near_duplicate_mask(texts, labels, threshold=0.8, num_perm=128, shingle_size=5, seed=42, workers=None):
+    """
+    Boolean mask of rows whose estimated Jaccard similarity to an earlier row with
+    the same label is at least threshold. The first row of each group is kept.
+    """
+    signatures = minhash_signatures(texts, num_perm, shingle_size, seed, workers)
+    n = signatures.shape[0]
+    duplicate = np.zeros(n, dtype=bool)
+    if n < 2:
+        return duplicate
+
+    _, label_codes = np.unique(np.asarray(labels, dtype=str), return_inverse=True)
+    bands, rows = choose_bands(num_perm, threshold)
+    multipliers = np.random.default_rng(seed + 1).integers(1, 2 ** 63, size=rows, dtype=np.uint64) | np.uint64(1)
+    row_numbers = np.arange(n)
+
+    for band in range(bands):
+        # Bucket by band contents and label, so only same-label rows can collide
+        band_values = signatures[:, band * rows:(band + 1) * rows].astype(np.uint64)
+        keys = (band_values * multipliers).sum(axis=1) ^ (label_codes.astype(np.uint64) * _SHINGLE_PRIME)
+
+        order = np.lexsort((row_numbers, keys))
+        sorted_keys = keys[order]
+        bucket_start = np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1]))
+
+        # Compare each bucket member with the bucket's earliest row
+        representative = order[np.maximum.accumulate(np.where(bucket_start, row_numbers, 0))]
+        members, representatives = order[~bucket_start], representative[~bucket_start]
+        if not len(members):
+            continue
+
+        similarity = (signatures[members] == signatures[representatives]).mean(axis=1)
+        confirmed = (similarity >= threshold) & (label_codes[members] == label_codes[representatives])
+        duplicate[members[confirmed]] = True
+
+    return duplicate
@@ -4,48 +4,215 @@ Medical Symptom Prediction Service
 Flask API that serves the trained ML model for symptom prediction
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g
 import os
 import sys
 import json
+import random
+import time
 from datetime import datetime
 import logging
 
 # Add the current directory to the Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-# Import our custom model class
-from train_model import MedicalSymptomPredictor
+# Import our custom model classes
+from model_registry import ModelRegistry, ShadowScorer, MemoryLimitError
+from memory_usage import component_bytes, process_memory
+from shared_cache import SharedPredictionCache, generation_for
+from simple_prediction_service import SimpleSymptomPredictor
+from typo_correction import correction_enabled
+from early_exit_forest import early_exit_settings
+from micro_batcher import MicroBatcher
+from tiered_prediction_service import TieredSymptomPredictor
+from admission import AdmissionController, OverloadedError, DeadlineExceededError, parse_deadline
+from async_logging import configure_logging, get_logging_stats
+from tracing import (configure_tracing, start_trace, finish_trace, current_trace, phase, record_span,
+                     get_tracing_stats, REQUEST_ID_HEADER, TRACEPARENT_HEADER)
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure queue-backed, sampled logging
+configure_logging(logging.INFO, request_loggers=[f"{__name__}.requests"], stream=sys.stderr)
+
+# Per-request spans, joined to the Node service's trace, written to a rotating OTLP-JSON file (ML_TRACING=1)
+configure_tracing('prediction_service')
 logger = logging.getLogger(__name__)
 
+# Per-request records, sampled by ML_REQUEST_LOG_SAMPLE_RATE
+request_logger = logging.getLogger(f"{__name__}.requests")
+
 app = Flask(__name__)
 
-# Global model instance
+# Model registry root
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+
+# Global model instance: the primary version's predictor
 model = None
 model_loaded = False
 
+# Versioned models loaded side by side
+registry = None
+memory_budget_mb = float(os.environ['ML_MODEL_MEMORY_BUDGET_MB']) if os.environ.get('ML_MODEL_MEMORY_BUDGET_MB') else None
+
+# Process RSS a model load or hot-swap may not exceed
+memory_limit_mb = float(os.environ['ML_MEMORY_LIMIT_MB']) if os.environ.get('ML_MEMORY_LIMIT_MB') else None
+
+# Percentage of default traffic routed to a candidate version
+canary_version = os.environ.get('ML_CANARY_VERSION')
+canary_percent = float(os.environ.get('ML_CANARY_PERCENT', 0))
+
+# Candidate version scored off the response path for comparison with the primary
+shadow_scorer = None
+
+# Serve through the tiered rules + model wrapper
+tiered_inference = os.environ.get('ML_TIERED_INFERENCE', '0') == '1'
+tier_score_margin = int(os.environ.get('ML_TIER_SCORE_MARGIN', 2))
+
+# Micro-batcher shared by concurrent /predict requests
+batcher = None
+
+# Bounded in-flight limit and request queue for /predict
+admission = AdmissionController(
+    max_in_flight=int(os.environ.get('ML_MAX_IN_FLIGHT', 64)),
+    max_queue=int(os.environ.get('ML_MAX_QUEUE', 256)),
+    max_queue_wait_ms=float(os.environ.get('ML_MAX_QUEUE_WAIT_MS', 5000))
+)
+
+# Serve from the rule-based predictor instead of rejecting when the queue is full
+degrade_to_rules = os.environ.get('ML_DEGRADE_TO_RULES', '0') == '1'
+
+# Serialized predictions shared by every worker process on the host (ML_SHARED_CACHE=1)
+shared_cache = SharedPredictionCache.from_environment(namespace=MODEL_DIR)
+
+# Rule-based predictor shared by the tiered and degraded paths
+rules_predictor = None
+
+# Endpoints whose requests are traced
+TRACED_ENDPOINTS = {'predict_symptoms', 'similar_cases'}
+
+def _predict_batch(symptoms_texts, version):
+    """Score a batch of symptom texts with a model version"""
+    return registry.get(version).predict_specialty_batch(symptoms_texts)
+
+def _wrap_predictor(predictor):
+    """Prepare a loaded model version for serving"""
+    if tiered_inference:
+        # The version's rules tier corrects typos with the same index as its ensemble
+        return TieredSymptomPredictor(
+            SimpleSymptomPredictor(normalizer=predictor.normalizer),
+            predictor,
+            score_margin=tier_score_margin
+        )
+    return predictor
+
+def select_version():
+    """Route a request to a model version by header, canary percentage or primary"""
+    requested = request.headers.get('X-Model-Version')
+    if requested:
+        return requested
+    
+    if canary_version and canary_percent > 0 and random.random() * 100 < canary_percent:
+        return canary_version
+    
+    return registry.primary_version()
+
+def get_rules_predictor():
+    """Get the rule-based predictor used for tiered and degraded serving"""
+    global rules_predictor
+    
+    if rules_predictor is None:
+        rules_predictor = SimpleSymptomPredictor()
+    
+    return rules_predictor
+
+def cache_generation(version):
+    """Shared-cache generation of a model version as this service serves it"""
+    # Every setting that changes predictions, so a config change never serves stale entries;
+    # the registry root keeps deployments sharing a cache file apart
+    return generation_for(
+        MODEL_DIR, version,
+        f"tiered:{tier_score_margin}" if tiered_inference else 'ensemble',
+        f"typo_correction:{correction_enabled()}",
+        f"early_exit:{early_exit_settings()}"
+    )
+
+def cached_prediction_response(serialized, version):
+    """Build a /predict response around a cached prediction without re-serializing it"""
+    body = b''.join([
+        b'{"success":true,"prediction":', serialized,
+        b',"model_version":', json.dumps(version).encode('utf-8'),
+        b',"degraded":false,"cached":true,"timestamp":', json.dumps(datetime.now().isoformat()).encode('utf-8'),
+        b'}'
+    ])
+    return app.response_class(body, mimetype='application/json')
+
+def overloaded_response(error):
+    """Build a 503 response telling the client when to retry"""
+    response = jsonify({
+        'success': False,
+        'error': str(error)
+    })
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 503
+
+def start_batcher():
+    """Start the micro-batcher if batching is enabled"""
+    global batcher
+    
+    if os.environ.get('ML_BATCHING', '1') == '0':
+        logger.info("Micro-batching disabled")
+        return
+    
+    batcher = MicroBatcher(
+        _predict_batch,
+        max_batch_size=int(os.environ.get('ML_BATCH_MAX_SIZE', 64)),
+        max_wait_ms=float(os.environ.get('ML_BATCH_MAX_WAIT_MS', 2.0)),
+        adaptive=os.environ.get('ML_BATCH_ADAPTIVE', '1') != '0',
+        request_timeout_s=float(os.environ.get('ML_BATCH_TIMEOUT_S', 30))
+    )
+    batcher.start()
+    
+    logger.info(f"Micro-batching enabled (max batch size: {batcher.max_batch_size}, max wait: {batcher.max_wait_ms}ms)")
+
+def start_shadow_scoring():
+    """Start shadow scoring of a candidate version if one is configured"""
+    global shadow_scorer
+    
+    shadow_version = os.environ.get('ML_SHADOW_VERSION')
+    if not shadow_version:
+        return
+    
+    shadow_scorer = ShadowScorer(registry, shadow_version)
+    logger.info(f"Shadow scoring enabled for model version {shadow_version}")
+
 def load_model():
-    """Load the trained model"""
-    global model, model_loaded
+    """Load the primary model version"""
+    global registry, model, model_loaded
     
     try:
-        model_dir = os.path.join(os.path.dirname(__file__), 'models')
+        model_dir = MODEL_DIR
         
         if not os.path.exists(model_dir):
             logger.error(f"Model directory not found: {model_dir}")
             return False
         
-        model = MedicalSymptomPredictor()
-        model.load_model(model_dir)
+        if registry is None:
+            registry = ModelRegistry(model_dir, memory_budget_mb=memory_budget_mb, wrap=_wrap_predictor,
+                                     memory_limit_mb=memory_limit_mb)
+            # Making room for other loads must not unload the version canary traffic goes to
+            if canary_version and canary_percent > 0:
+                registry.pin(canary_version)
+        
+        registry.refresh()
+        primary = registry.primary_version()
+        if primary is None:
+            logger.error(f"No model versions found in {model_dir}")
+            return False
+        
+        # Always re-read the primary from disk; the loaded copy keeps serving if the new one is refused
+        model = registry.reload(primary)
         model_loaded = True
         
-        logger.info("Model loaded successfully")
+        logger.info(f"Model version {primary} loaded successfully")
         logger.info(f"Model training date: {model.training_metadata['training_date']}")
         logger.info(f"Model accuracy: {model.training_metadata['test_accuracy']:.4f}")
         
@@ -57,15 +224,15 @@ def load_model():
 
 def train_model_if_needed():
     """Train the model if it doesn't exist"""
-    model_dir = os.path.join(os.path.dirname(__file__), 'models')
+    model_dir = MODEL_DIR
     
-    if not os.path.exists(model_dir) or not os.path.exists(os.path.join(model_dir, 'model.joblib')):
+    if ModelRegistry(model_dir).primary_version() is None:
         logger.info("Model not found, training new model...")
         
         try:
             # Import and run training
             from train_model import main as train_main
-            train_main()
+            train_main([])
             return True
         except Exception as e:
             logger.error(f"Failed to train model: {e}")
@@ -73,6 +240,23 @@ def train_model_if_needed():
     
     return True
 
+@app.before_request
+def begin_request_trace():
+    """Trace scoring requests, continuing the caller's trace when it sent one"""
+    if request.endpoint in TRACED_ENDPOINTS:
+        g.trace = start_trace(f"{request.method} {request.url_rule.rule}", request.headers)
+
+@app.after_request
+def end_request_trace(response):
+    """Export the request's trace and tell the caller which span served it"""
+    trace = g.pop('trace', None)
+    if trace is not None:
+        response.headers[TRACEPARENT_HEADER] = trace.traceparent()
+        if trace.request_id:
+            response.headers[REQUEST_ID_HEADER] = trace.request_id
+        finish_trace(trace, response.status_code)
+    return response
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -94,6 +278,7 @@ def predict_symptoms():
             }), 500
         
         # Get request data
+        parse_started = time.time_ns()
         data = request.get_json()
         
         if not data:
@@ -110,20 +295,89 @@ def predict_symptoms():
                 'error': 'No symptoms provided'
             }), 400
         
+        deadline = parse_deadline(request.headers.get('X-Request-Deadline'))
+        degraded = False
+        record_span('parse', parse_started, symptoms_chars=len(symptoms))
+        
+        version = select_version()
+        if not registry.has_version(version):
+            return jsonify({
+                'success': False,
+                'error': f'Unknown model version: {version}'
+            }), 400
+        
+        # Any worker may already have scored this text with this model version
+        trace = current_trace()
+        if shared_cache is not None:
+            generation = cache_generation(version)
+            with phase('cache_lookup') as attributes:
+                cached = shared_cache.get(symptoms, generation)
+                attributes['hit'] = cached is not None
+            if cached is not None:
+                request_logger.info("Prediction", extra={'fields': {
+                    'model_version': version,
+                    'symptoms_chars': len(symptoms),
+                    'cached': True
+                }})
+                if trace is not None:
+                    trace.attributes.update({'model.version': version, 'cached': True})
+                with phase('serialize'):
+                    return cached_prediction_response(cached, version)
+        
         # Make prediction
-        logger.info(f"Predicting symptoms: {symptoms}")
-        prediction = model.predict_specialty(symptoms)
+        try:
+            queued = time.time_ns()
+            with admission.admit(deadline):
+                record_span('queue_wait', queued, queue='admission')
+                if batcher is not None:
+                    prediction = batcher.submit(symptoms, deadline=deadline, target=version, trace=trace)
+                else:
+                    prediction = registry.get(version).predict_specialty(symptoms)
+        except DeadlineExceededError:
+            raise
+        except OverloadedError:
+            if not degrade_to_rules:
+                raise
+            # Shed load onto the rule-based predictor so tail latency stays bounded
+            with phase('inference', tier='rules'):
+                prediction = get_rules_predictor().predict_specialty(symptoms)
+            degraded = True
         
-        # Log prediction result
-        logger.info(f"Prediction: {prediction['recommendedSpecialty']} (confidence: {prediction['confidence']:.4f})")
+        # Rules fallbacks are not cached; they would outlive the overload that caused them
+        if shared_cache is not None and not degraded:
+            shared_cache.put(symptoms, generation, json.dumps(prediction, separators=(',', ':')).encode('utf-8'))
+        
+        # Compare the candidate against live primary traffic without delaying the response
+        if shadow_scorer is not None and not degraded and version == registry.primary_version():
+            shadow_scorer.submit(symptoms, prediction)
+        
+        # Log prediction result; the symptom text itself is not logged
+        request_logger.info("Prediction", extra={'fields': {
+            'model_version': version,
+            'symptoms_chars': len(symptoms),
+            'specialty': prediction['recommendedSpecialty'],
+            'confidence': round(prediction['confidence'], 4),
+            'degraded': degraded
+        }})
+        
+        if trace is not None:
+            trace.attributes.update({'model.version': version, 'degraded': degraded})
         
         # Return prediction
-        return jsonify({
-            'success': True,
-            'prediction': prediction,
-            'timestamp': datetime.now().isoformat()
-        })
+        with phase('serialize'):
+            return jsonify({
+                'success': True,
+                'prediction': prediction,
+                'model_version': version,
+                'degraded': degraded,
+                'cached': False,
+                'timestamp': datetime.now().isoformat()
+            })
         
+    except OverloadedError as e:
+        request_logger.warning("Prediction rejected", extra={'fields': {'reason': str(e)}})
+        return overloaded_response(e)
+    
     except Exception as e:
         logger.error(f"Prediction error: {e}")
         return jsonify({
@@ -131,6 +385,91 @@ def predict_symptoms():
             'error': str(e)
         }), 500
 
+@app.route('/similar', methods=['POST'])
+def similar_cases():
+    """Find the past cases most similar to the given symptoms"""
+    try:
+        if not model_loaded:
+            return jsonify({
+                'success': False,
+                'error': 'Model not loaded'
+            }), 500
+
+        parse_started = time.time_ns()
+        data = request.get_json()
+
+        if not data:
+            return jsonify({
+                'success': False,
+                'error': 'No JSON data provided'
+            }), 400
+
+        symptoms = data.get('symptoms', '').strip()
+
+        if not symptoms:
+            return jsonify({
+                'success': False,
+                'error': 'No symptoms provided'
+            }), 400
+
+        try:
+            k = min(max(int(data.get('k', 5)), 1), 50)
+        except (TypeError, ValueError):
+            return jsonify({
+                'success': False,
+                'error': 'k must be an integer'
+            }), 400
+        deadline = parse_deadline(request.headers.get('X-Request-Deadline'))
+        record_span('parse', parse_started, symptoms_chars=len(symptoms))
+
+        version = select_version()
+        if not registry.has_version(version):
+            return jsonify({
+                'success': False,
+                'error': f'Unknown model version: {version}'
+            }), 400
+
+        queued = time.time_ns()
+        with admission.admit(deadline):
+            record_span('queue_wait', queued, queue='admission')
+            predictor = registry.get(version)
+            if not predictor.has_similar_cases():
+                return jsonify({
+                    'success': False,
+                    'error': f'Model version {version} has no similar-case index'
+                }), 400
+            cases = predictor.find_similar_cases(symptoms, k)
+
+        request_logger.info("Similar cases", extra={'fields': {
+            'model_version': version,
+            'symptoms_chars': len(symptoms),
+            'k': k,
+            'returned': len(cases)
+        }})
+
+        trace = current_trace()
+        if trace is not None:
+            trace.attributes['model.version'] = version
+
+        with phase('serialize'):
+            return jsonify({
+                'success': True,
+                'similar_cases': cases,
+                'model_version': version,
+                'timestamp': datetime.now().isoformat()
+            })
+
+    except OverloadedError as e:
+        request_logger.warning("Similar cases rejected", extra={'fields': {'reason': str(e)}})
+        return overloaded_response(e)
+
+    except Exception as e:
+        logger.error(f"Similar cases error: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/model/info', methods=['GET'])
 def get_model_info():
     """Get information about the loaded model"""
@@ -153,6 +492,133 @@ def get_model_info():
             'error': str(e)
         }), 500
 
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Get serving metrics"""
+    return jsonify({
+        'success': True,
+        'metrics': {
+            'batching': batcher.get_stats() if batcher is not None else None,
+            'admission': admission.get_stats(),
+            'tiers': {
+                version: predictor.get_stats()
+                for version, predictor in registry.loaded()
+                if isinstance(predictor, TieredSymptomPredictor)
+            } if registry is not None else None,
+            'registry': registry.get_stats() if registry is not None else None,
+            'shadow': shadow_scorer.get_stats() if shadow_scorer is not None else None,
+            'typo_correction': {
+                version: predictor.normalizer.get_stats()
+                for version, predictor in registry.loaded()
+                if getattr(predictor, 'normalizer', None) is not None
+            } if registry is not None else None,
+            'rf_early_exit': {
+                version: predictor.early_exit.get_stats()
+                for version, predictor in registry.loaded()
+                if getattr(predictor, 'early_exit', None) is not None
+            } if registry is not None else None,
+            'shared_cache': shared_cache.get_stats() if shared_cache is not None else None,
+            'logging': get_logging_stats(),
+            'tracing': get_tracing_stats()
+        },
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/model/memory', methods=['GET'])
+def get_model_memory():
+    """Get bytes held by each loaded version's components and the process memory"""
+    if registry is None:
+        return jsonify({
+            'success': False,
+            'error': 'Model not loaded'
+        }), 500
+    
+    try:
+        return jsonify({
+            'success': True,
+            'memory': {
+                'versions': {
+                    version: component_bytes(predictor)
+                    for version, predictor in registry.loaded()
+                },
+                'process': process_memory(),
+                'memory_limit_bytes': registry.memory_limit_bytes
+            },
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Model memory error: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/model/versions', methods=['GET'])
+def list_model_versions():
+    """List published model versions and which are loaded"""
+    if registry is None:
+        return jsonify({
+            'success': False,
+            'error': 'Model not loaded'
+        }), 500
+    
+    return jsonify({
+        'success': True,
+        'registry': registry.get_stats()
+    })
+
+@app.route('/model/versions/<version>/promote', methods=['POST'])
+def promote_model_version(version):
+    """Make a published version the primary"""
+    global model, model_loaded
+    
+    # Load the version before routing traffic to it, so a refused load leaves the primary unchanged
+    try:
+        promoted = registry.get(version)
+        registry.set_primary(version)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 404
+    except MemoryLimitError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 409
+    except Exception as e:
+        logger.error(f"Failed to load promoted model version {version}: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to load promoted model version'
+        }), 500
+    
+    model = promoted
+    model_loaded = True
+    logger.info(f"Model version {version} promoted to primary")
+    
+    return jsonify({
+        'success': True,
+        'primary': version,
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/model/reload', methods=['POST'])
+def reload_model():
+    """Reload the model from disk, e.g. after an incremental update was published"""
+    if load_model():
+        return jsonify({
+            'success': True,
+            'model_info': model.training_metadata,
+            'timestamp': datetime.now().isoformat()
+        })
+    
+    return jsonify({
+        'success': False,
+        'error': 'Failed to reload model'
+    }), 500
+
 @app.route('/model/retrain', methods=['POST'])
 def retrain_model():
     """Retrain the model with fresh data"""
@@ -161,7 +627,7 @@ def retrain_model():
         
         # Import and run training
         from train_model import main as train_main
-        train_main()
+        train_main([])
         
         # Reload the model
         if load_model():
@@ -212,6 +678,10 @@ def main():
         logger.error("Failed to load model")
         return
     
+    # Start batching concurrent predictions
+    start_batcher()
+    start_shadow_scoring()
+    
     # Start the Flask app
     port = int(os.environ.get('ML_SERVICE_PORT', 5001))
     host = os.environ.get('ML_SERVICE_HOST', '127.0.0.1')
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Reduced-Precision Model Export
+Float32 and int8-feature variants of fitted predictors, and a report comparing
+them with the float64 original
+"""
+
+import copy
+import multiprocessing
+import time
+
+import numpy as np
+from scipy import sparse
+
+from memory_usage import current_rss_bytes
+from model_registry import dir_size_bytes
+
+PRECISIONS = ('float64', 'float32', 'int8')
+
+# Fitted float arrays worth downcasting, per estimator class. Random forest trees are
+# omitted: sklearn's Cython tree stores thresholds and leaf values as float64 only.
+FLOAT_ATTRIBUTES = {
+    'MultinomialNB': ['feature_log_prob_', 'class_log_prior_', 'feature_count_', 'class_count_'],
+    'SGDClassifier': ['coef_', 'intercept_'],
+    'Nystroem': ['components_', 'normalization_'],
+    'RBFSampler': ['random_weights_', 'random_offset_'],
+    'SVC': ['support_vectors_', 'dual_coef_', '_dual_coef_', 'intercept_', '_intercept_',
+            'probA_', 'probB_', '_probA', '_probB']
+}
+
+# libsvm only predicts from float64 arrays, so SVC is stored at reduced precision
+# and widened again on load
+COMPUTE_FLOAT64 = {'SVC'}
+
+
+def _sub_estimators(estimator):
+    """Fitted estimators nested inside ensembles"""
+    if hasattr(estimator, 'estimators_'):
+        return list(estimator.estimators_)
+    if hasattr(estimator, 'steps'):
+        return [step for _, step in estimator.steps]
+    if hasattr(estimator, 'nb_classifier') and hasattr(estimator, 'linear_classifier'):
+        return [estimator.nb_classifier, estimator.linear_classifier]
+    return []
+
+
+def _cast_attributes(estimator, dtype, only=None):
+    """Cast an estimator's fitted float arrays in place, recursing into ensembles"""
+    name = type(estimator).__name__
+    if only is None or name in only:
+        for attribute in FLOAT_ATTRIBUTES.get(name, []):
+            # Only instance attributes; some names are read-only properties in newer sklearn
+            value = vars(estimator).get(attribute)
+            if isinstance(value, np.ndarray) and value.dtype.kind == 'f':
+                setattr(estimator, attribute, value.astype(dtype))
+            elif sparse.issparse(value) and value.dtype.kind == 'f':
+                setattr(estimator, attribute, value.astype(dtype))
+
+    for sub_estimator in _sub_estimators(estimator):
+        _cast_attributes(sub_estimator, dtype, only)
+
+
+def downcast_model(model):
+    """Float32 copy of a fitted model"""
+    model = copy.deepcopy(model)
+    _cast_attributes(model, np.float32)
+    return model
+
+
+def restore_compute_precision(model):
+    """Widen the arrays whose estimators cannot predict at float32"""
+    _cast_attributes(model, np.float64, only=COMPUTE_FLOAT64)
+    return model
+
+
+class QuantizedVectorizer:
+    """Emit features quantized to signed 8-bit codes (returned as float32 for the model)"""
+
+    def __init__(self, vectorizer, levels=127):
+        # TF-IDF rows are l2-normalized and non-negative, so values fit in [0, 1]
+        self.vectorizer = vectorizer
+        self.levels = levels
+
+    def transform(self, texts):
+        X = self.vectorizer.transform(texts).astype(np.float32)
+        X.data = np.round(X.data * self.levels) / self.levels
+        X.eliminate_zeros()
+        return X
+
+    def __getattr__(self, name):
+        # Guard against recursion while unpickling, before vectorizer is set
+        if name == 'vectorizer':
+            raise AttributeError(name)
+        return getattr(self.vectorizer, name)
+
+
+def downcast_vectorizer(vectorizer, precision):
+    """Vectorizer producing float32 features, quantized to 8 bits for 'int8'"""
+    vectorizer = copy.deepcopy(vectorizer)
+    vectorizer.dtype = np.float32
+    if hasattr(vectorizer, 'idf_'):
+        vectorizer.idf_ = vectorizer.idf_.astype(np.float32)
+    if precision == 'int8':
+        vectorizer = QuantizedVectorizer(vectorizer)
+    return vectorizer
+
+
+def _measure_load_rss(model_dir):
+    """RSS growth from loading a model, measured in a fresh process"""
+    from train_model import MedicalSymptomPredictor
+
+    before = current_rss_bytes()
+    predictor = MedicalSymptomPredictor()
+    predictor.load_model(model_dir)
+    after = current_rss_bytes()
+    return after - before if before is not None and after is not None else None
+
+
+def _load_rss_bytes(model_dir):
+    if current_rss_bytes() is None:
+        return None
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        return pool.apply(_measure_load_rss, (model_dir,))
+
+
+def _latency_ms(predictor, texts, repeats=5):
+    """Median predict_proba latency for the whole batch and for a single text"""
+    X = predictor.vectorizer.transform(texts)
+    X_single = predictor.vectorizer.transform(texts[:1])
+
+    batch_times, single_times = [], []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        predictor.model.predict_proba(X)
+        batch_times.append((time.perf_counter() - started) * 1000.0)
+
+        started = time.perf_counter()
+        predictor.model.predict_proba(X_single)
+        single_times.append((time.perf_counter() - started) * 1000.0)
+
+    return float(np.median(batch_times)), float(np.median(single_times))
+
+
+def evaluate_variant(baseline, baseline_dir, variant, variant_dir, texts, labels):
+    """Compare a reduced-precision variant with its float64 baseline on labeled texts"""
+    baseline_proba = baseline.model.predict_proba(baseline.vectorizer.transform(texts))
+    variant_proba = variant.model.predict_proba(variant.vectorizer.transform(texts))
+
+    baseline_pred = baseline.model.classes_[baseline_proba.argmax(axis=1)]
+    variant_pred = variant.model.classes_[variant_proba.argmax(axis=1)]
+    drift = np.abs(baseline_proba.astype(np.float64) - variant_proba.astype(np.float64))
+
+    baseline_batch_ms, baseline_single_ms = _latency_ms(baseline, texts)
+    variant_batch_ms, variant_single_ms = _latency_ms(variant, texts)
+
+    return {
+        'precision': variant.training_metadata.get('precision'),
+        'evaluated_rows': len(texts),
+        'accuracy': {
+            'float64': float(np.mean(baseline_pred == labels)),
+            'variant': float(np.mean(variant_pred == labels))
+        },
+        'top1_agreement': float(np.mean(baseline_pred == variant_pred)),
+        'probability_drift': {'max_abs': float(drift.max()), 'mean_abs': float(drift.mean())},
+        'artifact_bytes': {
+            'float64': dir_size_bytes(baseline_dir),
+            'variant': dir_size_bytes(variant_dir)
+        },
+        'load_rss_bytes': {
+            'float64': _load_rss_bytes(baseline_dir),
+            'variant': _load_rss_bytes(variant_dir)
+        },
+        'predict_proba_ms': {
+            'float64': {'batch': baseline_batch_ms, 'single': baseline_single_ms},
+            'variant': {'batch': variant_batch_ms, 'single': variant_single_ms}
+        }
+    }
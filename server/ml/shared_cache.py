@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Shared-Memory Prediction Cache
+Fixed-size open-addressing table in a memory-mapped file, shared by every
+worker process on the host: normalized symptom hash -> serialized prediction.
+Reads are lock-free (per-slot sequence counters), writes take a per-slot
+file lock, and entries carry the generation of the model that produced them.
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import zlib
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process slot locks, so no shared cache
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'HCPC'
+LAYOUT_VERSION = 1
+
+# magic, layout version, slot size, slot count
+HEADER = struct.Struct('<4sIIQ')
+HEADER_SIZE = 64
+
+# sequence, generation, value length, key digest
+SLOT_HEADER = struct.Struct('<III16s')
+SLOT_HEADER_SIZE = 32
+SEQUENCE = struct.Struct('<I')
+
+# Slots inspected per key before the home slot is overwritten
+PROBES = 8
+READ_RETRIES = 3
+
+
+def default_cache_path(namespace=None):
+    """
+    Memory-backed file shared by the workers on this host, gone on reboot.
+    namespace: e.g. the model registry root, so separate deployments get separate files
+    """
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    if namespace is None:
+        return os.path.join(directory, 'healthcare_ml_predictions.cache')
+    tag = zlib.crc32(os.path.abspath(namespace).encode('utf-8'))
+    return os.path.join(directory, f"healthcare_ml_predictions-{tag:08x}.cache")
+
+
+def cache_key(symptoms_text):
+    """Text as the predictors normalize it before anything else sees it"""
+    return symptoms_text.lower().strip()
+
+
+def generation_for(*parts):
+    """
+    Generation tag of a model version and every setting that changes its output;
+    entries from other generations miss
+    """
+    return zlib.crc32('|'.join(str(part) for part in parts).encode('utf-8'))
+
+
+class SharedPredictionCache:
+    def __init__(self, path=None, size_mb=64, slot_size=2048, namespace=None):
+        """
+        path: backing file; a disk path keeps entries across reboots as well as restarts
+        namespace: names the default backing file when no path is given
+        size_mb: table size, fixed for the life of the file
+        slot_size: bytes per slot; predictions that serialize larger are not cached
+        """
+        if fcntl is None:
+            raise RuntimeError("Shared prediction cache needs fcntl file locks")
+
+        self.path = path or default_cache_path(namespace)
+        self.slot_size = int(slot_size)
+        self.n_slots = max(PROBES, int(size_mb * 1024 * 1024) // self.slot_size)
+        self.value_capacity = self.slot_size - SLOT_HEADER_SIZE
+        file_size = HEADER_SIZE + self.n_slots * self.slot_size
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+
+        # Workers starting together agree on one layout; a different layout is rebuilt
+        fcntl.lockf(self._fd, fcntl.LOCK_EX)
+        try:
+            header = os.pread(self._fd, HEADER.size, 0)
+            expected = (MAGIC, LAYOUT_VERSION, self.slot_size, self.n_slots)
+            if len(header) < HEADER.size or HEADER.unpack(header) != expected:
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, file_size)
+                os.pwrite(self._fd, HEADER.pack(*expected), 0)
+                logger.info(f"Initialized shared prediction cache {self.path} ({self.n_slots} slots)")
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN)
+
+        self._mm = mmap.mmap(self._fd, file_size)
+
+        # File locks belong to the process, so threads also serialize their writes here
+        self._write_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._oversized = 0
+        self._contended = 0
+
+    @classmethod
+    def from_environment(cls, namespace=None):
+        """
+        The cache configured by the environment, or None when it is off.
+        namespace: names the default backing file, e.g. the model registry root
+
+        ML_SHARED_CACHE: '1' enables the shared cache (default '0')
+        ML_SHARED_CACHE_PATH: backing file (default a memory-backed file under /dev/shm per namespace)
+        ML_SHARED_CACHE_MB: table size (default 64)
+        ML_SHARED_CACHE_SLOT_BYTES: bytes per entry (default 2048)
+        """
+        if os.environ.get('ML_SHARED_CACHE', '0') != '1':
+            return None
+        try:
+            return cls(
+                path=os.environ.get('ML_SHARED_CACHE_PATH') or None,
+                size_mb=float(os.environ.get('ML_SHARED_CACHE_MB', 64)),
+                slot_size=int(os.environ.get('ML_SHARED_CACHE_SLOT_BYTES', 2048)),
+                namespace=namespace
+            )
+        except (OSError, RuntimeError) as e:
+            logger.warning(f"Shared prediction cache disabled: {e}")
+            return None
+
+    def _slots(self, digest):
+        """Byte offsets of the slots a key may occupy, home slot first"""
+        home = int.from_bytes(digest[:8], 'little') % self.n_slots
+        return [HEADER_SIZE + ((home + probe) % self.n_slots) * self.slot_size for probe in range(PROBES)]
+
+    @staticmethod
+    def _digest(key, generation):
+        # Versions served side by side (canary, shadow) get separate entries for the same text
+        return hashlib.blake2b(SEQUENCE.pack(generation) + key.encode('utf-8'), digest_size=16).digest()
+
+    def get(self, symptoms_text, generation):
+        """Serialized prediction cached for the text by this generation, or None"""
+        digest = self._digest(cache_key(symptoms_text), generation)
+        mm = self._mm
+
+        for offset in self._slots(digest):
+            for _ in range(READ_RETRIES):
+                sequence, slot_generation, length, slot_digest = SLOT_HEADER.unpack_from(mm, offset)
+                if sequence & 1:
+                    # A writer is mid-update; look again
+                    continue
+                if slot_digest != digest or slot_generation != generation or length > self.value_capacity:
+                    break
+                value = mm[offset + SLOT_HEADER_SIZE:offset + SLOT_HEADER_SIZE + length]
+                # Unchanged sequence: nothing was written while the value was copied
+                if SEQUENCE.unpack_from(mm, offset)[0] == sequence:
+                    with self._stats_lock:
+                        self._hits += 1
+                    return value
+            else:
+                with self._stats_lock:
+                    self._contended += 1
+
+        with self._stats_lock:
+            self._misses += 1
+        return None
+
+    def put(self, symptoms_text, generation, value):
+        """Cache a serialized prediction for the text under this generation"""
+        if len(value) > self.value_capacity:
+            with self._stats_lock:
+                self._oversized += 1
+            return False
+
+        digest = self._digest(cache_key(symptoms_text), generation)
+        slots = self._slots(digest)
+        mm = self._mm
+
+        # Reuse the key's own slot or an empty one, then one from another generation,
+        # else evict the home slot
+        target = stale = None
+        for offset in slots:
+            sequence, slot_generation, _, slot_digest = SLOT_HEADER.unpack_from(mm, offset)
+            if slot_digest == digest or sequence == 0:
+                target = offset
+                break
+            if stale is None and slot_generation != generation:
+                stale = offset
+        target = target or stale or slots[0]
+
+        with self._write_lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, self.slot_size, target)
+            try:
+                sequence = SEQUENCE.unpack_from(mm, target)[0]
+                # Odd while writing, so readers never return a half-written entry
+                SEQUENCE.pack_into(mm, target, (sequence + 1) & 0xFFFFFFFF)
+                mm[target + SLOT_HEADER_SIZE:target + SLOT_HEADER_SIZE + len(value)] = value
+                struct.pack_into('<II16s', mm, target + 4, generation, len(value), digest)
+                SEQUENCE.pack_into(mm, target, (sequence + 2) & 0xFFFFFFFF)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, self.slot_size, target)
+
+        with self._stats_lock:
+            self._stores += 1
+        return True
+
+    def close(self):
+        self._mm.close()
+        os.close(self._fd)
+
+    def get_stats(self):
+        """Get this process's cache hit rates"""
+        with self._stats_lock:
+            lookups = self._hits + self._misses
+            return {
+                'path': self.path,
+                'slots': self.n_slots,
+                'slot_bytes': self.slot_size,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self._hits / lookups if lookups else 0.0,
+                'stores': self._stores,
+                'oversized': self._oversized,
+                'contended_reads': self._contended
+            }
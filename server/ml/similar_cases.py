@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Similar Case Retrieval
+Top-k cosine similarity over past symptom descriptions, served from an inverted
+index with MaxScore pruning and an append-only delta buffer for new cases
+"""
+
+import json
+import os
+import threading
+
+import numpy as np
+from scipy import sparse
+
+INDEX_DIR = 'similar_cases'
+
+
+class SimilarCaseIndex:
+    def __init__(self, n_terms, delta_limit=10000):
+        """
+        n_terms: width of the vectorizer's feature space
+        delta_limit: cases buffered before they are merged into the postings
+        """
+        self.n_terms = n_terms
+        self.delta_limit = delta_limit
+
+        # (term_indptr, doc_ids, weights, max_weights, n_indexed), swapped as one tuple
+        self._postings = (np.zeros(n_terms + 1, dtype=np.int64), np.empty(0, dtype=np.int32),
+                          np.empty(0, dtype=np.float32), np.zeros(n_terms, dtype=np.float32), 0)
+        # Rows added since the last merge, searched by brute force
+        self._delta = sparse.csr_matrix((0, n_terms), dtype=np.float32)
+
+        self.texts = []
+        self.specialties = []
+        self.urgencies = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, X, texts, specialties, urgencies=None, delta_limit=10000):
+        """Index l2-normalized feature rows with their case details"""
+        index = cls(X.shape[1], delta_limit)
+        index._set_postings(X)
+        index.texts = list(texts)
+        index.specialties = list(specialties)
+        index.urgencies = list(urgencies) if urgencies is not None else [None] * len(index.texts)
+        return index
+
+    def _set_postings(self, X):
+        """Build per-term postings sorted by document id, with each term's largest weight"""
+        X = sparse.csc_matrix(X, dtype=np.float32)
+        X.sort_indices()
+
+        indptr = X.indptr.astype(np.int64)
+        max_weights = np.zeros(self.n_terms, dtype=np.float32)
+        nonempty = np.diff(indptr) > 0
+        if nonempty.any():
+            max_weights[nonempty] = np.maximum.reduceat(X.data, indptr[:-1][nonempty])
+
+        self._postings = (indptr, X.indices.astype(np.int32), X.data, max_weights, X.shape[0])
+
+    def _postings_matrix(self):
+        indptr, doc_ids, weights, _, n_indexed = self._postings
+        return sparse.csc_matrix((weights, doc_ids, indptr), shape=(n_indexed, self.n_terms))
+
+    def __len__(self):
+        return len(self.texts)
+
+    def add(self, X, texts, specialties, urgencies=None):
+        """Add new cases; they are searchable immediately and merged in bulk later"""
+        texts = list(texts)
+        with self._lock:
+            self._delta = sparse.vstack([self._delta, sparse.csr_matrix(X, dtype=np.float32)], format='csr')
+            self.texts.extend(texts)
+            self.specialties.extend(specialties)
+            self.urgencies.extend(urgencies if urgencies is not None else [None] * len(texts))
+
+            if self._delta.shape[0] >= self.delta_limit:
+                self._compact()
+
+    def compact(self):
+        """Merge buffered cases into the postings"""
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        if self._delta.shape[0]:
+            self._set_postings(sparse.vstack([self._postings_matrix().tocsr(), self._delta], format='csr'))
+            self._delta = sparse.csr_matrix((0, self.n_terms), dtype=np.float32)
+
+    @staticmethod
+    def _search_postings(postings, terms, query_weights, k):
+        """Exact top-k over the postings, skipping documents that cannot reach the top k"""
+        indptr, doc_ids, weights, max_weights, _ = postings
+
+        # Visit terms by their best possible contribution, largest first
+        upper_bounds = query_weights * max_weights[terms]
+        order = np.argsort(-upper_bounds)
+        terms, query_weights, upper_bounds = terms[order], query_weights[order], upper_bounds[order]
+        remaining = np.concatenate((np.cumsum(upper_bounds[::-1])[::-1], [0.0]))
+
+        candidates = np.empty(0, dtype=np.int32)
+        scores = np.empty(0, dtype=np.float32)
+        threshold = 0.0
+        position = 0
+
+        # Essential terms: a document they miss could still reach the top k
+        while position < len(terms):
+            if len(candidates) >= k and remaining[position] <= threshold:
+                break
+            start, end = indptr[terms[position]], indptr[terms[position] + 1]
+            merged_ids = np.concatenate((candidates, doc_ids[start:end]))
+            merged_scores = np.concatenate((scores, query_weights[position] * weights[start:end]))
+            candidates, inverse = np.unique(merged_ids, return_inverse=True)
+            scores = np.bincount(inverse, weights=merged_scores).astype(np.float32)
+            if len(candidates) >= k:
+                threshold = np.partition(scores, -k)[-k]
+            position += 1
+
+        # Non-essential terms only refine the surviving candidates
+        for position in range(position, len(terms)):
+            alive = scores + remaining[position] >= threshold
+            candidates, scores = candidates[alive], scores[alive]
+
+            start, end = indptr[terms[position]], indptr[terms[position] + 1]
+            term_docs = doc_ids[start:end]
+            if not len(term_docs):
+                continue
+            slots = np.minimum(np.searchsorted(term_docs, candidates), len(term_docs) - 1)
+            hit = term_docs[slots] == candidates
+            scores[hit] += query_weights[position] * weights[start:end][slots[hit]]
+            threshold = np.partition(scores, -k)[-k] if len(scores) >= k else threshold
+
+        return candidates, scores
+
+    def search(self, query_vector, k=5):
+        """(case id, cosine similarity) pairs of the k most similar cases"""
+        query = sparse.csr_matrix(query_vector, dtype=np.float32)
+        if query.nnz == 0 or k <= 0:
+            return []
+
+        # Postings and buffer from the same moment, so no case is missed or repeated
+        with self._lock:
+            delta, postings = self._delta, self._postings
+        n_indexed = postings[4]
+
+        candidates, scores = self._search_postings(postings, query.indices, query.data, k)
+
+        if delta.shape[0]:
+            delta_scores = np.asarray((delta @ query.T).todense()).ravel().astype(np.float32)
+            candidates = np.concatenate((candidates, np.arange(n_indexed, n_indexed + delta.shape[0])))
+            scores = np.concatenate((scores, delta_scores))
+
+        keep = scores > 0
+        candidates, scores = candidates[keep], scores[keep]
+        top = np.argpartition(-scores, k - 1)[:k] if len(scores) > k else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(int(candidates[i]), float(scores[i])) for i in top]
+
+    def case(self, case_id):
+        """Details of an indexed case"""
+        return {
+            'symptoms': self.texts[case_id],
+            'specialty': self.specialties[case_id],
+            'urgency': self.urgencies[case_id]
+        }
+
+    def save(self, model_dir):
+        """Persist the index (with buffered cases merged) next to the model artifacts"""
+        index_dir = os.path.join(model_dir, INDEX_DIR)
+        os.makedirs(index_dir, exist_ok=True)
+
+        with self._lock:
+            self._compact()
+            indptr, doc_ids, weights, max_weights, n_indexed = self._postings
+            np.savez(os.path.join(index_dir, 'postings.npz'), term_indptr=indptr, doc_ids=doc_ids,
+                     weights=weights, max_weights=max_weights, n_indexed=np.array(n_indexed))
+            with open(os.path.join(index_dir, 'cases.jsonl'), 'w', encoding='utf-8') as f:
+                for text, specialty, urgency in zip(self.texts, self.specialties, self.urgencies):
+                    f.write(json.dumps([text, specialty, urgency]) + '\n')
+
+    @classmethod
+    def load(cls, model_dir, delta_limit=10000):
+        """Load a persisted index, or None when the model has none"""
+        index_dir = os.path.join(model_dir, INDEX_DIR)
+        if not os.path.exists(os.path.join(index_dir, 'postings.npz')):
+            return None
+
+        with np.load(os.path.join(index_dir, 'postings.npz')) as data:
+            index = cls(len(data['max_weights']), delta_limit)
+            index._postings = (data['term_indptr'], data['doc_ids'], data['weights'],
+                               data['max_weights'], int(data['n_indexed']))
+
+        with open(os.path.join(index_dir, 'cases.jsonl'), 'r', encoding='utf-8') as f:
+            for line in f:
+                text, specialty, urgency = json.loads(line)
+                index.texts.append(text)
+                index.specialties.append(specialty)
+                index.urgencies.append(urgency)
+        return index
+
+    def get_stats(self):
+        """Get index size"""
+        indptr, doc_ids, weights, max_weights, n_indexed = self._postings
+        return {
+            'cases': len(self.texts),
+            'indexed': n_indexed,
+            'buffered': self._delta.shape[0],
+            'postings': len(doc_ids),
+            'postings_bytes': indptr.nbytes + doc_ids.nbytes + weights.nbytes + max_weights.nbytes
+        }
+
+
+def benchmark_search(index, X, queries, k=5):
+    """Index latency against a brute-force sparse scan, checking both return the same scores"""
+    import time
+
+    index_ms, brute_ms, mismatches = [], [], 0
+    X = sparse.csr_matrix(X, dtype=np.float32)
+
+    for row in range(queries.shape[0]):
+        query = queries[row]
+
+        started = time.perf_counter()
+        results = index.search(query, k)
+        index_ms.append((time.perf_counter() - started) * 1000.0)
+
+        started = time.perf_counter()
+        scores = np.asarray((X @ query.T.astype(np.float32)).todense()).ravel()
+        top = np.argpartition(-scores, k - 1)[:k] if len(scores) > k else np.arange(len(scores))
+        expected = np.sort(scores[top][scores[top] > 0])[::-1]
+        brute_ms.append((time.perf_counter() - started) * 1000.0)
+
+        if not np.allclose([score for _, score in results], expected, atol=1e-5):
+            mismatches += 1
+
+    def percentiles(values):
+        return {name: float(np.percentile(values, q)) for name, q in (('p50', 50), ('p95', 95), ('p99', 99))}
+
+    return {'queries': queries.shape[0], 'k': k, 'mismatches': mismatches,
+            'index_ms': percentiles(index_ms), 'brute_force_ms': percentiles(brute_ms)}
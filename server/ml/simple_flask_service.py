@@ -7,6 +7,8 @@ Uses rule-based prediction without external ML dependencies
 import json
 import sys
 import os
+import time
+import logging
 from datetime import datetime
 
 # Add the current directory to the Python path
@@ -14,6 +16,13 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Import our simple predictor
 from simple_prediction_service import SimpleSymptomPredictor
+from admission import AdmissionController, OverloadedError, parse_deadline
+from async_logging import configure_logging
+from tracing import (configure_tracing, start_trace, finish_trace, phase, record_span,
+                     REQUEST_ID_HEADER, TRACEPARENT_HEADER)
+
+# Access log records, sampled by ML_REQUEST_LOG_SAMPLE_RATE
+request_logger = logging.getLogger('simple_flask_service.requests')
 
 # Simple Flask implementation without external dependencies
 class SimpleFlaskApp:
@@ -21,6 +30,13 @@ class SimpleFlaskApp:
         self.predictor = SimpleSymptomPredictor()
         self.model_loaded = True
         
+        # Bounded in-flight limit and request queue for /predict
+        self.admission = AdmissionController(
+            max_in_flight=int(os.environ.get('ML_MAX_IN_FLIGHT', 16)),
+            max_queue=int(os.environ.get('ML_MAX_QUEUE', 256)),
+            max_queue_wait_ms=float(os.environ.get('ML_MAX_QUEUE_WAIT_MS', 5000))
+        )
+        
     def health_check(self):
         """Health check endpoint"""
         return {
@@ -53,7 +69,8 @@ class SimpleFlaskApp:
                 }, 400
             
             # Make prediction
-            prediction = self.predictor.predict_specialty(symptoms)
+            with phase('inference', tier='rules'):
+                prediction = self.predictor.predict_specialty(symptoms)
             
             # Return prediction
             return {
@@ -77,9 +94,11 @@ class SimpleFlaskApp:
                     'error': 'Model not loaded'
                 }, 500
             
+            normalizer = self.predictor.normalizer
             return {
                 'success': True,
-                'model_info': self.predictor.training_metadata
+                'model_info': self.predictor.training_metadata,
+                'typo_correction': normalizer.get_stats() if normalizer is not None else None
             }, 200
             
         except Exception as e:
@@ -92,9 +111,12 @@ class SimpleFlaskApp:
 def simple_http_server():
     """Simple HTTP server without Flask"""
     try:
-        from http.server import HTTPServer, BaseHTTPRequestHandler
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
         import urllib.parse
         
+        configure_logging(logging.INFO, request_loggers=['simple_flask_service.requests'])
+        configure_tracing('simple_flask_service')
+        
         app = SimpleFlaskApp()
         
         class RequestHandler(BaseHTTPRequestHandler):
@@ -121,23 +143,47 @@ def simple_http_server():
             
             def do_POST(self):
                 if self.path == '/predict':
+                    # Continue the caller's trace when it sent one
+                    trace = start_trace('POST /predict', self.headers)
+                    parse_started = time.time_ns()
+                    
                     content_length = int(self.headers['Content-Length'])
                     post_data = self.rfile.read(content_length)
                     
+                    deadline = parse_deadline(self.headers.get('X-Request-Deadline'))
+                    headers = {}
+                    
                     try:
                         request_data = json.loads(post_data.decode('utf-8'))
-                        response, status = app.predict_symptoms(request_data)
+                        record_span('parse', parse_started)
                         
-                        self.send_response(status)
-                        self.send_header('Content-type', 'application/json')
-                        self.end_headers()
-                        self.wfile.write(json.dumps(response).encode())
+                        queued = time.time_ns()
+                        with app.admission.admit(deadline):
+                            record_span('queue_wait', queued, queue='admission')
+                            response, status = app.predict_symptoms(request_data)
+                    
+                    except OverloadedError as e:
+                        response, status = {'success': False, 'error': str(e)}, 503
+                        headers['Retry-After'] = str(e.retry_after)
                     
                     except json.JSONDecodeError:
-                        self.send_response(400)
-                        self.send_header('Content-type', 'application/json')
-                        self.end_headers()
-                        self.wfile.write(json.dumps({'success': False, 'error': 'Invalid JSON'}).encode())
+                        response, status = {'success': False, 'error': 'Invalid JSON'}, 400
+                    
+                    with phase('serialize'):
+                        body = json.dumps(response).encode()
+                    
+                    if trace is not None:
+                        headers[TRACEPARENT_HEADER] = trace.traceparent()
+                        if trace.request_id:
+                            headers[REQUEST_ID_HEADER] = trace.request_id
+                    
+                    self.send_response(status)
+                    self.send_header('Content-type', 'application/json')
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    self.wfile.write(body)
+                    finish_trace(trace, status)
                 
                 else:
                     self.send_response(404)
@@ -146,13 +192,14 @@ def simple_http_server():
                     self.wfile.write(json.dumps({'success': False, 'error': 'Endpoint not found'}).encode())
             
             def log_message(self, format, *args):
-                # Custom logging
-                print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {format % args}")
+                # Formatting and output happen on the background log writer
+                request_logger.info(format, *args, extra={'fields': {'client': self.client_address[0]}})
         
         port = int(os.environ.get('ML_SERVICE_PORT', 5001))
         host = os.environ.get('ML_SERVICE_HOST', '127.0.0.1')
         
-        server = HTTPServer((host, port), RequestHandler)
+        server = ThreadingHTTPServer((host, port), RequestHandler)
+        server.daemon_threads = True
         print(f"Starting Simple ML Service on {host}:{port}")
         print(f"Model type: {app.predictor.model}")
         print(f"Specialties supported: {len(app.predictor.specialty_rules)}")
@@ -6,6 +6,9 @@ Rule-based prediction system that doesn't require external ML dependencies
 
 import json
 import re
+import time
+import random
+import argparse
 from datetime import datetime
 import sys
 import os
@@ -13,8 +16,10 @@ import os
 # Add the current directory to the Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from typo_correction import SymSpellIndex, correction_enabled
+
 class SimpleSymptomPredictor:
-    def __init__(self):
+    def __init__(self, normalizer=None):
         self.is_trained = True
         self.model = 'rule-based-predictor'
         
@@ -72,6 +77,23 @@ class SimpleSymptomPredictor:
             }
         }
         
+        # Keywords that override the urgency level
+        self.critical_keywords = [
+            'heart attack', 'stroke', 'severe trauma', 'poisoning', 'overdose',
+            'severe allergic reaction', 'can\'t breathe', 'unconscious'
+        ]
+        self.high_urgency_keywords = [
+            'chest pain', 'shortness of breath', 'severe pain', 'bleeding',
+            'seizure', 'high fever', 'severe headache'
+        ]
+        
+        # Keywords that add specialty-specific red flags
+        self.cardiovascular_red_flag_keywords = ['chest pain', 'heart', 'cardiac']
+        self.neurological_red_flag_keywords = ['headache', 'dizziness', 'confusion']
+        
+        # Keyword x specialty matrices for the batch path, built on first use
+        self._batch_rules = None
+        
         # Default fallback
         self.default_specialty = {
             'specialty': 'General Practice',
@@ -92,40 +114,36 @@ class SimpleSymptomPredictor:
             'cv_std': 0.03,
             'model_type': 'rule-based-predictor'
         }
+        
+        # Typo correction, shared with the ML predictor's index when one is passed in
+        if normalizer is None and correction_enabled():
+            normalizer = SymSpellIndex(self.dictionary_words())
+        self.normalizer = normalizer
+    
+    def dictionary_words(self):
+        """Words of every rule keyword, for building a typo-correction index"""
+        keywords = [keyword for rules in self.specialty_rules.values() for keyword in rules['keywords']]
+        keywords += self.critical_keywords + self.high_urgency_keywords
+        return [word for keyword in keywords for word in keyword.split()]
+    
+    def normalize(self, symptoms_text):
+        """Lowercase, strip and typo-correct symptoms"""
+        symptoms_lower = symptoms_text.lower().strip()
+        if self.normalizer is not None:
+            symptoms_lower = self.normalizer.correct(symptoms_lower)
+        return symptoms_lower
     
     def predict_specialty(self, symptoms_text):
         """Predict medical specialty from symptoms using rule-based logic"""
-        symptoms_lower = symptoms_text.lower().strip()
+        symptoms_lower = self.normalize(symptoms_text)
         
         # Score each specialty based on keyword matches
-        specialty_scores = {}
-        
-        for specialty, rules in self.specialty_rules.items():
-            score = 0
-            matches = 0
-            
-            for keyword in rules['keywords']:
-                if keyword in symptoms_lower:
-                    matches += 1
-                    # Give higher weight to exact matches
-                    if keyword in symptoms_lower.split():
-                        score += 2
-                    else:
-                        score += 1
-            
-            if matches > 0:
-                # Calculate confidence based on matches and base confidence
-                base_confidence = rules['confidence']
-                match_bonus = min(matches * 0.1, 0.2)  # Max 20% bonus
-                final_confidence = min(base_confidence + match_bonus, 1.0)
-                
-                specialty_scores[specialty] = {
-                    'confidence': final_confidence,
-                    'urgency': rules['urgency'],
-                    'matches': matches,
-                    'score': score
-                }
+        specialty_scores = self.score_specialties(symptoms_lower)
         
+        return self.predict_from_scores(symptoms_text, symptoms_lower, specialty_scores)
+    
+    def predict_from_scores(self, symptoms_text, symptoms_lower, specialty_scores):
+        """Build the prediction for symptoms already normalized and scored by score_specialties()"""
         # If no matches found, use default
         if not specialty_scores:
             recommended_specialty = self.default_specialty['specialty']
@@ -166,7 +184,7 @@ class SimpleSymptomPredictor:
         suggested_questions = self._generate_questions(recommended_specialty)
         
         # Generate red flags
-        red_flags = self._generate_red_flags(symptoms_text)
+        red_flags = self._generate_red_flags(symptoms_lower)
         
         return {
             'recommendedSpecialty': recommended_specialty,
@@ -178,21 +196,220 @@ class SimpleSymptomPredictor:
             'redFlags': red_flags
         }
     
+    def score_specialties(self, symptoms_lower):
+        """Score each specialty by keyword matches in lowercased symptoms"""
+        specialty_scores = {}
+        tokens = set(symptoms_lower.split())
+        
+        for specialty, rules in self.specialty_rules.items():
+            score = 0
+            matches = 0
+            
+            for keyword in rules['keywords']:
+                if keyword in symptoms_lower:
+                    matches += 1
+                    # Give higher weight to exact matches
+                    if keyword in tokens:
+                        score += 2
+                    else:
+                        score += 1
+            
+            if matches > 0:
+                # Calculate confidence based on matches and base confidence
+                base_confidence = rules['confidence']
+                match_bonus = min(matches * 0.1, 0.2)  # Max 20% bonus
+                final_confidence = min(base_confidence + match_bonus, 1.0)
+                
+                specialty_scores[specialty] = {
+                    'confidence': final_confidence,
+                    'urgency': rules['urgency'],
+                    'matches': matches,
+                    'score': score
+                }
+        
+        return specialty_scores
+    
+    def _compile_batch_rules(self):
+        """Precompute the keyword x specialty weight matrix used by the batch path"""
+        import numpy as np
+        from scipy import sparse
+        
+        specialties = list(self.specialty_rules)
+        keywords = []
+        keyword_index = {}
+        rows, cols = [], []
+        
+        for col, specialty in enumerate(specialties):
+            for keyword in self.specialty_rules[specialty]['keywords']:
+                if keyword not in keyword_index:
+                    keyword_index[keyword] = len(keywords)
+                    keywords.append(keyword)
+                rows.append(keyword_index[keyword])
+                cols.append(col)
+        
+        # Repeated keywords within a specialty count once per occurrence, as in the scalar loop
+        weights = sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, cols)),
+            shape=(len(keywords), len(specialties))
+        )
+        
+        self._batch_rules = {
+            'specialties': specialties,
+            'keywords': keywords,
+            # Only whitespace-free keywords can equal a token
+            'token_keywords': [(j, f" {kw} ") for j, kw in enumerate(keywords) if kw.split() == [kw]],
+            'weights': weights,
+            'base_confidence': np.array([self.specialty_rules[s]['confidence'] for s in specialties]),
+            'urgency': [self.specialty_rules[s]['urgency'] for s in specialties]
+        }
+        return self._batch_rules
+    
+    @staticmethod
+    def _join_corpus(texts):
+        """Join texts into one string and return it with each text's start offset"""
+        import numpy as np
+        
+        # NUL separators keep keywords from matching across texts
+        lengths = np.fromiter((len(text) + 1 for text in texts), dtype=np.int64, count=len(texts))
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        return '\0'.join(texts), offsets
+    
+    @staticmethod
+    def _keyword_rows(corpus, offsets, keyword):
+        """Indices of the texts containing keyword"""
+        import numpy as np
+        
+        starts = []
+        position = corpus.find(keyword)
+        while position >= 0:
+            starts.append(position)
+            position = corpus.find(keyword, position + 1)
+        return np.unique(np.searchsorted(offsets, starts, side='right') - 1)
+    
+    def _incidence(self, corpus, offsets, columns, n_cols):
+        """Sparse text x keyword matrix with a 1 where the keyword occurs in the text"""
+        import numpy as np
+        from scipy import sparse
+        
+        rows, cols = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+        for j, keyword in columns:
+            hits = self._keyword_rows(corpus, offsets, keyword)
+            rows.append(hits)
+            cols.append(np.full(len(hits), j, dtype=np.int64))
+        
+        rows, cols = np.concatenate(rows), np.concatenate(cols)
+        return sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(offsets), n_cols))
+    
+    def _contains_any(self, corpus, offsets, keywords):
+        """Boolean mask of texts containing any of the keywords"""
+        import numpy as np
+        
+        mask = np.zeros(len(offsets), dtype=bool)
+        for keyword in keywords:
+            mask[self._keyword_rows(corpus, offsets, keyword)] = True
+        return mask
+    
+    def predict_specialty_batch(self, symptoms_texts, chunk_size=50000):
+        """Predict medical specialties for a batch of texts with sparse matrix products"""
+        predictions = []
+        for start in range(0, len(symptoms_texts), chunk_size):
+            predictions.extend(self._predict_chunk(symptoms_texts[start:start + chunk_size]))
+        return predictions
+    
+    def _predict_chunk(self, symptoms_texts):
+        """Vectorized equivalent of predict_specialty for one chunk of texts"""
+        import numpy as np
+        
+        if not symptoms_texts:
+            return []
+        
+        rules = self._batch_rules or self._compile_batch_rules()
+        specialties = rules['specialties']
+        n_keywords = len(rules['keywords'])
+        
+        lowered = [self.normalize(text) for text in symptoms_texts]
+        corpus, offsets = self._join_corpus(lowered)
+        # Single-spaced tokens with sentinels: ' kw ' occurs iff kw is one of text.split()
+        token_corpus, token_offsets = self._join_corpus([' ' + ' '.join(text.split()) + ' ' for text in lowered])
+        
+        # Substring hits score 1, exact token hits score another 1 on top
+        substring_hits = self._incidence(corpus, offsets, enumerate(rules['keywords']), n_keywords)
+        token_hits = self._incidence(token_corpus, token_offsets, rules['token_keywords'], n_keywords)
+        
+        matches = (substring_hits @ rules['weights']).toarray()
+        scores = matches + (token_hits @ rules['weights']).toarray()
+        
+        match_bonus = np.minimum(matches * 0.1, 0.2)
+        confidence = np.where(matches > 0, np.minimum(rules['base_confidence'] + match_bonus, 1.0), 0.0)
+        
+        # Rank by score, then confidence, then rule order (matching the stable scalar sort)
+        column_order = np.broadcast_to(np.arange(len(specialties)), scores.shape)
+        ranking = np.lexsort((column_order, -confidence, -scores), axis=-1)[:, :3]
+        ranked_confidence = np.take_along_axis(confidence, ranking, axis=1).tolist()
+        ranked_count = np.minimum((matches > 0).sum(axis=1), 3).tolist()
+        ranking = ranking.tolist()
+        
+        # 2 = critical, 1 = high, 0 = keep the specialty's urgency
+        urgency_override = np.where(
+            self._contains_any(corpus, offsets, self.critical_keywords), 2,
+            self._contains_any(corpus, offsets, self.high_urgency_keywords).astype(int)
+        ).tolist()
+        flag_groups = (
+            self._contains_any(corpus, offsets, self.cardiovascular_red_flag_keywords).astype(int) * 2 +
+            self._contains_any(corpus, offsets, self.neurological_red_flag_keywords)
+        ).tolist()
+        
+        questions_cache = {}
+        red_flags_cache = {}
+        predictions = []
+        
+        for i, symptoms_text in enumerate(symptoms_texts):
+            if ranked_count[i] == 0:
+                recommended_specialty = self.default_specialty['specialty']
+                confidence_value = self.default_specialty['confidence']
+                urgency = self.default_specialty['urgency']
+                alternatives = []
+            else:
+                columns, confidences = ranking[i], ranked_confidence[i]
+                recommended_specialty = specialties[columns[0]]
+                confidence_value = confidences[0]
+                urgency = rules['urgency'][columns[0]]
+                alternatives = [
+                    {'specialty': specialties[columns[k]], 'confidence': confidences[k]}
+                    for k in range(1, ranked_count[i])
+                ]
+            
+            if urgency_override[i] == 2:
+                urgency = 'critical'
+            elif urgency_override[i] == 1:
+                urgency = 'high'
+            
+            flags = flag_groups[i]
+            if flags not in red_flags_cache:
+                red_flags_cache[flags] = self._red_flags_for(flags & 2, flags & 1)
+            
+            if recommended_specialty not in questions_cache:
+                questions_cache[recommended_specialty] = self._generate_questions(recommended_specialty)
+            
+            predictions.append({
+                'recommendedSpecialty': recommended_specialty,
+                'confidence': confidence_value,
+                'alternativeSpecialties': alternatives,
+                'urgencyLevel': urgency,
+                'reasoning': self._generate_reasoning(recommended_specialty, confidence_value, symptoms_text),
+                'suggestedQuestions': list(questions_cache[recommended_specialty]),
+                'redFlags': list(red_flags_cache[flags])
+            })
+        
+        return predictions
+    
     def _is_critical_symptom(self, symptoms_lower):
         """Check if symptoms indicate critical condition"""
-        critical_keywords = [
-            'heart attack', 'stroke', 'severe trauma', 'poisoning', 'overdose',
-            'severe allergic reaction', 'can\'t breathe', 'unconscious'
-        ]
-        return any(keyword in symptoms_lower for keyword in critical_keywords)
+        return any(keyword in symptoms_lower for keyword in self.critical_keywords)
     
     def _is_high_urgency_symptom(self, symptoms_lower):
         """Check if symptoms indicate high urgency"""
-        high_urgency_keywords = [
-            'chest pain', 'shortness of breath', 'severe pain', 'bleeding',
-            'seizure', 'high fever', 'severe headache'
-        ]
-        return any(keyword in symptoms_lower for keyword in high_urgency_keywords)
+        return any(keyword in symptoms_lower for keyword in self.high_urgency_keywords)
     
     def _generate_reasoning(self, specialty, confidence, symptoms_text):
         """Generate reasoning for the prediction"""
@@ -261,10 +478,18 @@ class SimpleSymptomPredictor:
     def _generate_red_flags(self, symptoms_text):
         """Generate red flags based on symptoms"""
         symptoms_lower = symptoms_text.lower()
+        
+        return self._red_flags_for(
+            any(word in symptoms_lower for word in self.cardiovascular_red_flag_keywords),
+            any(word in symptoms_lower for word in self.neurological_red_flag_keywords)
+        )
+    
+    def _red_flags_for(self, cardiovascular, neurological):
+        """Red flags for the matched symptom groups"""
         red_flags = []
         
         # Cardiovascular red flags
-        if any(word in symptoms_lower for word in ['chest pain', 'heart', 'cardiac']):
+        if cardiovascular:
             red_flags.extend([
                 "Severe chest pain or pressure",
                 "Shortness of breath at rest",
@@ -273,7 +498,7 @@ class SimpleSymptomPredictor:
             ])
         
         # Neurological red flags
-        if any(word in symptoms_lower for word in ['headache', 'dizziness', 'confusion']):
+        if neurological:
             red_flags.extend([
                 "Sudden, severe headache unlike any experienced before",
                 "Confusion or disorientation",
@@ -292,8 +517,59 @@ class SimpleSymptomPredictor:
         # Remove duplicates and limit to 5
         return list(dict.fromkeys(red_flags))[:5]
 
-def main():
+def _synthetic_symptoms(predictor, n, seed=42):
+    """Random symptom texts mixing rule keywords with filler words"""
+    rng = random.Random(seed)
+    keywords = [kw for rules in predictor.specialty_rules.values() for kw in rules['keywords']]
+    keywords += predictor.critical_keywords + predictor.high_urgency_keywords
+    filler = ['i', 'have', 'had', 'a', 'mild', 'since', 'yesterday', 'and', 'some', 'my', 'with', 'feel']
+    
+    texts = []
+    for _ in range(n):
+        words = rng.sample(keywords, rng.randint(0, 3)) + rng.sample(filler, rng.randint(1, 5))
+        rng.shuffle(words)
+        texts.append(' '.join(words))
+    return texts
+
+
+def benchmark(sizes, parity_rows=20000):
+    """Check batch/scalar parity and compare throughput on synthetic texts"""
+    predictor = SimpleSymptomPredictor()
+    # Import numpy/scipy and compile the weight matrix outside the timed runs
+    predictor.predict_specialty_batch(_synthetic_symptoms(predictor, 10))
+    
+    for n in sizes:
+        texts = _synthetic_symptoms(predictor, n)
+        
+        started = time.perf_counter()
+        batch_predictions = predictor.predict_specialty_batch(texts)
+        batch_seconds = time.perf_counter() - started
+        
+        # The scalar path is slow at large sizes, so time and check a prefix
+        checked = min(n, parity_rows)
+        started = time.perf_counter()
+        scalar_predictions = [predictor.predict_specialty(text) for text in texts[:checked]]
+        scalar_seconds = time.perf_counter() - started
+        
+        mismatches = sum(1 for a, b in zip(scalar_predictions, batch_predictions) if a != b)
+        if mismatches:
+            raise AssertionError(f"{mismatches} of {checked} batch predictions differ from the scalar path")
+        
+        print(f"{n:>8} texts: batch {n / batch_seconds:>10.0f} texts/sec, "
+              f"scalar {checked / scalar_seconds:>8.0f} texts/sec, parity ok on {checked}")
+
+
+def main(argv=None):
     """Main function for testing"""
+    parser = argparse.ArgumentParser(description='Rule-based symptom predictor')
+    parser.add_argument('--benchmark', type=int, nargs='+', metavar='N',
+                        help='Check batch/scalar parity and throughput on N synthetic texts, e.g. 10000 100000 1000000')
+    args = parser.parse_args(argv)
+    
+    if args.benchmark:
+        benchmark(args.benchmark)
+        return
+    
     predictor = SimpleSymptomPredictor()
     
     # Test prediction
@@ -307,4 +583,4 @@ def main():
     print(f"Reasoning: {prediction['reasoning']}")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import pytest
+
+# The ML modules import each other as top-level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep test runs from writing trace files
+os.environ.setdefault('ML_TRACING', '0')
+
+from model_registry import ModelRegistry  # noqa: E402
+
+
+class FakePredictor:
+    training_metadata = {'training_date': 'test', 'test_accuracy': 1.0}
+
+    def predict_specialty(self, symptoms):
+        return {'recommendedSpecialty': 'General Practice', 'confidence': 1.0}
+
+
+def _publish_dir(path):
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, 'model.joblib'), 'wb') as f:
+        f.write(b'not a pickle')
+
+
+@pytest.fixture
+def registry(tmp_path):
+    root = tmp_path / 'models'
+    _publish_dir(str(root / 'versions' / '20260101000000'))
+    # A model.joblib outside the registry that a traversal would reach
+    _publish_dir(str(tmp_path / 'outside'))
+
+    loaded = []
+
+    def loader(version_dir):
+        loaded.append(version_dir)
+        return FakePredictor()
+
+    registry = ModelRegistry(str(root), loader=loader)
+    registry.loaded_dirs = loaded
+    return registry
@@ -0,0 +1,84 @@
+import json
+
+import pandas as pd
+
+from bulk_score import iter_input_rows, score_file
+from train_model import update_model
+
+
+def _write_jsonl(path, records):
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write((record if isinstance(record, str) else json.dumps(record)) + '\n')
+
+
+def test_jsonl_malformed_rows_are_flagged(tmp_path):
+    path = str(tmp_path / 'input.jsonl')
+    _write_jsonl(path, [
+        {'id': 1, 'symptoms': ' chest pain '},
+        {'id': 2, 'symptoms': 42},
+        {'id': 3, 'symptoms': ['rash']},
+        {'id': 4, 'symptoms': {'text': 'cough'}},
+        '{not json',
+        {'id': 6},
+    ])
+    rows = [(row_id, text) for row_id, text, _ in iter_input_rows(path, id_field='id')]
+    assert rows == [(1, 'chest pain'), (2, None), (3, None), (4, None), (None, None), (6, '')]
+
+
+def test_offsets_resume_where_the_previous_row_ended(tmp_path):
+    csv_path = str(tmp_path / 'input.csv')
+    pd.DataFrame({'id': ['a', 'b', 'c'],
+                  'symptoms': ['chest pain', 'rash,\nitchy "skin"', 'cough']}).to_csv(csv_path, index=False)
+    jsonl_path = str(tmp_path / 'input.jsonl')
+    _write_jsonl(jsonl_path, [{'id': 'a', 'symptoms': 'chest pain'}, {'id': 'b', 'symptoms': 'rash'},
+                              {'id': 'c', 'symptoms': 'cough'}])
+
+    for path in (csv_path, jsonl_path):
+        rows = list(iter_input_rows(path, id_field='id'))
+        resumed = list(iter_input_rows(path, id_field='id', offset=rows[0][2]))
+        assert resumed == rows[1:]
+
+
+def test_score_file_counts_malformed_rows(tmp_path):
+    dataset = tmp_path / 'dataset.csv'
+    pd.DataFrame({
+        'symptoms': [f"{symptom} {context}" for symptom in ('chest pain', 'skin rash')
+                     for context in ('mild', 'severe', 'at night', 'for a week', 'since monday')],
+        'specialty': ['Cardiology'] * 5 + ['Dermatology'] * 5,
+        'urgency': ['medium'] * 10
+    }).to_csv(dataset, index=False)
+    feedback = tmp_path / 'feedback.csv'
+    pd.DataFrame({'symptoms': ['chest pain'], 'specialty': ['Cardiology']}).to_csv(feedback, index=False)
+    model_dir = str(tmp_path / 'models')
+    update_model(str(feedback), model_dir, str(dataset), make_primary=True)
+
+    input_path = str(tmp_path / 'input.jsonl')
+    _write_jsonl(input_path, [{'symptoms': 'chest pain'}, {'symptoms': 7}, {'symptoms': 'skin rash'}])
+    output_path = str(tmp_path / 'output.jsonl')
+    result = score_file(input_path, output_path, model_dir=model_dir, workers=1, chunk_size=2)
+
+    assert result['rows_total'] == 3
+    assert result['rows_malformed'] == 1
+    with open(output_path) as f:
+        records = [json.loads(line) for line in f]
+    assert [record.get('error') for record in records] == [None, 'Malformed row', None]
+    with open(f"{output_path}.checkpoint") as f:
+        assert json.load(f)['input_offset'] == (tmp_path / 'input.jsonl').stat().st_size
+
+    # Roll the checkpoint back to after the first row, as if the run had been interrupted there
+    with open(output_path) as f:
+        complete = f.read()
+    first_offset = next(iter_input_rows(input_path))[2]
+    with open(f"{output_path}.checkpoint") as f:
+        checkpoint = json.load(f)
+    checkpoint.update(rows_done=1, input_offset=first_offset, rows_malformed=0,
+                      output_bytes=len(complete.splitlines(keepends=True)[0].encode('utf-8')))
+    with open(f"{output_path}.checkpoint", 'w') as f:
+        json.dump(checkpoint, f)
+
+    resumed = score_file(input_path, output_path, model_dir=model_dir, workers=1, chunk_size=2)
+    assert resumed['rows_scored'] == 2
+    assert resumed['rows_malformed'] == 1
+    with open(output_path) as f:
+        assert f.read() == complete
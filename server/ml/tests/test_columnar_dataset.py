@@ -0,0 +1,36 @@
+import pandas as pd
+
+from columnar_dataset import ColumnarDataset, convert_dataset, dataset_fingerprint
+
+
+def _convert(tmp_path, name, specialties):
+    csv_path = tmp_path / f"{name}.csv"
+    pd.DataFrame({
+        'symptoms': ['chest pain', 'skin rash', 'palpitations'],
+        'specialty': specialties,
+        'urgency': ['high', 'low', 'medium']
+    }).to_csv(csv_path, index=False)
+    output_path = str(tmp_path / f"{name}.hcds")
+    convert_dataset(str(csv_path), output_path)
+    return output_path
+
+
+def test_renamed_labels_change_the_hash(tmp_path):
+    original = _convert(tmp_path, 'original', ['Cardiology', 'Dermatology', 'Cardiology'])
+    renamed = _convert(tmp_path, 'renamed', ['Cardiac', 'Dermatology', 'Cardiac'])
+
+    # Same codes, different labels
+    assert list(ColumnarDataset(original).column('specialty')) == list(ColumnarDataset(renamed).column('specialty'))
+    assert dataset_fingerprint(original) != dataset_fingerprint(renamed)
+
+
+def test_same_data_keeps_the_hash(tmp_path):
+    first = _convert(tmp_path, 'first', ['Cardiology', 'Dermatology', 'Cardiology'])
+    second = _convert(tmp_path, 'second', ['Cardiology', 'Dermatology', 'Cardiology'])
+    assert dataset_fingerprint(first) == dataset_fingerprint(second)
+
+
+def test_to_frame_decodes_categories(tmp_path):
+    path = _convert(tmp_path, 'original', ['Cardiology', 'Dermatology', 'Cardiology'])
+    frame = ColumnarDataset(path).to_frame(['specialty'])
+    assert list(frame['specialty']) == ['Cardiology', 'Dermatology', 'Cardiology']
@@ -0,0 +1,25 @@
+import os
+
+from train_model import MedicalSymptomPredictor
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       'data', 'medical_symptoms_dataset.csv')
+
+
+def test_cache_hit_does_not_reload_dataset(tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / 'cache')
+
+    first = MedicalSymptomPredictor(near_duplicate_threshold=0.8)
+    first.train(DATASET, cache_dir=cache_dir)
+
+    def fail_load(*args, **kwargs):
+        raise AssertionError("dataset reloaded on a feature-cache hit")
+
+    second = MedicalSymptomPredictor(near_duplicate_threshold=0.8)
+    monkeypatch.setattr(second, 'load_data', fail_load)
+    second.train(DATASET, cache_dir=cache_dir)
+
+    assert second.similar_index.texts == first.similar_index.texts
+    assert second.similar_index.specialties == first.similar_index.specialties
+    assert second.similar_index.urgencies == first.similar_index.urgencies
+    assert second.near_duplicates_removed == first.near_duplicates_removed
@@ -0,0 +1,38 @@
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import LabelEncoder
+
+from feature_selection import SELECTION_METHODS, select_vocabulary
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       'data', 'medical_symptoms_dataset.csv')
+
+
+@pytest.mark.parametrize('method', SELECTION_METHODS)
+def test_pruned_vectorizer_matches_selected_columns(method):
+    df = pd.read_csv(DATASET)
+    vectorizer = TfidfVectorizer(stop_words='english', ngram_range=(1, 3), max_df=0.9)
+    X = vectorizer.fit_transform(df['symptoms'])
+    y = LabelEncoder().fit_transform(df['specialty'])
+
+    pruned, X_pruned = select_vocabulary(vectorizer, X, y, 100, method)
+
+    assert pruned is not vectorizer
+    assert X_pruned.shape == (len(df), 100)
+    assert len(pruned.get_feature_names_out()) == 100
+
+    # The pruned vectorizer, also after a pickle round trip, reproduces the selected matrix
+    restored = pickle.loads(pickle.dumps(pruned))
+    for candidate in (pruned, restored):
+        assert np.abs(candidate.transform(df['symptoms']) - X_pruned).max() < 1e-12
+
+
+def test_no_selection_when_size_covers_vocabulary():
+    vectorizer = TfidfVectorizer()
+    X = vectorizer.fit_transform(['chest pain', 'skin rash'])
+    assert select_vocabulary(vectorizer, X, np.array([0, 1]), 10) == (vectorizer, X)
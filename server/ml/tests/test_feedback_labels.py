@@ -0,0 +1,36 @@
+from train_model import _feedback_label
+
+
+def _record(doctor=None, patient=None, recommended='Cardiology'):
+    return {
+        'symptoms': 'chest pain',
+        'analysis': {'recommendedSpecialty': recommended},
+        'feedback': {'doctorFeedback': doctor, 'patientFeedback': patient}
+    }
+
+
+def test_doctor_correction_is_used():
+    record = _record(doctor={'wasAccurate': False, 'actualSpecialty': 'Gastroenterology'},
+                     patient={'wasHelpful': True})
+    assert _feedback_label(record) == 'Gastroenterology'
+
+
+def test_doctor_rejection_without_correction_gives_no_label():
+    record = _record(doctor={'wasAccurate': False}, patient={'wasHelpful': True})
+    assert _feedback_label(record) is None
+
+
+def test_doctor_confirmation_labels_prediction():
+    record = _record(doctor={'wasAccurate': True}, patient={'wasHelpful': False})
+    assert _feedback_label(record) == 'Cardiology'
+
+
+def test_patient_feedback_only_without_doctor_verdict():
+    assert _feedback_label(_record(patient={'wasHelpful': True})) == 'Cardiology'
+    assert _feedback_label(_record(doctor={}, patient={'wasHelpful': True})) == 'Cardiology'
+    assert _feedback_label(_record(patient={'wasHelpful': False})) is None
+    assert _feedback_label(_record()) is None
+
+
+def test_labeled_row_is_used_as_is():
+    assert _feedback_label({'symptoms': 'rash', 'specialty': 'Dermatology'}) == 'Dermatology'
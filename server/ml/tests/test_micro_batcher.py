@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+
+from micro_batcher import MicroBatcher
+
+
+def _echo(texts, target):
+    return [f"{target}:{text}" for text in texts]
+
+
+@pytest.fixture
+def batcher():
+    batcher = MicroBatcher(_echo, max_wait_ms=0, request_timeout_s=2.0)
+    batcher.start()
+    yield batcher
+    batcher.stop()
+
+
+def test_worker_survives_errors_outside_scoring(batcher):
+    # An unhashable target fails while the batch is grouped, outside the scoring call
+    with pytest.raises(TypeError):
+        batcher.submit('chest pain', target=['unhashable'])
+
+    assert batcher.submit('chest pain', target='v1') == 'v1:chest pain'
+
+
+def test_scoring_errors_reach_the_caller(batcher):
+    batcher.predict_batch = lambda texts, target: 1 / 0
+    with pytest.raises(ZeroDivisionError):
+        batcher.submit('chest pain')
+
+
+def test_submit_times_out_by_default():
+    release = threading.Event()
+
+    def stalled(texts, target):
+        release.wait()
+        return texts
+
+    batcher = MicroBatcher(stalled, max_wait_ms=0, request_timeout_s=0.1)
+    batcher.start()
+    try:
+        with pytest.raises(TimeoutError):
+            batcher.submit('chest pain')
+    finally:
+        release.set()
+        batcher.stop()
+
+
+def test_short_result_list_fails_every_request():
+    batcher = MicroBatcher(lambda texts, target: texts[:-1], max_wait_ms=200, adaptive=False,
+                           request_timeout_s=2.0)
+    batcher.start()
+    errors = []
+
+    def submit(text):
+        try:
+            batcher.submit(text)
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=submit, args=(f"symptom {i}",)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.stop()
+
+    # No request gets a missing result back as a success
+    assert len(errors) == 3
@@ -0,0 +1,48 @@
+import pandas as pd
+
+from model_registry import ModelRegistry
+from train_model import update_model
+
+KEYWORDS = {
+    'Cardiology': ['chest pain', 'palpitations', 'heart racing', 'high blood pressure'],
+    'Dermatology': ['skin rash', 'itchy skin', 'acne breakout', 'dry flaky patches'],
+    'Gastroenterology': ['stomach ache', 'nausea', 'heartburn after meals', 'bloating'],
+    'Neurology': ['migraine', 'numbness in hands', 'memory loss', 'tremor'],
+}
+CONTEXT = ['for two days', 'since last week', 'at night', 'after exercise', 'when waking up',
+           'on and off', 'getting worse', 'for a month', 'mild', 'severe']
+
+
+def _dataset(path):
+    rows = [{'symptoms': f"{keyword} {context}", 'specialty': specialty, 'urgency': 'medium'}
+            for specialty, keywords in KEYWORDS.items()
+            for keyword in keywords for context in CONTEXT]
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return rows
+
+
+def test_degraded_update_is_not_promoted(tmp_path):
+    dataset = tmp_path / 'dataset.csv'
+    rows = _dataset(dataset)
+    model_dir = str(tmp_path / 'models')
+
+    # The first update bootstraps the model and, with no primary yet, promotes it
+    seed = tmp_path / 'seed.csv'
+    pd.DataFrame(rows[:1])[['symptoms', 'specialty']].to_csv(seed, index=False)
+    first = update_model(str(seed), model_dir, str(dataset), make_primary=True)
+    assert first['promoted']
+
+    # Feedback that relabels every case as the next specialty over
+    specialties = list(KEYWORDS)
+    wrong = pd.DataFrame([
+        {'symptoms': row['symptoms'],
+         'specialty': specialties[(specialties.index(row['specialty']) + 1) % len(specialties)]}
+        for row in rows
+    ] * 5)
+    feedback = tmp_path / 'feedback.csv'
+    wrong.to_csv(feedback, index=False)
+
+    second = update_model(str(feedback), model_dir, str(dataset), make_primary=True)
+    assert not second['promoted']
+    assert second['accuracy']['candidate'] < second['accuracy']['primary']
+    assert ModelRegistry(model_dir).primary_version() == first['version']
@@ -0,0 +1,53 @@
+import pytest
+
+from model_registry import ModelRegistry, is_valid_version_name
+
+
+@pytest.mark.parametrize('name', ['../outside', '../../outside', '/tmp/outside', 'a/b', '..', '.staging-1', ''])
+def test_invalid_version_names(name):
+    assert not is_valid_version_name(name)
+
+
+def test_traversal_version_is_not_loaded(registry):
+    assert registry.list_versions() == ['20260101000000']
+    assert not registry.has_version('../../outside')
+
+    with pytest.raises(ValueError):
+        registry.get('../../outside')
+    with pytest.raises(ValueError):
+        registry.version_dir('../../outside')
+    assert registry.loaded_dirs == []
+
+
+def test_dir_size_includes_subdirectories(tmp_path):
+    from model_registry import dir_size_bytes
+
+    (tmp_path / 'model.joblib').write_bytes(b'x' * 10)
+    (tmp_path / 'similar_cases').mkdir()
+    (tmp_path / 'similar_cases' / 'postings.npz').write_bytes(b'x' * 32)
+    assert dir_size_bytes(str(tmp_path)) == 42
+
+
+def test_memory_limit_evicts_only_what_is_needed(tmp_path, monkeypatch):
+    import model_registry
+
+    # Without an RSS reading the registry counts loaded artifact sizes
+    monkeypatch.setattr(model_registry, 'current_rss_bytes', lambda: None)
+    for version in ('a', 'b', 'c', 'd', 'e', 'f'):
+        path = tmp_path / 'versions' / version
+        path.mkdir(parents=True)
+        (path / 'model.joblib').write_bytes(b'x' * 100)
+
+    registry = ModelRegistry(str(tmp_path), loader=lambda version_dir: object())
+    registry.memory_limit_bytes = 550
+    registry.set_primary('e')
+    registry.pin('b')
+    registry.pin('c')
+
+    for version in ('e', 'a', 'f', 'b', 'c'):
+        registry.get(version)
+    registry.get('d')
+
+    # Only the least recently used unpinned version goes; primary, canary and shadow stay
+    assert {version for version, _ in registry.loaded()} == {'e', 'f', 'b', 'c', 'd'}
+    assert registry.get_stats()['evictions'] == 1
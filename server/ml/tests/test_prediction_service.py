@@ -0,0 +1,71 @@
+import pytest
+
+
+def test_traversal_header_is_rejected(registry, monkeypatch):
+    import prediction_service
+
+    monkeypatch.setattr(prediction_service, 'registry', registry)
+    monkeypatch.setattr(prediction_service, 'model_loaded', True)
+    monkeypatch.setattr(prediction_service, 'batcher', None)
+    monkeypatch.setattr(prediction_service, 'shared_cache', None)
+    client = prediction_service.app.test_client()
+
+    for header in ['../../outside', '../outside', 'unknown']:
+        response = client.post('/predict', json={'symptoms': 'knee pain'}, headers={'X-Model-Version': header})
+        assert response.status_code == 400
+        assert response.get_json()['success'] is False
+
+        response = client.post('/similar', json={'symptoms': 'knee pain'}, headers={'X-Model-Version': header})
+        assert response.status_code == 400
+
+    assert registry.loaded_dirs == []
+
+
+@pytest.mark.parametrize('k', [[1, 2], {'n': 3}, 'many', None])
+def test_similar_rejects_invalid_k(registry, monkeypatch, k):
+    import prediction_service
+
+    monkeypatch.setattr(prediction_service, 'registry', registry)
+    monkeypatch.setattr(prediction_service, 'model_loaded', True)
+    client = prediction_service.app.test_client()
+
+    response = client.post('/similar', json={'symptoms': 'knee pain', 'k': k},
+                           headers={'X-Model-Version': '20260101000000'})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'k must be an integer'
+    assert registry.loaded_dirs == []
+
+
+class _SimilarPredictor:
+    training_metadata = {'training_date': 'test', 'test_accuracy': 1.0}
+
+    def __init__(self, indexed=True, error=None):
+        self.indexed = indexed
+        self.error = error
+
+    def has_similar_cases(self):
+        return self.indexed
+
+    def find_similar_cases(self, symptoms, k):
+        if self.error is not None:
+            raise self.error
+        return [{'symptoms': symptoms, 'similarity': 1.0}][:k]
+
+
+@pytest.mark.parametrize('predictor, status', [
+    (_SimilarPredictor(), 200),
+    (_SimilarPredictor(indexed=False), 400),
+    # An internal failure, even one raised as ValueError, is a server error
+    (_SimilarPredictor(error=ValueError('dimension mismatch')), 500),
+])
+def test_similar_status_codes(registry, monkeypatch, predictor, status):
+    import prediction_service
+
+    registry.loader = lambda version_dir: predictor
+    monkeypatch.setattr(prediction_service, 'registry', registry)
+    monkeypatch.setattr(prediction_service, 'model_loaded', True)
+    client = prediction_service.app.test_client()
+
+    response = client.post('/similar', json={'symptoms': 'knee pain', 'k': 3},
+                           headers={'X-Model-Version': '20260101000000'})
+    assert response.status_code == status
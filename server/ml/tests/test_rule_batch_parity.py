@@ -0,0 +1,49 @@
+import pytest
+
+from simple_prediction_service import SimpleSymptomPredictor, _synthetic_symptoms
+
+
+@pytest.fixture(scope='module')
+def predictor():
+    return SimpleSymptomPredictor(normalizer=None)
+
+
+def _assert_parity(predictor, texts):
+    assert predictor.predict_specialty_batch(texts) == [predictor.predict_specialty(text) for text in texts]
+
+
+def test_empty_batch(predictor):
+    assert predictor.predict_specialty_batch([]) == []
+
+
+def test_empty_and_blank_texts(predictor):
+    _assert_parity(predictor, ['', '   ', '\t\n'])
+
+
+def test_no_keyword_hits(predictor):
+    texts = ['i feel a bit off today', 'nothing specific', 'zzz qqq']
+    assert all(not predictor.score_specialties(text) for text in texts)
+    _assert_parity(predictor, texts)
+
+
+def test_mixed_case(predictor):
+    _assert_parity(predictor, ['CHEST PAIN and Shortness Of Breath', 'Skin RASH', '  Severe HEADACHE  '])
+
+
+def test_ties(predictor):
+    # Texts whose top keyword score is shared by several specialties
+    texts = [text for text in _synthetic_symptoms(predictor, 5000, seed=3)
+             if _top_score_ties(predictor.score_specialties(text))]
+    assert texts
+    _assert_parity(predictor, texts)
+
+
+def test_synthetic_texts(predictor):
+    _assert_parity(predictor, _synthetic_symptoms(predictor, 5000))
+
+
+def _top_score_ties(scores):
+    if len(scores) < 2:
+        return False
+    top = sorted((entry['score'] for entry in scores.values()), reverse=True)
+    return top[0] == top[1]
@@ -0,0 +1,52 @@
+import pytest
+
+import prediction_service
+from shared_cache import SharedPredictionCache, default_cache_path
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = SharedPredictionCache(str(tmp_path / 'predictions.cache'), size_mb=1, slot_size=512)
+    yield cache
+    cache.close()
+
+
+def test_serving_config_changes_generation(monkeypatch):
+    baseline = prediction_service.cache_generation('base')
+
+    monkeypatch.setenv('ML_TYPO_CORRECTION', '1')
+    assert prediction_service.cache_generation('base') != baseline
+    monkeypatch.delenv('ML_TYPO_CORRECTION')
+
+    monkeypatch.setenv('ML_RF_EARLY_EXIT', '1')
+    assert prediction_service.cache_generation('base') != baseline
+    monkeypatch.setenv('ML_RF_EARLY_EXIT_TOL', '0.05')
+    early_exit = prediction_service.cache_generation('base')
+    monkeypatch.setenv('ML_RF_EARLY_EXIT_TOL', '0.1')
+    assert prediction_service.cache_generation('base') != early_exit
+    monkeypatch.delenv('ML_RF_EARLY_EXIT')
+    monkeypatch.delenv('ML_RF_EARLY_EXIT_TOL')
+
+    monkeypatch.setattr(prediction_service, 'tiered_inference', True)
+    tiered = prediction_service.cache_generation('base')
+    monkeypatch.setattr(prediction_service, 'tier_score_margin', 3)
+    assert prediction_service.cache_generation('base') not in (baseline, tiered)
+    monkeypatch.setattr(prediction_service, 'tiered_inference', False)
+
+    monkeypatch.setattr(prediction_service, 'MODEL_DIR', '/srv/other/models')
+    assert prediction_service.cache_generation('base') != baseline
+
+    assert prediction_service.cache_generation('base') != prediction_service.cache_generation('v2')
+
+
+def test_default_path_is_namespaced_per_registry():
+    assert default_cache_path('/srv/a/models') != default_cache_path('/srv/b/models')
+
+
+def test_entries_are_separated_by_generation(cache):
+    cache.put('Chest pain', 1, b'{"v":1}')
+    cache.put('chest pain ', 2, b'{"v":2}')
+
+    assert cache.get('chest pain', 1) == b'{"v":1}'
+    assert cache.get('CHEST PAIN', 2) == b'{"v":2}'
+    assert cache.get('chest pain', 3) is None
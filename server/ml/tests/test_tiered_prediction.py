@@ -0,0 +1,36 @@
+from simple_prediction_service import SimpleSymptomPredictor, _synthetic_symptoms
+from tiered_prediction_service import RULES_TIER, TieredSymptomPredictor
+
+
+class StubEnsemble:
+    is_trained = True
+    training_metadata = {}
+
+    def predict_specialty_batch(self, texts):
+        return [{'recommendedSpecialty': 'ensemble'} for _ in texts]
+
+
+class CountingRules(SimpleSymptomPredictor):
+    def __init__(self):
+        super().__init__(normalizer=None)
+        self.scored = 0
+
+    def score_specialties(self, symptoms_lower):
+        self.scored += 1
+        return super().score_specialties(symptoms_lower)
+
+
+def test_rules_tier_scores_each_text_once():
+    rules = CountingRules()
+    tiered = TieredSymptomPredictor(rules, StubEnsemble())
+    texts = _synthetic_symptoms(rules, 500)
+
+    predictions = tiered.predict_specialty_batch(texts)
+
+    assert rules.scored == len(texts)
+    reference = SimpleSymptomPredictor(normalizer=None)
+    for text, prediction in zip(texts, predictions):
+        if tiered.select_tier(text)[0] == RULES_TIER:
+            assert prediction == reference.predict_specialty(text)
+        else:
+            assert prediction == {'recommendedSpecialty': 'ensemble'}
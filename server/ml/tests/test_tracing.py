@@ -0,0 +1,40 @@
+import json
+
+import tracing
+
+
+def test_disabled_by_default(monkeypatch):
+    monkeypatch.delenv('ML_TRACING', raising=False)
+    monkeypatch.setattr(tracing, '_queue_handler', None)
+    tracing.configure_tracing('test')
+    assert tracing._queue_handler is None
+    assert tracing.start_trace('POST /predict', {}) is None
+
+
+def test_exported_counts_only_written_traces(tmp_path, monkeypatch):
+    path = tmp_path / 'traces.jsonl'
+    monkeypatch.setenv('ML_TRACING', '1')
+    monkeypatch.setenv('ML_TRACE_FILE', str(path))
+    monkeypatch.setenv('ML_TRACE_QUEUE_SIZE', '2')
+    for name in ('_queue_handler', '_listener', '_service_name', '_exported'):
+        monkeypatch.setattr(tracing, name, getattr(tracing, name))
+    monkeypatch.setattr(tracing, '_queue_handler', None)
+    monkeypatch.setattr(tracing, '_exported', 0)
+    # The listener is stopped here, not at exit
+    monkeypatch.setattr(tracing.atexit, 'register', lambda function: function)
+
+    tracing.configure_tracing('test')
+    # Hold the writer back so the queue fills and later traces are dropped
+    tracing._listener.stop()
+    for _ in range(5):
+        tracing.finish_trace(tracing.start_trace('POST /predict', {}), 200)
+
+    tracing._listener.start()
+    tracing._listener.stop()
+
+    stats = tracing.get_tracing_stats()
+    assert stats['dropped'] == 3
+    assert stats['exported'] == 2
+    lines = path.read_text().splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[0])['resourceSpans']
@@ -0,0 +1,79 @@
+import pytest
+
+from simple_prediction_service import SimpleSymptomPredictor
+from typo_correction import MIN_LEXICON_WORDS, SymSpellIndex, correction_enabled, english_lexicon
+
+
+@pytest.fixture(scope='module')
+def index():
+    return SymSpellIndex(SimpleSymptomPredictor(normalizer=None).dictionary_words())
+
+
+def test_correction_is_opt_in(monkeypatch):
+    monkeypatch.delenv('ML_TYPO_CORRECTION', raising=False)
+    assert not correction_enabled()
+    assert SimpleSymptomPredictor().normalizer is None
+
+    monkeypatch.setenv('ML_TYPO_CORRECTION', '1')
+    assert correction_enabled()
+
+
+@pytest.mark.parametrize('text', [
+    'i heard a ringing noise',
+    'rash came on in a rush',
+    'the rushes of heat',
+    'pain in the knee at this point',
+    'it was never this bad',
+    'feels tough to stand',
+    'sweet taste in my mouth',
+    'smell of bread',
+    'heavy feeling while walking',
+    'heading home with a headache',
+    'fearing the worst',
+    'a peart young man',
+    'hearty appetite',
+    'the shine of the lights hurts',
+    'it sinks in slowly',
+    'linus has a cough',
+    'confusing instructions',
+    'sleepy all day',
+])
+def test_common_words_are_not_corrected(index, text):
+    assert index.correct(text) == text
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('cheest pain', 'chest pain'),
+    ('palpitatons', 'palpitations'),
+    ('nausia and vomitting', 'nausea and vomiting'),
+    ('severe headach', 'severe headache'),
+])
+def test_misspelled_keywords_are_corrected(index, text, expected):
+    assert index.correct(text) == expected
+
+
+@pytest.mark.parametrize('text', [
+    'heard popping in my knee and ear ache',
+    'heading out with fearing of loud rooms',
+    'peart and hearty but short of breath',
+    'shine on my skin and a rash',
+    'sinks of water and linus blanket',
+    'confusing diet advice and stomach pain',
+    'sleepy and a sore throat',
+])
+def test_common_word_does_not_change_prediction(index, text):
+    plain = SimpleSymptomPredictor(normalizer=None).predict_specialty(text)
+    corrected = SimpleSymptomPredictor(normalizer=index).predict_specialty(text)
+
+    assert corrected['recommendedSpecialty'] == plain['recommendedSpecialty']
+    assert corrected['urgencyLevel'] == plain['urgencyLevel']
+    assert corrected.get('redFlags') == plain.get('redFlags')
+
+
+def test_lexicon_is_large_enough():
+    assert len(english_lexicon()) >= MIN_LEXICON_WORDS
+
+
+def test_small_lexicon_is_rejected():
+    with pytest.raises(ValueError):
+        SymSpellIndex(['chest', 'pain'], lexicon=['chest', 'heard', 'rush'])
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tiered Medical Symptom Prediction
+Answers clear-cut inputs with the keyword rules and only runs the ML ensemble
+for ambiguous or unmatched symptoms
+"""
+
+import threading
+import time
+
+from tracing import phase
+
+RULES_TIER = 'rules'
+ENSEMBLE_TIER = 'ensemble'
+
+
+class TieredSymptomPredictor:
+    def __init__(self, rules_predictor, ml_predictor, score_margin=2, emergency_fast_path=True):
+        """
+        rules_predictor: SimpleSymptomPredictor used as the fast path
+        ml_predictor: MedicalSymptomPredictor used when the rules are not decisive
+        score_margin: how far the top rule score must lead the runner-up
+        emergency_fast_path: serve any Emergency Medicine keyword hit from the rules
+        """
+        self.rules_predictor = rules_predictor
+        self.ml_predictor = ml_predictor
+        self.score_margin = score_margin
+        self.emergency_fast_path = emergency_fast_path
+
+        # Expose the ML model's metadata so callers can treat this like any predictor
+        self.is_trained = ml_predictor.is_trained
+        self.training_metadata = ml_predictor.training_metadata
+        self.normalizer = getattr(ml_predictor, 'normalizer', None)
+        self.early_exit = getattr(ml_predictor, 'early_exit', None)
+
+        self._stats_lock = threading.Lock()
+        self._requests = {RULES_TIER: 0, ENSEMBLE_TIER: 0}
+        self._latency_total_ms = {RULES_TIER: 0.0, ENSEMBLE_TIER: 0.0}
+        self._latency_max_ms = {RULES_TIER: 0.0, ENSEMBLE_TIER: 0.0}
+
+    def select_tier(self, symptoms_text):
+        """
+        Decide which tier should answer the given symptoms.
+        Returns (tier, normalized text, rule scores) so the rules tier can answer without rescoring.
+        """
+        symptoms_lower = self.rules_predictor.normalize(symptoms_text)
+        specialty_scores = self.rules_predictor.score_specialties(symptoms_lower)
+        return self._tier_for(specialty_scores), symptoms_lower, specialty_scores
+
+    def _tier_for(self, specialty_scores):
+        if not specialty_scores:
+            return ENSEMBLE_TIER
+
+        # Critical keyword hits never wait for the ensemble
+        if self.emergency_fast_path and 'Emergency Medicine' in specialty_scores:
+            return RULES_TIER
+
+        scores = sorted((data['score'] for data in specialty_scores.values()), reverse=True)
+        runner_up = scores[1] if len(scores) > 1 else 0
+        if scores[0] - runner_up >= self.score_margin:
+            return RULES_TIER
+
+        return ENSEMBLE_TIER
+
+    def predict_specialty(self, symptoms_text):
+        """Predict medical specialty from symptoms"""
+        return self.predict_specialty_batch([symptoms_text])[0]
+
+    def has_similar_cases(self):
+        """Whether the ML model has a similar-case index"""
+        return self.ml_predictor.has_similar_cases()
+
+    def find_similar_cases(self, symptoms_text, k=5):
+        """Similar past cases come from the ML model's index"""
+        return self.ml_predictor.find_similar_cases(symptoms_text, k)
+
+    def predict_specialty_batch(self, symptoms_texts):
+        """Predict medical specialties for a batch, sending only ambiguous rows to the ensemble"""
+        predictions = [None] * len(symptoms_texts)
+        ensemble_rows = []
+
+        with phase('inference', tier='rules') as attributes:
+            for i, text in enumerate(symptoms_texts):
+                started = time.perf_counter()
+                tier, symptoms_lower, specialty_scores = self.select_tier(text)
+                if tier == RULES_TIER:
+                    predictions[i] = self.rules_predictor.predict_from_scores(text, symptoms_lower, specialty_scores)
+                    self._record(RULES_TIER, 1, (time.perf_counter() - started) * 1000.0)
+                else:
+                    ensemble_rows.append(i)
+            attributes['rows'] = len(symptoms_texts) - len(ensemble_rows)
+
+        if ensemble_rows:
+            started = time.perf_counter()
+            results = self.ml_predictor.predict_specialty_batch([symptoms_texts[i] for i in ensemble_rows])
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+
+            for i, prediction in zip(ensemble_rows, results):
+                predictions[i] = prediction
+
+            # Batch latency is amortised across the rows it served
+            self._record(ENSEMBLE_TIER, len(ensemble_rows), elapsed_ms)
+
+        return predictions
+
+    def _record(self, tier, count, elapsed_ms):
+        """Record how many requests a tier served and how long it took"""
+        per_request_ms = elapsed_ms / count
+        with self._stats_lock:
+            self._requests[tier] += count
+            self._latency_total_ms[tier] += elapsed_ms
+            self._latency_max_ms[tier] = max(self._latency_max_ms[tier], per_request_ms)
+
+    def get_stats(self):
+        """Get the share of requests served by each tier and per-tier latency"""
+        with self._stats_lock:
+            total = sum(self._requests.values())
+            return {
+                'score_margin': self.score_margin,
+                'requests': total,
+                'tiers': {
+                    tier: {
+                        'requests': count,
+                        'fraction': count / total if total else 0.0,
+                        'avg_latency_ms': self._latency_total_ms[tier] / count if count else 0.0,
+                        'max_latency_ms': self._latency_max_ms[tier]
+                    }
+                    for tier, count in self._requests.items()
+                }
+            }
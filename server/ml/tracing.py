@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Request Tracing
+Per-request spans joined to the caller's trace through the X-Request-ID and W3C
+traceparent headers, written as OTLP-JSON lines to a rotating file off the
+request path
+"""
+
+import atexit
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from logging.handlers import QueueListener, RotatingFileHandler
+from queue import Queue
+
+from async_logging import NonBlockingQueueHandler
+
+TRACEPARENT_PATTERN = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$')
+REQUEST_ID_HEADER = 'X-Request-ID'
+TRACEPARENT_HEADER = 'traceparent'
+
+# OTLP enum values
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_CODE_OK = 1
+STATUS_CODE_ERROR = 2
+
+SCOPE_NAME = 'healthcare_platform.ml'
+
+# Recorder collecting spans on this thread: a request's Trace, or a batch's SpanRecorder
+_local = threading.local()
+
+# Queue handler and writer installed by configure_tracing()
+_queue_handler = None
+_listener = None
+_service_name = None
+_stats_lock = threading.Lock()
+_exported = 0
+
+
+def _new_id(n_bytes):
+    """Random hex id; all-zero ids are invalid in W3C trace context"""
+    while True:
+        value = os.urandom(n_bytes).hex()
+        if value.strip('0'):
+            return value
+
+
+def parse_traceparent(header):
+    """(trace id, parent span id) from a W3C traceparent header, or None if absent or malformed"""
+    match = TRACEPARENT_PATTERN.match((header or '').strip().lower())
+    if match is None or not match.group(1).strip('0') or not match.group(2).strip('0'):
+        return None
+    return match.group(1), match.group(2)
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _otlp_attributes(attributes):
+    return [{'key': key, 'value': _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+class SpanRecorder:
+    """Collects (name, start ns, end ns, attributes) spans"""
+
+    def __init__(self):
+        self.spans = []
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """Time the enclosed block; yields the span's attributes so they can be extended"""
+        started = time.time_ns()
+        try:
+            yield attributes
+        finally:
+            self.spans.append((name, started, time.time_ns(), attributes))
+
+    def add_span(self, name, start_ns, end_ns, attributes=None):
+        """Record a span timed elsewhere"""
+        self.spans.append((name, start_ns, end_ns, attributes or {}))
+
+
+class Trace(SpanRecorder):
+    def __init__(self, name, trace_id=None, parent_span_id=None, request_id=None):
+        """
+        name: root span name, e.g. the route
+        trace_id, parent_span_id: the caller's trace context; a new trace is started without it
+        request_id: the caller's request id, kept as an attribute for lookups
+        """
+        super().__init__()
+        self.name = name
+        self.trace_id = trace_id or _new_id(16)
+        self.parent_span_id = parent_span_id
+        self.span_id = _new_id(8)
+        self.request_id = request_id
+        self.attributes = {'request.id': request_id}
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.status_code = None
+
+    def traceparent(self):
+        """traceparent header naming this request's root span"""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def finish(self, status_code):
+        self.end_ns = time.time_ns()
+        self.status_code = status_code
+        self.attributes['http.status_code'] = status_code
+
+    def to_otlp(self, service_name):
+        """The trace as an OTLP-JSON ExportTraceServiceRequest"""
+        root = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': SPAN_KIND_SERVER,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': _otlp_attributes(self.attributes),
+            'status': {'code': STATUS_CODE_ERROR if self.status_code and self.status_code >= 500 else STATUS_CODE_OK}
+        }
+        if self.parent_span_id:
+            root['parentSpanId'] = self.parent_span_id
+
+        spans = [root]
+        for name, start_ns, end_ns, attributes in self.spans:
+            spans.append({
+                'traceId': self.trace_id,
+                'spanId': _new_id(8),
+                'parentSpanId': self.span_id,
+                'name': name,
+                'kind': SPAN_KIND_INTERNAL,
+                'startTimeUnixNano': str(start_ns),
+                'endTimeUnixNano': str(end_ns),
+                'attributes': _otlp_attributes(attributes)
+            })
+
+        return {'resourceSpans': [{
+            'resource': {'attributes': _otlp_attributes({'service.name': service_name})},
+            'scopeSpans': [{'scope': {'name': SCOPE_NAME}, 'spans': spans}]
+        }]}
+
+
+class OtlpJsonFormatter(logging.Formatter):
+    """One OTLP-JSON trace export per line; serialization happens on the writer thread"""
+
+    def format(self, record):
+        return json.dumps(record.trace.to_otlp(_service_name), separators=(',', ':'))
+
+
+class TraceFileHandler(RotatingFileHandler):
+    """Rotating trace file that counts the traces actually written"""
+
+    def emit(self, record):
+        global _exported
+
+        self._failed = False
+        super().emit(record)
+        if not self._failed:
+            with _stats_lock:
+                _exported += 1
+
+    def handleError(self, record):
+        # Called by emit() for any write or formatting failure
+        self._failed = True
+        super().handleError(record)
+
+
+def configure_tracing(service_name):
+    """
+    Configure trace export from the environment.
+
+    ML_TRACING: '1' records and exports request traces (default '0')
+    ML_TRACE_FILE: trace file path (default traces/<service_name>.jsonl next to this module)
+    ML_TRACE_MAX_MB: size at which the trace file is rotated (default 50)
+    ML_TRACE_BACKUP_COUNT: rotated trace files kept (default 5)
+    ML_TRACE_QUEUE_SIZE: traces buffered before new ones are dropped (default 10000)
+    """
+    global _queue_handler, _listener, _service_name
+
+    if os.environ.get('ML_TRACING', '0') != '1' or _queue_handler is not None:
+        return
+
+    path = os.environ.get('ML_TRACE_FILE') or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'traces', f"{service_name}.jsonl")
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    file_handler = TraceFileHandler(
+        path,
+        maxBytes=int(float(os.environ.get('ML_TRACE_MAX_MB', 50)) * 1024 * 1024),
+        backupCount=int(os.environ.get('ML_TRACE_BACKUP_COUNT', 5)),
+        encoding='utf-8'
+    )
+    file_handler.setFormatter(OtlpJsonFormatter())
+
+    _service_name = service_name
+    _queue_handler = NonBlockingQueueHandler(Queue(maxsize=int(os.environ.get('ML_TRACE_QUEUE_SIZE', 10000))))
+    _listener = QueueListener(_queue_handler.queue, file_handler)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def start_trace(name, headers):
+    """Start tracing a request on this thread; None when tracing is off"""
+    if _queue_handler is None:
+        return None
+
+    context = parse_traceparent(headers.get(TRACEPARENT_HEADER))
+    trace_id, parent_span_id = context if context is not None else (None, None)
+    trace = Trace(name, trace_id, parent_span_id, headers.get(REQUEST_ID_HEADER))
+    _local.recorder = trace
+    return trace
+
+
+def finish_trace(trace, status_code):
+    """End a request's trace and queue it for export"""
+    _local.recorder = None
+    if trace is None or _queue_handler is None:
+        return
+
+    trace.finish(status_code)
+    _queue_handler.handle(logging.makeLogRecord({'msg': trace.name, 'trace': trace}))
+
+
+def current_trace():
+    """The trace of the request running on this thread, if any"""
+    recorder = getattr(_local, 'recorder', None)
+    return recorder if isinstance(recorder, Trace) else None
+
+
+def phase(name, **attributes):
+    """Time a block as a span of whatever this thread is recording; a no-op when nothing is"""
+    recorder = getattr(_local, 'recorder', None)
+    if recorder is None:
+        return nullcontext(attributes)
+    return recorder.span(name, **attributes)
+
+
+def record_span(name, start_ns, **attributes):
+    """Record a span from start_ns until now on this thread's recorder"""
+    recorder = getattr(_local, 'recorder', None)
+    if recorder is not None:
+        recorder.add_span(name, start_ns, time.time_ns(), attributes)
+
+
+@contextmanager
+def recording(recorder):
+    """Send phase() spans on this thread to recorder, e.g. while scoring a batch for several requests"""
+    previous = getattr(_local, 'recorder', None)
+    _local.recorder = recorder
+    try:
+        yield recorder
+    finally:
+        _local.recorder = previous
+
+
+def get_tracing_stats():
+    """Get trace export metrics"""
+    return {
+        'enabled': _queue_handler is not None,
+        # Traces written to the trace file; dropped ones never are
+        'exported': _exported,
+        'queued': _queue_handler.queue.qsize() if _queue_handler is not None else 0,
+        'dropped': _queue_handler.dropped if _queue_handler is not None else 0
+    }
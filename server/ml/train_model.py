@@ -6,20 +6,40 @@ Trains a machine learning model to predict medical specialties from symptoms
 
 import pandas as pd
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer
 from sklearn.ensemble import RandomForestClassifier, VotingClassifier
 from sklearn.naive_bayes import MultinomialNB
-from sklearn.svm import SVC
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.metrics import classification_report, accuracy_score
 from sklearn.preprocessing import LabelEncoder
 import joblib
+from incremental_model import IncrementalEnsemble
+from feature_cache import FeatureCache
+from columnar_dataset import ColumnarDataset, convert_dataset, dataset_fingerprint, is_columnar
+from model_registry import ModelRegistry
+from kernel_approximation import (SVM_MODES, build_svm_classifier, set_approximation_gamma, benchmark_svm,
+                                  synthetic_corpus)
+from near_duplicates import near_duplicate_mask
+from simple_prediction_service import SimpleSymptomPredictor
+from typo_correction import SymSpellIndex, correction_enabled, vocabulary_words
+from similar_cases import SimilarCaseIndex, benchmark_search
+from feature_selection import SELECTION_METHODS, select_vocabulary
+from memory_usage import deep_sizeof
+from early_exit_forest import EarlyExitVoting, early_exit_settings, benchmark_early_exit
+from tracing import phase
+from reduced_precision import (PRECISIONS, downcast_model, downcast_vectorizer,
+                               restore_compute_precision, evaluate_variant)
+import argparse
 import os
 import json
+import time
 from datetime import datetime
 
+# Dataset columns training reads; anything else in the file is left unread
+TRAINING_COLUMNS = ['symptoms', 'specialty', 'urgency']
+
 class MedicalSymptomPredictor:
-    def __init__(self):
+    def __init__(self, svm_mode='exact', near_duplicate_threshold=None, vocabulary_size=None, selection_method='chi2'):
         self.vectorizer = TfidfVectorizer(
             stop_words='english',
             max_features=5000,
@@ -39,11 +59,10 @@ class MedicalSymptomPredictor:
         
         self.nb_classifier = MultinomialNB(alpha=0.1)
         
-        self.svm_classifier = SVC(
-            kernel='rbf',
-            probability=True,
-            random_state=42
-        )
+        # 'exact' RBF SVC, or a kernel approximation whose inference cost
+        # does not grow with the training set
+        self.svm_mode = svm_mode
+        self.svm_classifier = build_svm_classifier(svm_mode)
         
         # Voting classifier combines all models
         self.model = VotingClassifier(
@@ -59,15 +78,43 @@ class MedicalSymptomPredictor:
         self.urgency_encoder = LabelEncoder()
         self.is_trained = False
         
-    def load_data(self, csv_path):
-        """Load and preprocess the medical symptoms dataset"""
+        # Estimated Jaccard similarity above which same-specialty rows count as duplicates
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.near_duplicates_removed = 0
+        
+        # Supervised pruning of the TF-IDF vocabulary to this many terms
+        if selection_method not in SELECTION_METHODS:
+            raise ValueError(f"Unknown feature selection method: {selection_method}")
+        self.vocabulary_size = vocabulary_size
+        self.selection_method = selection_method
+        
+        # Typo-correction index, built once the vocabulary is fitted
+        self.normalizer = None
+        
+        # Past cases searchable by similarity, and the rows behind the last featurization
+        self.similar_index = None
+        self._training_rows = None
+        
+        # Block-wise forest evaluation with early exit, when ML_RF_EARLY_EXIT=1
+        self.early_exit = None
+        
+    def load_data(self, csv_path, columns=TRAINING_COLUMNS):
+        """
+        Load and preprocess the medical symptoms dataset.
+        csv_path: a CSV file, or a columnar dataset written by convert-dataset
+        columns: columns to load (None for all)
+        """
         print(f"Loading data from {csv_path}")
         
         if not os.path.exists(csv_path):
             raise FileNotFoundError(f"Dataset not found: {csv_path}")
-            
-        df = pd.read_csv(csv_path)
-        print(f"Loaded {len(df)} samples with {len(df.columns)} features")
+        
+        started = time.perf_counter()
+        if is_columnar(csv_path):
+            df = ColumnarDataset(csv_path).to_frame(columns)
+        else:
+            df = pd.read_csv(csv_path, usecols=columns)
+        print(f"Loaded {len(df)} samples with {len(df.columns)} features in {time.perf_counter() - started:.3f}s")
         
         # Clean and preprocess symptoms text
         df['symptoms'] = df['symptoms'].str.lower().str.strip()
@@ -75,14 +122,27 @@ class MedicalSymptomPredictor:
         # Remove duplicates
         df = df.drop_duplicates(subset=['symptoms'])
         
+        # Remove near-identical phrasings within each specialty
+        if self.near_duplicate_threshold is not None:
+            started = time.perf_counter()
+            duplicate = near_duplicate_mask(df['symptoms'].tolist(), df['specialty'].tolist(),
+                                            self.near_duplicate_threshold)
+            df = df[~duplicate]
+            self.near_duplicates_removed = int(duplicate.sum())
+            print(f"Removed {self.near_duplicates_removed} near-duplicate rows "
+                  f"(Jaccard >= {self.near_duplicate_threshold}) in {time.perf_counter() - started:.2f}s")
+        
         print(f"After cleaning: {len(df)} unique samples")
         print(f"Medical specialties: {df['specialty'].nunique()}")
         print(f"Specialty distribution:\n{df['specialty'].value_counts()}")
         
         return df
     
-    def prepare_features(self, df):
-        """Prepare features for training"""
+    def prepare_features(self, df, selection_rows=None):
+        """
+        Prepare features for training.
+        selection_rows: rows whose labels feature selection may use (defaults to all)
+        """
         print("Preparing features...")
         
         # Extract text features using TF-IDF
@@ -92,31 +152,90 @@ class MedicalSymptomPredictor:
         y_specialty = self.label_encoder.fit_transform(df['specialty'])
         y_urgency = self.urgency_encoder.fit_transform(df['urgency'])
         
-        # Create confidence scores (use provided confidence as feature)
-        confidence_scores = df['confidence'].values
+        # Prune the vocabulary to the terms that best separate specialties
+        if self.vocabulary_size is not None and self.vocabulary_size < X_text.shape[1]:
+            n_terms = X_text.shape[1]
+            self.vectorizer, X_text = select_vocabulary(self.vectorizer, X_text, y_specialty, self.vocabulary_size,
+                                                        self.selection_method, selection_rows)
+            print(f"Selected {X_text.shape[1]} of {n_terms} terms by {self.selection_method}")
+        
+        # Create confidence scores (use provided confidence as feature), when loaded
+        confidence_scores = df['confidence'].values if 'confidence' in df else None
         
         return X_text, y_specialty, y_urgency, confidence_scores
     
-    def train(self, csv_path):
-        """Train the model on the dataset"""
-        print("Starting model training...")
+    def prepare_training_data(self, csv_path, cache_dir=None):
+        """Featurize and split the dataset, reusing cached artifacts when available"""
+        split_params = {'test_size': 0.2, 'random_state': 42, 'stratify': 'specialty'}
+        if self.near_duplicate_threshold is not None:
+            split_params['near_duplicate_threshold'] = self.near_duplicate_threshold
+        if self.vocabulary_size is not None:
+            split_params['feature_selection'] = {'method': self.selection_method, 'size': self.vocabulary_size}
+        
+        cache = None
+        if cache_dir:
+            cache = FeatureCache(cache_dir)
+            key = cache.make_key(dataset_fingerprint(csv_path), self.vectorizer.get_params(), split_params)
+            cached = cache.load(key)
+            
+            if cached is not None:
+                print(f"Using cached features {key}")
+                self.vectorizer = cached['vectorizer']
+                self.label_encoder = cached['label_encoder']
+                self.urgency_encoder = cached['urgency_encoder']
+                self.near_duplicates_removed = cached['meta'].get('near_duplicates_removed', 0)
+                # The cleaned, deduplicated rows behind X, for the similar-case index
+                self._training_rows = pd.DataFrame({
+                    'symptoms': cached['texts'],
+                    'specialty': self.label_encoder.inverse_transform(cached['y_specialty']),
+                    'urgency': self.urgency_encoder.inverse_transform(cached['y_urgency'])
+                })
+                return cached['X'], cached['y_specialty'], cached['train_idx'], cached['test_idx'], cached['meta']['dataset_size']
         
         # Load data
         df = self.load_data(csv_path)
         
+        # Split row indices so the split itself can be cached; splitting first keeps
+        # test labels out of feature selection
+        train_idx, test_idx = train_test_split(
+            np.arange(len(df)),
+            test_size=split_params['test_size'],
+            random_state=split_params['random_state'],
+            stratify=df['specialty']
+        )
+        
         # Prepare features
-        X, y_specialty, y_urgency, confidence_scores = self.prepare_features(df)
+        X, y_specialty, y_urgency, confidence_scores = self.prepare_features(df, selection_rows=train_idx)
+        self._training_rows = df
+        
+        if cache is not None:
+            cache.store(
+                key, X, y_specialty, y_urgency, train_idx, test_idx,
+                self.vectorizer, self.label_encoder, self.urgency_encoder,
+                meta={'dataset_path': csv_path, 'dataset_size': len(df),
+                      'near_duplicates_removed': self.near_duplicates_removed},
+                texts=df['symptoms']
+            )
+            print(f"Cached features {key}")
+        
+        return X, y_specialty, train_idx, test_idx, len(df)
+    
+    def train(self, csv_path, cache_dir=None):
+        """Train the model on the dataset"""
+        print("Starting model training...")
         
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y_specialty, test_size=0.2, random_state=42, stratify=y_specialty
-        )
+        # Load, featurize and split the data
+        X, y_specialty, train_idx, test_idx, dataset_size = self.prepare_training_data(csv_path, cache_dir)
+        
+        X_train, X_test = X[train_idx], X[test_idx]
+        y_train, y_test = y_specialty[train_idx], y_specialty[test_idx]
         
         print(f"Training set: {X_train.shape[0]} samples")
         print(f"Test set: {X_test.shape[0]} samples")
         
         # Train the ensemble model
-        print("Training ensemble model...")
+        print(f"Training ensemble model (SVM: {self.svm_mode})...")
+        set_approximation_gamma(self.model, X_train)
         self.model.fit(X_train, y_train)
         
         # Evaluate the model
@@ -137,19 +256,31 @@ class MedicalSymptomPredictor:
         print("\nClassification Report:")
         print(classification_report(y_test, y_pred, target_names=specialty_names))
         
+        self.normalizer = self._build_normalizer()
+        self.early_exit = self._build_early_exit()
         self.is_trained = True
         
+        # Index every dataset row (rows of X) for similar-case retrieval
+        df = self._training_rows if self._training_rows is not None else self.load_data(csv_path)
+        self.similar_index = SimilarCaseIndex.build(X, df['symptoms'], df['specialty'], df['urgency'])
+        self._training_rows = None
+        
         # Store training metadata
         self.training_metadata = {
             'training_date': datetime.now().isoformat(),
-            'dataset_size': len(df),
+            'dataset_size': dataset_size,
             'n_features': X.shape[1],
             'n_specialties': len(specialty_names),
             'specialties': specialty_names.tolist(),
             'train_accuracy': train_accuracy,
             'test_accuracy': test_accuracy,
             'cv_mean': cv_scores.mean(),
-            'cv_std': cv_scores.std()
+            'cv_std': cv_scores.std(),
+            'svm_mode': self.svm_mode,
+            'near_duplicate_threshold': self.near_duplicate_threshold,
+            'near_duplicates_removed': self.near_duplicates_removed,
+            'vocabulary_size': self.vocabulary_size,
+            'feature_selection': self.selection_method if self.vocabulary_size is not None else None
         }
         
         return {
@@ -158,23 +289,72 @@ class MedicalSymptomPredictor:
             'cv_scores': cv_scores
         }
     
+    def _build_normalizer(self):
+        """Typo-correction index over the rule keywords and the fitted vocabulary"""
+        if not correction_enabled():
+            return None
+        words = SimpleSymptomPredictor().dictionary_words() + vocabulary_words(self.vectorizer)
+        return SymSpellIndex(words)
+    
+    def _build_early_exit(self):
+        """Early-exit forest evaluation for soft-voting ensembles, if enabled"""
+        settings = early_exit_settings()
+        if settings is None or not EarlyExitVoting.supports(self.model):
+            return None
+        block_size, tolerance = settings
+        return EarlyExitVoting(self.model, block_size=block_size, tolerance=tolerance)
+    
     def predict_specialty(self, symptoms_text):
         """Predict medical specialty from symptoms"""
+        return self.predict_specialty_batch([symptoms_text])[0]
+    
+    def has_similar_cases(self):
+        """Whether this version has a similar-case index to search"""
+        return self.similar_index is not None
+    
+    def find_similar_cases(self, symptoms_text, k=5):
+        """The k past cases most similar to the symptoms, by TF-IDF cosine similarity"""
+        if self.similar_index is None:
+            raise ValueError("This model version has no similar-case index")
+        
+        with phase('featurize', rows=1):
+            text = symptoms_text.lower().strip()
+            if self.normalizer is not None:
+                text = self.normalizer.correct(text)
+            query = self.vectorizer.transform([text])
+        
+        with phase('inference', tier='similar_cases', k=k):
+            matches = self.similar_index.search(query, k)
+        
+        with phase('post_process', rows=len(matches)):
+            return [{**self.similar_index.case(case_id), 'similarity': similarity} for case_id, similarity in matches]
+    
+    def predict_specialty_batch(self, symptoms_texts):
+        """Predict medical specialties for a batch of symptom descriptions"""
         if not self.is_trained:
             raise ValueError("Model not trained. Call train() first.")
         
-        # Preprocess input
-        symptoms_text = symptoms_text.lower().strip()
+        # Preprocess input and vectorize the whole batch
+        with phase('featurize', rows=len(symptoms_texts)):
+            texts = [text.lower().strip() for text in symptoms_texts]
+            if self.normalizer is not None:
+                texts = [self.normalizer.correct(text) for text in texts]
+            X_input = self.vectorizer.transform(texts)
         
-        # Vectorize input
-        X_input = self.vectorizer.transform([symptoms_text])
+        # Single predict_proba call for the batch
+        with phase('inference', tier='ensemble', rows=len(texts)):
+            probas = (self.early_exit or self.model).predict_proba(X_input)
         
-        # Get predictions
-        specialty_encoded = self.model.predict(X_input)[0]
-        specialty_proba = self.model.predict_proba(X_input)[0]
+        with phase('post_process', rows=len(texts)):
+            return [self._build_prediction(text, proba) for text, proba in zip(texts, probas)]
+    
+    def _build_prediction(self, symptoms_text, specialty_proba):
+        """Build the prediction payload from a row of class probabilities"""
+        # Soft voting predicts the class with the highest averaged probability
+        specialty_encoded = self.model.classes_[np.argmax(specialty_proba)]
         
-        # Decode specialty
-        specialty = self.label_encoder.inverse_transform([specialty_encoded])[0]
+        # Decode specialty (direct lookup; inverse_transform's validation dominates per-row cost)
+        specialty = self.label_encoder.classes_[specialty_encoded]
         confidence = float(specialty_proba.max())
         
         # Get alternative specialties
@@ -182,7 +362,7 @@ class MedicalSymptomPredictor:
         alternatives = []
         
         for idx in top_indices[1:]:  # Skip the top prediction
-            alt_specialty = self.label_encoder.inverse_transform([idx])[0]
+            alt_specialty = self.label_encoder.classes_[idx]
             alt_confidence = float(specialty_proba[idx])
             if alt_confidence > 0.1:  # Only include if confidence > 10%
                 alternatives.append({
@@ -321,22 +501,36 @@ class MedicalSymptomPredictor:
         # Remove duplicates and limit to 5
         return list(dict.fromkeys(red_flags))[:5]
     
-    def save_model(self, model_dir):
-        """Save the trained model and metadata"""
+    def save_model(self, model_dir, precision='float64'):
+        """
+        Save the trained model and metadata.
+        precision: 'float64' (as trained), 'float32' for fitted arrays and features,
+        or 'int8' for float32 arrays with 8-bit quantized TF-IDF features
+        """
         if not self.is_trained:
             raise ValueError("Model not trained. Call train() first.")
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision: {precision}")
         
         os.makedirs(model_dir, exist_ok=True)
         
+        model, vectorizer = self.model, self.vectorizer
+        if precision != 'float64':
+            model = downcast_model(self.model)
+            vectorizer = downcast_vectorizer(self.vectorizer, precision)
+        
         # Save model components
-        joblib.dump(self.model, os.path.join(model_dir, 'model.joblib'))
-        joblib.dump(self.vectorizer, os.path.join(model_dir, 'vectorizer.joblib'))
+        joblib.dump(model, os.path.join(model_dir, 'model.joblib'))
+        joblib.dump(vectorizer, os.path.join(model_dir, 'vectorizer.joblib'))
         joblib.dump(self.label_encoder, os.path.join(model_dir, 'label_encoder.joblib'))
         joblib.dump(self.urgency_encoder, os.path.join(model_dir, 'urgency_encoder.joblib'))
         
+        if self.similar_index is not None:
+            self.similar_index.save(model_dir)
+        
         # Save metadata
         with open(os.path.join(model_dir, 'metadata.json'), 'w') as f:
-            json.dump(self.training_metadata, f, indent=2)
+            json.dump({**self.training_metadata, 'precision': precision}, f, indent=2)
         
         print(f"Model saved to {model_dir}")
     
@@ -355,29 +549,672 @@ class MedicalSymptomPredictor:
         with open(os.path.join(model_dir, 'metadata.json'), 'r') as f:
             self.training_metadata = json.load(f)
         
+        # Reduced-precision variants keep some arrays narrow only on disk
+        if self.training_metadata.get('precision', 'float64') != 'float64':
+            restore_compute_precision(self.model)
+        
+        self.normalizer = self._build_normalizer()
+        self.early_exit = self._build_early_exit()
+        self.similar_index = SimilarCaseIndex.load(model_dir)
         self.is_trained = True
         print(f"Model loaded from {model_dir}")
         print(f"Model trained on {self.training_metadata['training_date']}")
         print(f"Test accuracy: {self.training_metadata['test_accuracy']:.4f}")
 
-def main():
+class IncrementalSymptomPredictor(MedicalSymptomPredictor):
+    """Predictor that learns from labeled feedback batches without refitting from scratch"""
+    
+    def __init__(self):
+        super().__init__()
+        
+        # Hashing keeps the feature space open: new n-grams need no vocabulary refit
+        self.vectorizer = HashingVectorizer(
+            stop_words='english',
+            ngram_range=(1, 3),
+            n_features=2 ** 16,
+            alternate_sign=False,
+            norm='l2'
+        )
+        self.model = None
+    
+    def bootstrap(self, csv_path):
+        """Fit the initial incremental model from the training dataset"""
+        print("Bootstrapping incremental model...")
+        
+        df = self.load_data(csv_path)
+        
+        X = self.vectorizer.transform(df['symptoms'])
+        y = self.label_encoder.fit_transform(df['specialty'])
+        self.urgency_encoder.fit(df['urgency'])
+        
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.2, random_state=42, stratify=y
+        )
+        
+        self.model = IncrementalEnsemble(classes=np.arange(len(self.label_encoder.classes_)))
+        self.model.partial_fit(X_train, y_train)
+        
+        train_accuracy = self.model.score(X_train, y_train)
+        test_accuracy = self.model.score(X_test, y_test)
+        
+        # The test split stays unseen so promotion can score versions on it fairly
+        self.normalizer = self._build_normalizer()
+        self.similar_index = SimilarCaseIndex.build(X, df['symptoms'], df['specialty'], df['urgency'])
+        self.is_trained = True
+        
+        self.training_metadata = {
+            'training_date': datetime.now().isoformat(),
+            'model_type': 'incremental',
+            'version': datetime.now().strftime('%Y%m%d%H%M%S'),
+            'dataset_size': len(df),
+            'n_features': X.shape[1],
+            'n_specialties': len(self.label_encoder.classes_),
+            'specialties': self.label_encoder.classes_.tolist(),
+            'train_accuracy': train_accuracy,
+            'test_accuracy': test_accuracy,
+            'incremental_updates': 0,
+            'last_full_fit': datetime.now().isoformat()
+        }
+        
+        print(f"Test accuracy: {test_accuracy:.4f}")
+    
+    def update(self, rows):
+        """Learn from a DataFrame of labeled rows with 'symptoms' and 'specialty' columns"""
+        if not self.is_trained:
+            raise ValueError("Model not trained. Call bootstrap() first.")
+        
+        rows = rows.dropna(subset=['symptoms', 'specialty']).copy()
+        rows['symptoms'] = rows['symptoms'].str.lower().str.strip()
+        
+        # New specialties need a full refit to extend the label space
+        known = rows['specialty'].isin(self.label_encoder.classes_)
+        skipped = int((~known).sum())
+        rows = rows[known]
+        
+        if skipped:
+            print(f"Skipping {skipped} rows with specialties unknown to this model (requires full refit)")
+        
+        if rows.empty:
+            return {'rows_applied': 0, 'rows_skipped': skipped, 'batch_accuracy': None}
+        
+        X = self.vectorizer.transform(rows['symptoms'])
+        y = self.label_encoder.transform(rows['specialty'])
+        
+        # Score before learning: accuracy on unseen feedback (prequential evaluation)
+        batch_accuracy = self.model.score(X, y)
+        self.model.partial_fit(X, y)
+        
+        # Labeled feedback becomes searchable as past cases
+        if self.similar_index is not None:
+            urgencies = rows['urgency'].tolist() if 'urgency' in rows else None
+            self.similar_index.add(X, rows['symptoms'], rows['specialty'], urgencies)
+        
+        self.training_metadata.update({
+            'training_date': datetime.now().isoformat(),
+            'version': datetime.now().strftime('%Y%m%d%H%M%S'),
+            'dataset_size': self.training_metadata['dataset_size'] + len(rows),
+            'incremental_updates': self.training_metadata.get('incremental_updates', 0) + 1,
+            'last_batch_size': len(rows),
+            'last_batch_accuracy': batch_accuracy
+        })
+        
+        return {'rows_applied': len(rows), 'rows_skipped': skipped, 'batch_accuracy': batch_accuracy}
+
+def _feedback_label(record):
+    """Extract the confirmed specialty from a labeled row or an AILog export record"""
+    if record.get('specialty'):
+        return record['specialty']
+    
+    analysis = record.get('analysis') or {}
+    feedback = record.get('feedback') or {}
+    doctor_feedback = feedback.get('doctorFeedback') or {}
+    patient_feedback = feedback.get('patientFeedback') or {}
+    
+    # A doctor's correction is the strongest label
+    if doctor_feedback.get('actualSpecialty'):
+        return doctor_feedback['actualSpecialty']
+    
+    # A doctor's verdict on the prediction outranks the patient's; a rejected
+    # prediction without a correction gives no label at all
+    if doctor_feedback.get('wasAccurate') is not None:
+        return analysis.get('recommendedSpecialty') if doctor_feedback['wasAccurate'] else None
+    
+    if patient_feedback.get('wasHelpful'):
+        return analysis.get('recommendedSpecialty')
+    
+    return None
+
+def load_feedback_rows(path):
+    """Load labeled symptom rows from a JSONL (AILog export) or CSV file"""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Feedback file not found: {path}")
+    
+    if path.endswith('.csv'):
+        df = pd.read_csv(path)
+        return df[['symptoms', 'specialty']]
+    
+    rows = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            rows.append({'symptoms': record.get('symptoms'), 'specialty': _feedback_label(record)})
+    
+    return pd.DataFrame(rows, columns=['symptoms', 'specialty'])
+
+def held_out_accuracy(registry, version, dataset_path):
+    """Accuracy of a version on the dataset's test split, the rows no model version trains on"""
+    df = MedicalSymptomPredictor().load_data(dataset_path)
+    _, test_idx = train_test_split(np.arange(len(df)), test_size=0.2, random_state=42, stratify=df['specialty'])
+    
+    predictions = registry.get(version).predict_specialty_batch(df['symptoms'].iloc[test_idx].tolist())
+    predicted = np.array([prediction['recommendedSpecialty'] for prediction in predictions])
+    return float((predicted == df['specialty'].iloc[test_idx].to_numpy()).mean())
+
+def update_model(feedback_path, model_dir='models', dataset_path=None, make_primary=False):
+    """
+    Apply a batch of labeled feedback to the incremental model and publish it
+    as a candidate.
+    make_primary: promote the new version if its held-out accuracy does not
+        fall below the current primary's
+    """
+    started = time.perf_counter()
+    predictor = IncrementalSymptomPredictor()
+    registry = ModelRegistry(model_dir)
+    
+    # Continue from the newest incremental version, if there is one
+    existing_version = None
+    for version in reversed(registry.list_versions()):
+        metadata_path = os.path.join(registry.version_dir(version), 'metadata.json')
+        with open(metadata_path, 'r') as f:
+            metadata = json.load(f)
+        # Reduced-precision exports are serving-only; keep learning from full precision
+        if metadata.get('model_type') == 'incremental' and metadata.get('precision', 'float64') == 'float64':
+            existing_version = version
+            break
+    
+    dataset_path = dataset_path or os.path.join('data', 'medical_symptoms_dataset.csv')
+    if existing_version is not None:
+        predictor.load_model(registry.version_dir(existing_version))
+    else:
+        # Full ensembles cannot be partially fitted; start from the dataset instead
+        predictor.bootstrap(dataset_path)
+    
+    rows = load_feedback_rows(feedback_path)
+    print(f"Loaded {len(rows)} feedback rows from {feedback_path}")
+    
+    result = predictor.update(rows)
+    primary = registry.primary_version()
+    version = registry.publish(predictor, predictor.training_metadata['version'], make_primary=False)
+    
+    elapsed = time.perf_counter() - started
+    print(f"Applied {result['rows_applied']} rows, skipped {result['rows_skipped']}")
+    if result['batch_accuracy'] is not None:
+        print(f"Accuracy on new rows before update: {result['batch_accuracy']:.4f}")
+    print(f"Published candidate model version {version} in {elapsed:.2f}s")
+    
+    result['version'] = version
+    result['promoted'] = False
+    if make_primary:
+        # Only promote an update that scores at least as well as the primary on rows neither trained on
+        result['accuracy'] = {'candidate': held_out_accuracy(registry, version, dataset_path)}
+        if primary is not None:
+            result['accuracy']['primary'] = held_out_accuracy(registry, primary, dataset_path)
+            print(f"Held-out accuracy: primary {primary} {result['accuracy']['primary']:.4f}, "
+                  f"candidate {result['accuracy']['candidate']:.4f}")
+        
+        if primary is None or result['accuracy']['candidate'] >= result['accuracy']['primary']:
+            registry.set_primary(version)
+            result['promoted'] = True
+            print(f"Promoted model version {version} to primary")
+        else:
+            print(f"Kept {primary} as primary: candidate {version} regressed on held-out accuracy")
+    
+    return result
+
+def export_precision(precision, model_dir='models', version=None, dataset_path=None, make_primary=False):
+    """Publish a reduced-precision copy of a version and report how it compares"""
+    registry = ModelRegistry(model_dir)
+    version = version or registry.primary_version()
+    if version is None:
+        raise ValueError("No model version to export")
+    
+    metadata_path = os.path.join(registry.version_dir(version), 'metadata.json')
+    with open(metadata_path, 'r') as f:
+        predictor = IncrementalSymptomPredictor() if json.load(f).get('model_type') == 'incremental' else MedicalSymptomPredictor()
+    predictor.load_model(registry.version_dir(version))
+    
+    variant_version = registry.publish(predictor, f"{version}-{precision}", make_primary=make_primary,
+                                       precision=precision)
+    variant = registry.get(variant_version)
+    
+    # Evaluate on the same held-out split training uses
+    df = predictor.load_data(dataset_path or os.path.join('data', 'medical_symptoms_dataset.csv'))
+    df = df[df['specialty'].isin(predictor.label_encoder.classes_)]
+    labels = predictor.label_encoder.transform(df['specialty'])
+    _, test_idx = train_test_split(np.arange(len(df)), test_size=0.2, random_state=42, stratify=labels)
+    
+    report = evaluate_variant(
+        predictor, registry.version_dir(version), variant, registry.version_dir(variant_version),
+        df['symptoms'].iloc[test_idx].tolist(), labels[test_idx]
+    )
+    report['base_version'] = version
+    report['version'] = variant_version
+    
+    report_path = os.path.join(registry.version_dir(variant_version), 'precision_report.json')
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    
+    print(f"\n{precision} variant {variant_version} of {version}:")
+    print(f"  Accuracy: {report['accuracy']['float64']:.4f} -> {report['accuracy']['variant']:.4f}")
+    print(f"  Top-1 agreement: {report['top1_agreement']:.4f}")
+    print(f"  Probability drift: max {report['probability_drift']['max_abs']:.2e}, "
+          f"mean {report['probability_drift']['mean_abs']:.2e}")
+    print(f"  Artifact size: {report['artifact_bytes']['float64'] / 1024:.0f} KB -> "
+          f"{report['artifact_bytes']['variant'] / 1024:.0f} KB")
+    if report['load_rss_bytes']['float64'] is not None:
+        print(f"  Load RSS: {report['load_rss_bytes']['float64'] / 1024 / 1024:.1f} MB -> "
+              f"{report['load_rss_bytes']['variant'] / 1024 / 1024:.1f} MB")
+    print(f"  predict_proba batch: {report['predict_proba_ms']['float64']['batch']:.2f} ms -> "
+          f"{report['predict_proba_ms']['variant']['batch']:.2f} ms")
+    print(f"  predict_proba single: {report['predict_proba_ms']['float64']['single']:.2f} ms -> "
+          f"{report['predict_proba_ms']['variant']['single']:.2f} ms")
+    print(f"Report written to {report_path}")
+    
+    return report
+
+def near_duplicate_report(dataset_path, threshold=0.8, synthetic_rows=None, svm_mode='exact'):
+    """Rows removed by near-duplicate detection and the effect on ensemble fit time and accuracy"""
+    df = MedicalSymptomPredictor().load_data(dataset_path)
+    if synthetic_rows:
+        texts, labels = synthetic_corpus(df['symptoms'].tolist(), df['specialty'].tolist(), synthetic_rows)
+        df = pd.DataFrame({'symptoms': texts, 'specialty': labels})
+    
+    # Deduplicate only the training rows so both models are scored on the same test rows
+    train_idx, test_idx = train_test_split(np.arange(len(df)), test_size=0.2, random_state=42,
+                                           stratify=df['specialty'])
+    train_df, test_df = df.iloc[train_idx], df.iloc[test_idx]
+    
+    started = time.perf_counter()
+    duplicate = near_duplicate_mask(train_df['symptoms'].tolist(), train_df['specialty'].tolist(), threshold)
+    dedup_seconds = time.perf_counter() - started
+    
+    report = {'threshold': threshold, 'train_rows': len(train_df), 'rows_removed': int(duplicate.sum()),
+              'dedup_seconds': dedup_seconds}
+    
+    for name, rows in [('all', train_df), ('deduplicated', train_df[~duplicate])]:
+        predictor = MedicalSymptomPredictor(svm_mode=svm_mode)
+        predictor.label_encoder.fit(df['specialty'])
+        X = predictor.vectorizer.fit_transform(rows['symptoms'])
+        set_approximation_gamma(predictor.model, X)
+        
+        started = time.perf_counter()
+        predictor.model.fit(X, predictor.label_encoder.transform(rows['specialty']))
+        fit_seconds = time.perf_counter() - started
+        
+        accuracy = predictor.model.score(predictor.vectorizer.transform(test_df['symptoms']),
+                                         predictor.label_encoder.transform(test_df['specialty']))
+        report[name] = {'rows': len(rows), 'fit_seconds': fit_seconds, 'test_accuracy': accuracy}
+    
+    report['speedup'] = report['all']['fit_seconds'] / report['deduplicated']['fit_seconds']
+    
+    print(f"\nRemoved {report['rows_removed']} of {report['train_rows']} training rows "
+          f"(Jaccard >= {threshold}) in {dedup_seconds:.2f}s")
+    print(f"Fit time: {report['all']['fit_seconds']:.2f}s -> {report['deduplicated']['fit_seconds']:.2f}s "
+          f"({report['speedup']:.2f}x)")
+    print(f"Test accuracy: {report['all']['test_accuracy']:.4f} -> {report['deduplicated']['test_accuracy']:.4f}")
+    
+    return report
+
+def benchmark_similar_cases(dataset_path, n_cases=1000000, n_queries=500, k=5):
+    """Index synthetic cases in the training TF-IDF space and time top-k queries"""
+    predictor = MedicalSymptomPredictor()
+    df = predictor.load_data(dataset_path)
+    texts, labels = synthetic_corpus(df['symptoms'].tolist(), df['specialty'].tolist(), n_cases)
+    queries, _ = synthetic_corpus(df['symptoms'].tolist(), df['specialty'].tolist(), n_queries, seed=7)
+    
+    started = time.perf_counter()
+    X = predictor.vectorizer.fit_transform(texts)
+    featurize_seconds = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    index = SimilarCaseIndex.build(X, texts, labels)
+    build_seconds = time.perf_counter() - started
+    
+    report = benchmark_search(index, X, predictor.vectorizer.transform(queries), k)
+    report.update({'cases': n_cases, 'featurize_seconds': featurize_seconds, 'build_seconds': build_seconds,
+                   **index.get_stats()})
+    
+    print(f"\nIndexed {n_cases} cases in {build_seconds:.2f}s "
+          f"({report['postings_bytes'] / 1024 / 1024:.1f} MB of postings)")
+    for name in ('index_ms', 'brute_force_ms'):
+        latency = report[name]
+        print(f"{name:>15}: p50 {latency['p50']:.2f} ms, p95 {latency['p95']:.2f} ms, p99 {latency['p99']:.2f} ms")
+    print(f"Results differing from brute force: {report['mismatches']} of {report['queries']}")
+    
+    return report
+
+def feature_selection_report(dataset_path, sizes=(250, 500, 1000, 2000), method='chi2', synthetic_rows=None,
+                             svm_mode='exact', n_latency_rows=200):
+    """Test accuracy, latency and memory of the ensemble as the selected vocabulary shrinks"""
+    df = MedicalSymptomPredictor().load_data(dataset_path)
+    if synthetic_rows:
+        texts, labels = synthetic_corpus(df['symptoms'].tolist(), df['specialty'].tolist(), synthetic_rows)
+        df = pd.DataFrame({'symptoms': texts, 'specialty': labels})
+    
+    train_idx, test_idx = train_test_split(np.arange(len(df)), test_size=0.2, random_state=42,
+                                           stratify=df['specialty'])
+    latency_texts = df['symptoms'].iloc[test_idx].tolist()[:n_latency_rows]
+    
+    report = {'method': method, 'train_rows': len(train_idx), 'sizes': {}}
+    for size in [None] + sorted(sizes, reverse=True):
+        predictor = MedicalSymptomPredictor(svm_mode=svm_mode, vocabulary_size=size, selection_method=method)
+        X = predictor.vectorizer.fit_transform(df['symptoms'])
+        y = predictor.label_encoder.fit_transform(df['specialty'])
+        if size is not None:
+            if size >= X.shape[1]:
+                continue
+            predictor.vectorizer, X = select_vocabulary(predictor.vectorizer, X, y, size, method, train_idx)
+        else:
+            # Vectorizers over a selected vocabulary keep no introspection-only stop_words_;
+            # compare like with like
+            predictor.vectorizer.stop_words_ = None
+        
+        set_approximation_gamma(predictor.model, X[train_idx])
+        started = time.perf_counter()
+        predictor.model.fit(X[train_idx], y[train_idx])
+        fit_seconds = time.perf_counter() - started
+        
+        # Serving cost: one request at a time through transform and predict_proba
+        transform_seconds = predict_seconds = 0.0
+        for text in latency_texts:
+            started = time.perf_counter()
+            X_row = predictor.vectorizer.transform([text])
+            transform_seconds += time.perf_counter() - started
+            started = time.perf_counter()
+            predictor.model.predict_proba(X_row)
+            predict_seconds += time.perf_counter() - started
+        
+        report['sizes'][size or 'all'] = {
+            'terms': X.shape[1],
+            'test_accuracy': predictor.model.score(X[test_idx], y[test_idx]),
+            'fit_seconds': fit_seconds,
+            'transform_ms': transform_seconds * 1000.0 / len(latency_texts),
+            'predict_proba_ms': predict_seconds * 1000.0 / len(latency_texts),
+            'vectorizer_bytes': deep_sizeof(predictor.vectorizer),
+            'model_bytes': deep_sizeof(predictor.model)
+        }
+    
+    print(f"\n{method} selection, {report['train_rows']} training rows")
+    print(f"{'terms':>7} {'accuracy':>9} {'fit s':>7} {'transform ms':>13} {'predict ms':>11} "
+          f"{'vectorizer KB':>14} {'model KB':>9}")
+    for result in report['sizes'].values():
+        print(f"{result['terms']:>7} {result['test_accuracy']:>9.4f} {result['fit_seconds']:>7.2f} "
+              f"{result['transform_ms']:>13.3f} {result['predict_proba_ms']:>11.3f} "
+              f"{result['vectorizer_bytes'] / 1024:>14.0f} {result['model_bytes'] / 1024:>9.0f}")
+    
+    return report
+
+def early_exit_report(model_dir='models', version=None, dataset_path=None, block_size=10,
+                      tolerances=(0.0, 0.02, 0.05), n_rows=None):
+    """Compare early-exit forest evaluation with full evaluation on the held-out split"""
+    registry = ModelRegistry(model_dir)
+    version = version or registry.primary_version()
+    if version is None:
+        raise ValueError("No model version to benchmark")
+    
+    predictor = MedicalSymptomPredictor()
+    predictor.load_model(registry.version_dir(version))
+    if not EarlyExitVoting.supports(predictor.model):
+        raise ValueError(f"Model version {version} has no random forest member")
+    
+    df = predictor.load_data(dataset_path or os.path.join('data', 'medical_symptoms_dataset.csv'))
+    df = df[df['specialty'].isin(predictor.label_encoder.classes_)]
+    labels = predictor.label_encoder.transform(df['specialty'])
+    _, test_idx = train_test_split(np.arange(len(df)), test_size=0.2, random_state=42, stratify=labels)
+    texts = df['symptoms'].iloc[test_idx].tolist()
+    if n_rows:
+        texts, _ = synthetic_corpus(texts, df['specialty'].iloc[test_idx].tolist(), n_rows, seed=7)
+    
+    X = predictor.vectorizer.transform([text.lower().strip() for text in texts])
+    report = benchmark_early_exit(predictor.model, X, block_size=block_size, tolerances=tolerances)
+    report['version'] = version
+    report['trees'] = len(predictor.model.named_estimators_['rf'].estimators_)
+    
+    print(f"\nVersion {version}: {report['rows']} rows, {report['trees']} trees in blocks of {block_size}")
+    for name, key in (('Full evaluation', 'full_ms_per_row'), ('Block-wise, no exit', 'no_exit_ms_per_row')):
+        print(f"{name}: {report[key][1]:.3f} ms/row single, {report[key][64]:.3f} ms/row in batches of 64")
+    print("Latency saved is against full evaluation (in parentheses: against block-wise with no exit)")
+    print(f"{'tolerance':>10} {'avg trees':>10} {'top-1 agree':>12} {'max |dp|':>10} {'mean |dp|':>10} "
+          f"{'saved (1)':>17} {'saved (64)':>17}")
+    for tolerance, result in report['tolerances'].items():
+        saved = [f"{result['latency_saved'][size]:.1%} ({result['latency_saved_by_exit'][size]:.1%})"
+                 for size in (1, 64)]
+        print(f"{tolerance:>10.3f} {result['avg_trees_evaluated']:>10.1f} {result['top1_agreement']:>12.4f} "
+              f"{result['probability_error']['max_abs']:>10.2e} {result['probability_error']['mean_abs']:>10.2e} "
+              f"{saved[0]:>17} {saved[1]:>17}")
+    
+    return report
+
+def convert_dataset_file(input_path, output_path=None, repeats=5):
+    """Convert a CSV dataset to the columnar format and compare how long each takes to load"""
+    output_path = output_path or os.path.splitext(input_path)[0] + '.hcd'
+    
+    started = time.perf_counter()
+    header = convert_dataset(input_path, output_path)
+    print(f"Converted {header['rows']} rows to {output_path} in {time.perf_counter() - started:.2f}s")
+    for column in header['columns']:
+        detail = f" ({len(column['categories'])} categories, {column['dtype']} codes)" if column['kind'] == 'category' else ''
+        print(f"  {column['name']}: {column['kind']}{detail}")
+    
+    def best_ms(load):
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            load()
+            timings.append((time.perf_counter() - started) * 1000.0)
+        return min(timings)
+    
+    report = {
+        'rows': header['rows'],
+        'csv_bytes': os.path.getsize(input_path),
+        'columnar_bytes': os.path.getsize(output_path),
+        'load_ms': {
+            'csv': best_ms(lambda: pd.read_csv(input_path)),
+            'csv_training_columns': best_ms(lambda: pd.read_csv(input_path, usecols=TRAINING_COLUMNS)),
+            'columnar_open': best_ms(lambda: ColumnarDataset(output_path)),
+            'columnar_training_columns': best_ms(lambda: ColumnarDataset(output_path).to_frame(TRAINING_COLUMNS))
+        }
+    }
+    
+    print(f"\nSize: CSV {report['csv_bytes']} bytes, columnar {report['columnar_bytes']} bytes")
+    print(f"{'load':<28} {'ms':>10}")
+    for name, ms in report['load_ms'].items():
+        print(f"{name:<28} {ms:>10.2f}")
+    
+    return report
+
+def main(argv=None):
     """Main training function"""
+    parser = argparse.ArgumentParser(description="Medical Symptom Prediction Model Training")
+    parser.set_defaults(cache_dir=os.path.join('cache', 'features'), no_cache=False,
+                        model_dir='models', candidate=False, svm='exact', dedup_threshold=None,
+                        vocabulary_size=None, selection_method='chi2',
+                        dataset=os.path.join('data', 'medical_symptoms_dataset.csv'))
+    subparsers = parser.add_subparsers(dest='command')
+    
+    train_parser = subparsers.add_parser('train', help='Fully retrain the ensemble from the dataset (default)')
+    train_parser.add_argument('--cache-dir', default=os.path.join('cache', 'features'),
+                              help='Directory for cached features and splits')
+    train_parser.add_argument('--no-cache', action='store_true', help='Always recompute features')
+    train_parser.add_argument('--model-dir', default='models', help='Model registry directory')
+    train_parser.add_argument('--candidate', action='store_true',
+                              help='Publish without making the new version primary')
+    train_parser.add_argument('--svm', choices=SVM_MODES, default='exact',
+                              help='Exact RBF SVC, or a Nystroem / random Fourier feature approximation')
+    train_parser.add_argument('--dedup-threshold', type=float, default=None,
+                              help='Drop same-specialty rows with estimated Jaccard similarity at or above this')
+    train_parser.add_argument('--vocabulary-size', type=int, default=None,
+                              help='Prune the TF-IDF vocabulary to this many terms by supervised selection')
+    train_parser.add_argument('--selection-method', choices=SELECTION_METHODS, default='chi2',
+                              help='Term ranking used by --vocabulary-size')
+    train_parser.add_argument('--dataset', default=os.path.join('data', 'medical_symptoms_dataset.csv'),
+                              help='Training dataset, as CSV or in the columnar format')
+    
+    update_parser = subparsers.add_parser('update', help='Incrementally update the model from labeled feedback')
+    update_parser.add_argument('--input', required=True, help='Labeled rows as JSONL (AILog export) or CSV')
+    update_parser.add_argument('--model-dir', default='models', help='Model registry directory')
+    update_parser.add_argument('--dataset', default=None, help='Dataset used to bootstrap the incremental model')
+    update_parser.add_argument('--promote', action='store_true',
+                               help='Make the new version primary unless its held-out accuracy regresses')
+    
+    score_parser = subparsers.add_parser('score', help='Bulk-score a CSV/JSONL file of symptom texts')
+    score_parser.add_argument('--input', required=True, help='CSV or JSONL file with a symptoms column')
+    score_parser.add_argument('--output', required=True, help='Output file (.jsonl or .csv)')
+    score_parser.add_argument('--model-dir', default='models', help='Model registry directory')
+    score_parser.add_argument('--version', default=None, help='Model version (defaults to primary)')
+    score_parser.add_argument('--workers', type=int, default=None, help='Worker processes (defaults to CPU count)')
+    score_parser.add_argument('--chunk-size', type=int, default=2000, help='Rows per batched predict call')
+    score_parser.add_argument('--text-field', default='symptoms', help='Column holding the symptom text')
+    score_parser.add_argument('--id-field', default=None, help='Column copied to the output to identify rows')
+    score_parser.add_argument('--full', action='store_true', help='Include reasoning, questions and red flags')
+    score_parser.add_argument('--no-resume', action='store_true', help='Ignore any existing checkpoint')
+    
+    export_parser = subparsers.add_parser('export', help='Publish a reduced-precision variant of a version')
+    export_parser.add_argument('--precision', choices=PRECISIONS[1:], default='float32',
+                               help='float32 arrays, or int8 to also quantize TF-IDF features')
+    export_parser.add_argument('--model-dir', default='models', help='Model registry directory')
+    export_parser.add_argument('--version', default=None, help='Version to export (defaults to primary)')
+    export_parser.add_argument('--dataset', default=None, help='Dataset whose test split is used for the report')
+    export_parser.add_argument('--primary', action='store_true', help='Make the variant the primary version')
+    
+    benchmark_parser = subparsers.add_parser('benchmark-svm', help='Compare SVM modes as the dataset grows')
+    benchmark_parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000, 100000, 1000000],
+                                  help='Synthetic dataset sizes (rows)')
+    benchmark_parser.add_argument('--exact-max-rows', type=int, default=20000,
+                                  help='Largest training set the exact SVC is benchmarked on')
+    benchmark_parser.add_argument('--dataset', default=os.path.join('data', 'medical_symptoms_dataset.csv'),
+                                  help='Dataset whose rows seed the synthetic data')
+    
+    dedup_parser = subparsers.add_parser('dedup-report', help='Measure near-duplicate removal and its training speedup')
+    dedup_parser.add_argument('--threshold', type=float, default=0.8, help='Jaccard similarity threshold')
+    dedup_parser.add_argument('--dataset', default=os.path.join('data', 'medical_symptoms_dataset.csv'),
+                              help='Dataset to deduplicate')
+    dedup_parser.add_argument('--synthetic-rows', type=int, default=None,
+                              help='Grow the dataset to this many perturbed rows first')
+    dedup_parser.add_argument('--svm', choices=SVM_MODES, default='exact', help='SVM member used for the timing')
+    
+    similar_parser = subparsers.add_parser('benchmark-similar', help='Benchmark similar-case search latency')
+    similar_parser.add_argument('--cases', type=int, default=1000000, help='Synthetic cases to index')
+    similar_parser.add_argument('--queries', type=int, default=500, help='Queries to time')
+    similar_parser.add_argument('--k', type=int, default=5, help='Cases returned per query')
+    similar_parser.add_argument('--dataset', default=os.path.join('data', 'medical_symptoms_dataset.csv'),
+                                help='Dataset whose rows seed the synthetic cases')
+    
+    selection_parser = subparsers.add_parser('feature-selection-report',
+                                             help='Accuracy, latency and memory across selected vocabulary sizes')
+    selection_parser.add_argument('--sizes', type=int, nargs='+', default=[250, 500, 1000, 2000],
+                                  help='Vocabulary sizes to compare against the full vocabulary')
+    selection_parser.add_argument('--method', choices=SELECTION_METHODS, default='chi2', help='Term ranking')
+    selection_parser.add_argument('--dataset', default=os.path.join('data', 'medical_symptoms_dataset.csv'),
+                                  help='Dataset to train on')
+    selection_parser.add_argument('--synthetic-rows', type=int, default=None,
+                                  help='Grow the dataset to this many perturbed rows first')
+    selection_parser.add_argument('--svm', choices=SVM_MODES, default='exact', help='SVM member of the ensemble')
+    
+    early_exit_parser = subparsers.add_parser('benchmark-early-exit',
+                                              help='Compare early-exit forest evaluation with full evaluation')
+    early_exit_parser.add_argument('--model-dir', default='models', help='Model registry directory')
+    early_exit_parser.add_argument('--version', default=None, help='Version to benchmark (defaults to primary)')
+    early_exit_parser.add_argument('--dataset', default=None, help='Dataset whose test split is scored')
+    early_exit_parser.add_argument('--block-size', type=int, default=10, help='Trees evaluated between exit checks')
+    early_exit_parser.add_argument('--tolerances', type=float, nargs='+', default=[0.0, 0.02, 0.05],
+                                   help='Exit tolerances to compare')
+    early_exit_parser.add_argument('--rows', type=int, default=None,
+                                   help='Grow the test split to this many perturbed rows')
+    
+    convert_parser = subparsers.add_parser('convert-dataset',
+                                           help='Convert a CSV dataset to the memory-mapped columnar format')
+    convert_parser.add_argument('--input', default=os.path.join('data', 'medical_symptoms_dataset.csv'),
+                                help='CSV dataset to convert')
+    convert_parser.add_argument('--output', default=None,
+                                help='Columnar dataset path (defaults to the input with an .hcd extension)')
+    
+    args = parser.parse_args(argv)
+    
+    if args.command == 'convert-dataset':
+        print("Medical Symptom Dataset Conversion")
+        print("=" * 50)
+        return convert_dataset_file(args.input, args.output)
+    
+    if args.command == 'feature-selection-report':
+        print("Medical Symptom Feature Selection Report")
+        print("=" * 50)
+        return feature_selection_report(args.dataset, args.sizes, args.method, args.synthetic_rows, args.svm)
+    
+    if args.command == 'benchmark-early-exit':
+        print("Medical Symptom Early-Exit Forest Benchmark")
+        print("=" * 50)
+        return early_exit_report(args.model_dir, args.version, args.dataset, args.block_size,
+                                 args.tolerances, args.rows)
+    
+    if args.command == 'benchmark-similar':
+        print("Medical Symptom Similar-Case Benchmark")
+        print("=" * 50)
+        return benchmark_similar_cases(args.dataset, args.cases, args.queries, args.k)
+    
+    if args.command == 'dedup-report':
+        print("Medical Symptom Near-Duplicate Report")
+        print("=" * 50)
+        return near_duplicate_report(args.dataset, args.threshold, args.synthetic_rows, args.svm)
+    
+    if args.command == 'benchmark-svm':
+        print("Medical Symptom Prediction SVM Benchmark")
+        print("=" * 50)
+        df = MedicalSymptomPredictor().load_data(args.dataset)
+        return benchmark_svm(df['symptoms'].tolist(), df['specialty'].tolist(), args.sizes,
+                             exact_max_rows=args.exact_max_rows)
+    
+    if args.command == 'export':
+        print("Medical Symptom Prediction Reduced-Precision Export")
+        print("=" * 50)
+        return export_precision(args.precision, args.model_dir, args.version, args.dataset,
+                                make_primary=args.primary)
+    
+    if args.command == 'score':
+        print("Medical Symptom Bulk Scoring")
+        print("=" * 50)
+        from bulk_score import score_file
+        return score_file(
+            args.input, args.output, model_dir=args.model_dir, version=args.version,
+            workers=args.workers, chunk_size=args.chunk_size, text_field=args.text_field,
+            id_field=args.id_field, full=args.full, resume=not args.no_resume
+        )
+    
+    if args.command == 'update':
+        print("Medical Symptom Prediction Incremental Update")
+        print("=" * 50)
+        return update_model(args.input, args.model_dir, args.dataset, make_primary=args.promote)
+    
     print("Medical Symptom Prediction Model Training")
     print("=" * 50)
     
     # Initialize predictor
-    predictor = MedicalSymptomPredictor()
+    predictor = MedicalSymptomPredictor(svm_mode=args.svm, near_duplicate_threshold=args.dedup_threshold,
+                                        vocabulary_size=args.vocabulary_size, selection_method=args.selection_method)
     
     # Train the model
-    dataset_path = os.path.join('data', 'medical_symptoms_dataset.csv')
-    model_dir = 'models'
+    dataset_path = args.dataset
     
     try:
         # Train model
-        results = predictor.train(dataset_path)
+        cache_dir = None if args.no_cache else args.cache_dir
+        results = predictor.train(dataset_path, cache_dir=cache_dir)
         
-        # Save model
-        predictor.save_model(model_dir)
+        # Publish the model as a new registry version
+        ModelRegistry(args.model_dir).publish(predictor, make_primary=not args.candidate)
         
         # Test prediction
         print("\nTesting model prediction...")
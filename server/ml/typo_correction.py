@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Symptom Typo Correction
+Symmetric-delete spelling index: misspelled tokens are corrected by dictionary
+lookups of their deletions instead of edit-distance scans over the vocabulary
+"""
+
+import os
+import re
+import threading
+from functools import lru_cache
+
+# Tokens in a general English lexicon are real words, not misspellings, and
+# are never "corrected" into the nearest medical keyword (heard -> heart).
+# The lexicon is textblob's word lists; a smaller one would let too many
+# ordinary words through, so correction refuses to run without it
+MIN_LEXICON_WORDS = 50000
+
+TOKEN_PATTERN = re.compile(r'[a-z]+')
+
+
+def correction_enabled():
+    """Typo correction is opt-in: on only when ML_TYPO_CORRECTION=1"""
+    return os.environ.get('ML_TYPO_CORRECTION', '0') == '1'
+
+
+@lru_cache(maxsize=1)
+def english_lexicon():
+    """
+    Lowercase words of textblob's spelling frequency list and part-of-speech
+    lexicon; empty when textblob is not installed
+    """
+    try:
+        import textblob
+    except ImportError:
+        return frozenset()
+
+    words = set()
+    for name in ('en-spelling.txt', 'en-lexicon.txt'):
+        path = os.path.join(os.path.dirname(textblob.__file__), 'en', name)
+        if not os.path.exists(path):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith(';;;') or not line.strip():
+                    continue
+                word = line.split()[0].lower()
+                if word.isalpha():
+                    words.add(word)
+    return frozenset(words)
+
+
+def vocabulary_words(vectorizer):
+    """Unigrams of a fitted vectorizer's vocabulary (empty for hashing vectorizers)"""
+    vocabulary = getattr(vectorizer, 'vocabulary_', None) or {}
+    return [word for term in vocabulary for word in term.split()]
+
+
+def _deletes(word, max_distance):
+    """All strings reachable from word by deleting up to max_distance characters"""
+    results = set()
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {candidate[:i] + candidate[i + 1:] for candidate in frontier for i in range(len(candidate))}
+        results |= frontier
+    return results
+
+
+def _edit_distance(a, b, max_distance):
+    """Optimal string alignment distance, or max_distance + 1 once it is exceeded"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+class SymSpellIndex:
+    def __init__(self, words, lexicon=None, max_edit_distance=2, prefix_length=7, min_token_length=5,
+                 cache_size=10000):
+        """
+        words: dictionary words
+        lexicon: general English words that are never corrected (textblob's by default)
+        max_edit_distance: largest correction allowed (tokens under 9 characters get at most 1)
+        prefix_length: only word prefixes are indexed, bounding deletes per word
+        min_token_length: shorter tokens are never corrected
+        """
+        self.max_edit_distance = max_edit_distance
+        self.prefix_length = prefix_length
+        self.min_token_length = min_token_length
+        self.cache_size = cache_size
+
+        self.lexicon = english_lexicon() if lexicon is None else frozenset(lexicon)
+        if len(self.lexicon) < MIN_LEXICON_WORDS:
+            raise ValueError(f"Typo correction needs an English lexicon of at least {MIN_LEXICON_WORDS} words, "
+                             f"got {len(self.lexicon)}; install textblob from requirements.txt")
+
+        self.frequencies = {}
+        for word in words:
+            if word.isalpha():
+                self.frequencies[word] = self.frequencies.get(word, 0) + 1
+
+        # Delete of a word's prefix -> words it came from
+        self.deletes = {}
+        for word in self.frequencies:
+            prefix = word[:prefix_length]
+            for key in _deletes(prefix, max_edit_distance) | {prefix}:
+                self.deletes.setdefault(key, []).append(word)
+
+        self._cache = {}
+        self._stats_lock = threading.Lock()
+        self._tokens = 0
+        self._skipped = 0
+        self._known = 0
+        self._corrected = 0
+        self._uncorrectable = 0
+
+    def _max_distance(self, token):
+        if len(token) < self.min_token_length or token in self.lexicon:
+            return 0
+        return min(self.max_edit_distance, 1 if len(token) < 9 else 2)
+
+    def lookup(self, token):
+        """The one closest dictionary word within the allowed distance; None when there is none or a tie"""
+        max_distance = self._max_distance(token)
+        if max_distance == 0:
+            return None
+
+        prefix = token[:self.prefix_length]
+        candidates = set()
+        for key in _deletes(prefix, max_distance) | {prefix}:
+            candidates.update(self.deletes.get(key, ()))
+
+        best, best_distance, tied = None, max_distance + 1, False
+        for word in candidates:
+            # Typos rarely change the first letter; words that differ there (linus, peart) are left alone
+            if word[0] != token[0]:
+                continue
+            distance = _edit_distance(token, word, max_distance)
+            if distance < best_distance:
+                best, best_distance, tied = word, distance, False
+            elif distance == best_distance:
+                tied = True
+
+        # Two equally close words mean the intended one cannot be told, so the token is kept
+        if best is None or tied:
+            return None
+        return best
+
+    def _correct_token(self, token, counts):
+        counts[0] += 1
+        if token in self.frequencies:
+            counts[2] += 1
+            return token
+        if self._max_distance(token) == 0:
+            counts[1] += 1
+            return token
+
+        # Results are memoized: repeated misspellings cost one dictionary hit
+        if token in self._cache:
+            correction = self._cache[token]
+        else:
+            correction = self.lookup(token)
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[token] = correction
+
+        if correction is None:
+            counts[4] += 1
+            return token
+        counts[3] += 1
+        return correction
+
+    def correct(self, text):
+        """Replace misspelled words in lowercased text with their dictionary corrections"""
+        counts = [0, 0, 0, 0, 0]  # tokens, skipped, known, corrected, uncorrectable
+        corrected = TOKEN_PATTERN.sub(lambda match: self._correct_token(match.group(0), counts), text)
+
+        with self._stats_lock:
+            self._tokens += counts[0]
+            self._skipped += counts[1]
+            self._known += counts[2]
+            self._corrected += counts[3]
+            self._uncorrectable += counts[4]
+        return corrected
+
+    def get_stats(self):
+        """Get correction hit rates"""
+        with self._stats_lock:
+            checked = self._corrected + self._uncorrectable
+            return {
+                'dictionary_words': len(self.frequencies),
+                'lexicon_words': len(self.lexicon),
+                'index_entries': len(self.deletes),
+                'tokens': self._tokens,
+                'skipped': self._skipped,
+                'known': self._known,
+                'corrected': self._corrected,
+                'uncorrectable': self._uncorrectable,
+                'correction_rate': self._corrected / self._tokens if self._tokens else 0.0,
+                'hit_rate': self._corrected / checked if checked else 0.0
+            }
@@ -2,6 +2,7 @@ import axios from 'axios';
 import dotenv from 'dotenv';
 import AILog from '../models/AILog.js';
 import { spawn } from 'child_process';
+import crypto from 'crypto';
 import path from 'path';
 import { fileURLToPath } from 'url';
 
@@ -17,6 +18,7 @@ class MLAIService {
     this.mlServiceProcess = null;
     this.isMLServiceRunning = false;
     this.model = 'local-ml-ensemble';
+    this.requestTimeout = parseInt(process.env.ML_REQUEST_TIMEOUT_MS, 10) || 30000;
     
     // Start the ML service on initialization
     this.startMLService();
@@ -138,8 +140,8 @@ class MLAIService {
         await this.startMLService();
       }
 
-      // Make prediction request to ML service
-      const response = await this.makePredictionRequest(symptoms);
+      // Make prediction request to ML service, tagged so its spans line up with this request
+      const response = await this.makePredictionRequest(symptoms, requestId);
       
       const responseTime = Date.now() - startTime;
 
@@ -203,17 +205,23 @@ class MLAIService {
   /**
    * Make prediction request to ML service
    * @param {string} symptoms - Patient symptoms
+   * @param {string} requestId - Request ID recorded on the ML service's trace
    * @returns {Object} ML service response
    */
-  async makePredictionRequest(symptoms) {
+  async makePredictionRequest(symptoms, requestId) {
     try {
       const response = await axios.post(`${this.mlServiceUrl}/predict`, {
         symptoms: symptoms
       }, {
         headers: {
-          'Content-Type': 'application/json'
+          'Content-Type': 'application/json',
+          // Lets the ML service drop work we will no longer wait for
+          'X-Request-Deadline': String(Date.now() + this.requestTimeout),
+          // Propagate the request into the ML service's trace file
+          'X-Request-ID': requestId,
+          'traceparent': this.generateTraceparent()
         },
-        timeout: 30000 // 30 second timeout
+        timeout: this.requestTimeout
       });
 
       return response;
@@ -221,6 +229,10 @@ class MLAIService {
       if (error.code === 'ECONNREFUSED') {
         throw new Error('ML service is not running. Please start the prediction service.');
       }
+      if (error.response?.status === 503) {
+        const retryAfter = error.response.headers['retry-after'];
+        throw new Error(`ML service is overloaded. Retry after ${retryAfter || 1}s.`);
+      }
       throw error;
     }
   }
@@ -389,6 +401,16 @@ class MLAIService {
     return `ml_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`;
   }
 
+  /**
+   * Generate a W3C traceparent header starting a new sampled trace
+   * @returns {string} traceparent header value
+   */
+  generateTraceparent() {
+    const traceId = crypto.randomBytes(16).toString('hex');
+    const spanId = crypto.randomBytes(8).toString('hex');
+    return `00-${traceId}-${spanId}-01`;
+  }
+
   /**
    * Get ML service info
    * @returns {Object} Service information